@@ -0,0 +1,26 @@
+"""
+Núcleo de Sonnar sin dependencias de Kivy.
+
+Contiene el acceso a datos (repository) con el versionado de su esquema
+(migrations), los perfiles con su base propia (profiles), el registro
+Medication (models), la cola de recordatorios (scheduler) y los cálculos
+del régimen de dosis (regimen). MedicineApp delega en estos módulos;
+también pueden usarse desde tests, benchmarks o tareas por lotes sin
+cargar la interfaz gráfica.
+"""
+from core.database import ConnectionManager
+from core.models import Medication
+from core.profiles import ProfileStore
+from core.repository import MedicineRepository
+from core.scheduler import ReminderScheduler, next_alert_datetime
+from core.writer import WriteBehindQueue
+
+__all__ = [
+    "ConnectionManager",
+    "Medication",
+    "MedicineRepository",
+    "ProfileStore",
+    "ReminderScheduler",
+    "WriteBehindQueue",
+    "next_alert_datetime",
+]
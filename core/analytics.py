@@ -0,0 +1,221 @@
+"""
+Estadísticas de cumplimiento sobre el historial de dosis.
+
+El historial (dose_events) se lee con una sola consulta y se convierte en
+arreglos de NumPy; todas las métricas se calculan con pasadas vectorizadas
+sobre esos arreglos, sin recorrer los eventos en Python:
+
+- Adherencia: dosis tomadas sobre dosis previstas en el período.
+- Puntualidad: dosis tomadas dentro de ON_TIME_MINUTES de su hora.
+- Retraso medio de las dosis tomadas (las tomadas antes cuentan como 0).
+- Cantidad de veces que se pospuso y de dosis omitidas.
+- Rachas de dosis puntuales seguidas (la mejor y la actual).
+
+Los instantes se manejan como segundos desde 1970 leyendo las fechas
+guardadas como hora local sin zona, igual que strftime('%s') de SQLite.
+Requiere NumPy; la aplicación importa este módulo recién al abrir la
+pantalla de estadísticas.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from core import regimen
+
+
+# Tolerancia para considerar puntual una dosis tomada
+ON_TIME_MINUTES = 30
+
+# Período por defecto de la pantalla de estadísticas
+DEFAULT_DAYS = 30
+
+EVENT_TAKEN, EVENT_SNOOZED, EVENT_MISSED = 0, 1, 2
+
+_EPOCH = datetime(1970, 1, 1)
+
+_EVENT_DTYPE = np.dtype([
+    ('med_id', np.int64),
+    ('event', np.int8),
+    ('scheduled', np.int64),
+    ('recorded', np.int64),
+])
+
+
+def to_seconds(when):
+    """datetime (hora local sin zona) -> segundos desde 1970"""
+    return int((when - _EPOCH).total_seconds())
+
+
+def load_dose_events(db, since=None, until=None):
+    """Historial de dosis como arreglo estructurado de NumPy.
+
+    Una sola consulta para todos los medicamentos; los eventos quedan
+    ordenados por medicamento y, dentro de cada uno, por hora de registro.
+    Campos: med_id, event (EVENT_*), scheduled y recorded (segundos).
+    """
+    conditions = []
+    params = []
+    if since is not None:
+        conditions.append("recorded_at > ?")
+        params.append(since.strftime("%Y-%m-%d %H:%M:%S"))
+    if until is not None:
+        conditions.append("recorded_at <= ?")
+        params.append(until.strftime("%Y-%m-%d %H:%M:%S"))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cursor = db.execute(
+        f"""
+        SELECT med_id,
+               CASE event WHEN 'taken' THEN {EVENT_TAKEN}
+                          WHEN 'snoozed' THEN {EVENT_SNOOZED}
+                          ELSE {EVENT_MISSED} END,
+               CAST(strftime('%s', scheduled_at) AS INTEGER),
+               CAST(strftime('%s', recorded_at) AS INTEGER)
+        FROM dose_events
+        {where}
+        ORDER BY med_id, recorded_at, id
+        """,
+        params,
+    )
+    return np.fromiter(cursor, dtype=_EVENT_DTYPE)
+
+
+def expected_doses(medicines, since, until):
+    """Dosis previstas de cada medicamento en el período (since, until]"""
+    count = len(medicines)
+    starts = np.empty(count, dtype=np.int64)
+    strides = np.empty(count, dtype=np.int64)
+    totals = np.empty(count, dtype=np.int64)
+    for i, med in enumerate(medicines):
+        timetable = regimen.dose_timetable(med)
+        starts[i] = to_seconds(timetable.start)
+        strides[i] = max(int(timetable.stride.total_seconds()), 1)
+        totals[i] = len(timetable)
+
+    def expected_by(when):
+        # Dosis con hora <= when: floor((when - inicio) / intervalo) + 1, acotado al total
+        elapsed = to_seconds(when) - starts
+        return np.clip(np.floor_divide(elapsed, strides) + 1, 0, totals)
+
+    expected = expected_by(until)
+    if since is not None:
+        expected = expected - expected_by(since)
+    return expected
+
+
+def _streaks(positions, success, groups):
+    """Mejor racha y racha actual de éxitos seguidos por grupo.
+
+    positions indica el grupo (0..groups-1) de cada resultado, ya ordenados
+    por grupo; un fallo o el inicio de otro grupo cortan la racha.
+    """
+    best = np.zeros(groups, dtype=np.int64)
+    current = np.zeros(groups, dtype=np.int64)
+    if not len(positions):
+        return best, current
+
+    index = np.arange(len(positions))
+    first = np.ones(len(positions), dtype=bool)
+    first[1:] = positions[1:] != positions[:-1]
+
+    # Última posición que corta la racha: un fallo, o la anterior al inicio del grupo
+    cut = np.where(~success, index, -1)
+    cut = np.maximum(cut, np.where(first, index - 1, -1))
+    run = np.where(success, index - np.maximum.accumulate(cut), 0)
+
+    starts = np.flatnonzero(first)
+    ends = np.append(starts[1:], len(positions)) - 1
+    best[positions[starts]] = np.maximum.reduceat(run, starts)
+    current[positions[ends]] = run[ends]
+    return best, current
+
+
+def _rate(part, whole):
+    return np.divide(part, whole, out=np.zeros(len(part)), where=whole > 0).clip(0, 1)
+
+
+def adherence_stats(events, medicines, until, since=None, on_time_minutes=ON_TIME_MINUTES):
+    """Métricas de cumplimiento de cada medicamento y del total.
+
+    events es el arreglo de load_dose_events; los eventos de medicamentos
+    que no están en medicines se ignoran. Devuelve un diccionario con
+    'medicamentos' (una entrada por medicamento, en el orden recibido) y
+    'total' (las mismas métricas sumando todos los medicamentos).
+    """
+    count = len(medicines)
+    ids = np.array([-1 if med.get('id') is None else int(med['id']) for med in medicines],
+                   dtype=np.int64)
+    order = np.argsort(ids, kind='stable')
+    sorted_ids = ids[order]
+
+    # Posición de cada evento en medicines (por búsqueda binaria sobre los id)
+    slot = np.searchsorted(sorted_ids, events['med_id'])
+    known = slot < count
+    known[known] = sorted_ids[slot[known]] == events['med_id'][known]
+    events = events[known]
+    positions = order[slot[known]]
+
+    kind = events['event']
+    taken = kind == EVENT_TAKEN
+    delay = np.maximum(events['recorded'] - events['scheduled'], 0)
+    punctual = taken & (delay <= on_time_minutes * 60)
+
+    def per_med(mask=None, weights=None):
+        selected = positions if mask is None else positions[mask]
+        if weights is not None and mask is not None:
+            weights = weights[mask]
+        return np.bincount(selected, weights=weights, minlength=count)[:count]
+
+    expected = expected_doses(medicines, since, until)
+    taken_count = per_med(taken).astype(np.int64)
+    on_time = per_med(punctual).astype(np.int64)
+    snoozed = per_med(kind == EVENT_SNOOZED).astype(np.int64)
+    missed = per_med(kind == EVENT_MISSED).astype(np.int64)
+    delay_total = per_med(taken, delay / 60.0)
+
+    # Las rachas solo miran resultados (tomada u omitida), no las posposiciones
+    outcome = kind != EVENT_SNOOZED
+    best, current = _streaks(positions[outcome], punctual[outcome], count)
+
+    adherence = _rate(taken_count, expected)
+    on_time_rate = _rate(on_time, expected)
+
+    rows = []
+    for i, med in enumerate(medicines):
+        rows.append({
+            'id': med['id'],
+            'name': med['name'],
+            'expected': int(expected[i]),
+            'taken': int(taken_count[i]),
+            'on_time': int(on_time[i]),
+            'snoozed': int(snoozed[i]),
+            'missed': int(missed[i]),
+            'adherence': float(adherence[i]),
+            'on_time_rate': float(on_time_rate[i]),
+            'mean_delay': float(delay_total[i] / taken_count[i]) if taken_count[i] else None,
+            'best_streak': int(best[i]),
+            'current_streak': int(current[i]),
+        })
+
+    total_expected = int(expected.sum())
+    total_taken = int(taken_count.sum())
+    total = {
+        'expected': total_expected,
+        'taken': total_taken,
+        'on_time': int(on_time.sum()),
+        'snoozed': int(snoozed.sum()),
+        'missed': int(missed.sum()),
+        'adherence': min(total_taken / total_expected, 1.0) if total_expected else 0.0,
+        'on_time_rate': min(int(on_time.sum()) / total_expected, 1.0) if total_expected else 0.0,
+        'mean_delay': float(delay_total.sum() / total_taken) if total_taken else None,
+        'best_streak': int(best.max()) if count else 0,
+    }
+    return {'medicamentos': rows, 'total': total}
+
+
+def adherence_report(db, medicines, now=None, days=DEFAULT_DAYS):
+    """Estadísticas de los últimos `days` días (todo el historial si days es None)"""
+    now = now or datetime.now()
+    since = now - timedelta(days=days) if days is not None else None
+    events = load_dose_events(db, since, now)
+    return adherence_stats(events, medicines, now, since)
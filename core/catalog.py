@@ -0,0 +1,311 @@
+"""
+Catálogo de medicamentos con búsqueda indexada.
+
+El catálogo fuente es un CSV (name, typical_dose, description). Hay dos
+implementaciones con la misma interfaz (get, prefix, search):
+
+- MedicationCatalog: carga el CSV en memoria e indexa al crearse.
+- MappedCatalog: lee con mmap el archivo binario que genera
+  tools/construir_catalogo.py. Abrirlo no depende del tamaño del catálogo
+  y cada búsqueda solo toca las páginas que necesita.
+
+Índices:
+
+- Nombres normalizados ordenados: búsqueda exacta y por prefijo con bisect
+  (MedicationCatalog además usa un diccionario para la búsqueda exacta).
+- Índice invertido de trigramas: búsqueda aproximada (errores de tipeo o
+  fragmentos del nombre) puntuada por similitud de Jaccard.
+
+La normalización ignora mayúsculas y tildes, así "losartan" encuentra
+"Losartán".
+"""
+import bisect
+import csv
+import heapq
+import mmap
+import os
+import struct
+import sys
+import unicodedata
+from array import array
+from collections import Counter
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DEFAULT_CATALOG_PATH = os.path.join(DATA_DIR, 'medicamentos.csv')
+DEFAULT_MAPPED_PATH = os.path.join(DATA_DIR, 'medicamentos.cat')
+
+# Similitud mínima para considerar una coincidencia aproximada
+MIN_SIMILARITY = 0.3
+
+# Formato binario: firma (incluye el orden de bytes de los enteros),
+# cantidad de claves, cantidad de trigramas y posición de cada sección
+MAGIC = b'SNCAT\x00\x01' + (b'L' if sys.byteorder == 'little' else b'B')
+HEADER = struct.Struct('<8sII9Q')
+FIELD_SEP = '\x1f'
+
+
+def normalize(text):
+    """Minúsculas, sin tildes y sin espacios repetidos"""
+    text = unicodedata.normalize('NFKD', text.strip().lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.split())
+
+
+def trigrams(key):
+    """Trigramas de un nombre normalizado, con relleno en los bordes"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def read_csv(path=DEFAULT_CATALOG_PATH):
+    """Entradas de un CSV con encabezado name,typical_dose,description"""
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+class BaseCatalog:
+    """Búsquedas comunes a los catálogos en memoria y mapeado.
+
+    Las subclases definen _keys (secuencia ordenada de claves normalizadas),
+    _entry(index), _postings(gram) y _trigram_count(index).
+    """
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def _encode(self, key):
+        """Convierte una clave normalizada al tipo guardado en _keys"""
+        return key
+
+    def get(self, name):
+        """Entrada del catálogo para un nombre exacto (sin distinguir tildes), o None"""
+        key = self._encode(normalize(name))
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            return self._entry(index)
+        return None
+
+    def prefix(self, query, limit=10):
+        """Entradas cuyo nombre empieza con query, en orden alfabético"""
+        return [self._entry(index) for index in self._prefix_indexes(normalize(query), limit)]
+
+    def search(self, query, limit=10):
+        """Mejores coincidencias para lo que se está escribiendo.
+
+        Primero los nombres que empiezan con query; si no alcanzan, se
+        completa con coincidencias aproximadas por trigramas.
+        """
+        key = normalize(query)
+        if not key:
+            return []
+        indexes = self._prefix_indexes(key, limit)
+        if len(indexes) < limit and len(key) >= 3:
+            indexes += self._fuzzy_indexes(key, limit - len(indexes), set(indexes))
+        return [self._entry(index) for index in indexes]
+
+    def _prefix_indexes(self, key, limit):
+        key = self._encode(key)
+        start = bisect.bisect_left(self._keys, key)
+        indexes = []
+        for index in range(start, min(start + limit, len(self._keys))):
+            if not self._keys[index].startswith(key):
+                break
+            indexes.append(index)
+        return indexes
+
+    def _fuzzy_indexes(self, key, limit, exclude):
+        query_grams = trigrams(key)
+        counts = Counter()
+        for gram in query_grams:
+            postings = self._postings(gram)
+            if postings is not None:
+                counts.update(postings)
+
+        # Jaccard >= MIN_SIMILARITY exige al menos esta cantidad de trigramas en común
+        query_size = len(query_grams)
+        min_shared = MIN_SIMILARITY * query_size
+        size = self._trigram_count
+        scored = [
+            (shared / (query_size + size(index) - shared), -index)
+            for index, shared in counts.items()
+            if shared >= min_shared and index not in exclude
+        ]
+        best = heapq.nlargest(limit, (item for item in scored if item[0] >= MIN_SIMILARITY))
+        return [-neg_index for _, neg_index in best]
+
+
+class MedicationCatalog(BaseCatalog):
+    """Catálogo en memoria indexado por nombre, prefijo y trigramas"""
+
+    def __init__(self, entries):
+        by_key = {}
+        for entry in entries:
+            # Ante nombres repetidos se conserva el primero
+            by_key.setdefault(normalize(entry['name']), entry)
+        self._by_key = by_key
+
+        # Índices paralelos ordenados por nombre normalizado
+        self._keys = sorted(by_key)
+        self._entries = [by_key[key] for key in self._keys]
+
+        self._gram_postings = {}
+        self._trigram_counts = []
+        for index, key in enumerate(self._keys):
+            grams = trigrams(key)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._gram_postings.setdefault(gram, []).append(index)
+
+    @classmethod
+    def from_csv(cls, path=DEFAULT_CATALOG_PATH):
+        """Carga el catálogo desde un CSV con encabezado name,typical_dose,description"""
+        return cls(read_csv(path))
+
+    def get(self, name):
+        return self._by_key.get(normalize(name))
+
+    def _entry(self, index):
+        return self._entries[index]
+
+    def _postings(self, gram):
+        return self._gram_postings.get(gram)
+
+    def _trigram_count(self, index):
+        return self._trigram_counts[index]
+
+
+def write_catalog(entries, path):
+    """Genera el archivo binario que lee MappedCatalog y devuelve las entradas escritas.
+
+    Secciones tras el encabezado, alineadas a 4 bytes: offsets y bytes de
+    las claves normalizadas (ordenadas), offsets y bytes de los registros
+    (name, typical_dose y description separados por 0x1F), offsets y bytes
+    de los trigramas (ordenados), offsets de postings, postings (índices de
+    clave) y la cantidad de trigramas de cada clave (un byte).
+    """
+    catalog = MedicationCatalog(entries)
+    grams = sorted(catalog._gram_postings)
+    postings = array('I')
+    posting_offsets = array('I', [0])
+    for gram in grams:
+        postings.extend(catalog._gram_postings[gram])
+        posting_offsets.append(len(postings))
+
+    def string_table(items):
+        offsets = array('I', [0])
+        for item in items:
+            offsets.append(offsets[-1] + len(item))
+        return [offsets.tobytes(), b''.join(items)]
+
+    sections = (
+        string_table([key.encode('utf-8') for key in catalog._keys])
+        + string_table([
+            FIELD_SEP.join((e['name'], e.get('typical_dose') or '', e.get('description') or ''))
+            .encode('utf-8')
+            for e in catalog._entries
+        ])
+        + string_table([gram.encode('utf-8') for gram in grams])
+        + [posting_offsets.tobytes(), postings.tobytes(),
+           bytes(min(count, 255) for count in catalog._trigram_counts)]
+    )
+
+    positions = []
+    body = []
+    position = HEADER.size
+    for data in sections:
+        padding = -position % 4
+        body.append(b'\0' * padding + data)
+        positions.append(position + padding)
+        position += padding + len(data)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(catalog), len(grams), *positions))
+        f.write(b''.join(body))
+    return len(catalog)
+
+
+class _StringTable:
+    """Cadenas (bytes) dentro del mmap, indexables por bisect"""
+
+    def __init__(self, offsets, data):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        return self._data[self._offsets[index]:self._offsets[index + 1]].tobytes()
+
+
+class MappedCatalog(BaseCatalog):
+    """Catálogo leído con mmap desde el archivo de write_catalog"""
+
+    def __init__(self, path=DEFAULT_MAPPED_PATH):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, count, gram_count, *positions = HEADER.unpack_from(self._mmap)
+        except struct.error:
+            magic = None
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} no es un catálogo compatible")
+
+        view = memoryview(self._mmap)
+        (key_offsets, key_data, record_offsets, record_data, gram_offsets,
+         gram_data, posting_offsets, postings, sizes) = positions
+
+        def u32(position, length):
+            return view[position:position + 4 * length].cast('I')
+
+        def table(offsets_at, data_at, length):
+            offsets = u32(offsets_at, length + 1)
+            return _StringTable(offsets, view[data_at:data_at + offsets[-1]])
+
+        self._keys = table(key_offsets, key_data, count)
+        self._records = table(record_offsets, record_data, count)
+        self._grams = table(gram_offsets, gram_data, gram_count)
+        self._posting_offsets = u32(posting_offsets, gram_count + 1)
+        self._all_postings = u32(postings, self._posting_offsets[-1])
+        self._sizes = view[sizes:sizes + count]
+
+    def close(self):
+        """Libera el mapeo; el catálogo no puede usarse después"""
+        self._keys = self._records = self._grams = None
+        self._posting_offsets = self._all_postings = self._sizes = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # Quedan vistas en uso; el mapeo se libera con ellas
+
+    def _encode(self, key):
+        return key.encode('utf-8')
+
+    def _entry(self, index):
+        name, typical_dose, description = self._records[index].decode('utf-8').split(FIELD_SEP)
+        return {'name': name, 'typical_dose': typical_dose, 'description': description}
+
+    def _postings(self, gram):
+        gram = gram.encode('utf-8')
+        index = bisect.bisect_left(self._grams, gram)
+        if index == len(self._grams) or self._grams[index] != gram:
+            return None
+        return self._all_postings[self._posting_offsets[index]:self._posting_offsets[index + 1]]
+
+    def _trigram_count(self, index):
+        return self._sizes[index]
+
+
+def open_catalog(mapped_path=DEFAULT_MAPPED_PATH, csv_path=DEFAULT_CATALOG_PATH):
+    """Abre el catálogo binario; si no existe (o no es válido) carga el CSV"""
+    if os.path.exists(mapped_path):
+        try:
+            return MappedCatalog(mapped_path)
+        except (OSError, ValueError):
+            pass
+    return MedicationCatalog.from_csv(csv_path)
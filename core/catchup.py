@@ -0,0 +1,129 @@
+"""
+Reconciliación de las dosis que vencieron con la app cerrada o en pausa.
+
+El temporizador de recordatorios solo avisa la dosis más cercana; si la
+app no estaba activa (o el reloj de Kivy se detuvo con el dispositivo
+suspendido) los horarios que pasaron entretanto quedan sin registrar.
+find_overdue recorre una vez los medicamentos y, con el horario de cada
+uno (DoseTimetable), calcula aritméticamente qué dosis vencieron sin
+tomarse ni resolverse: no itera minuto a minuto ni día a día.
+
+Una dosis se considera resuelta si se tomó (taken_doses) o si su horario
+es anterior o igual al último ya resuelto del medicamento: el último
+marcado como omitido en el historial o el último avisado en la sesión.
+last_notification_time solo guarda la hora (HH:MM), que no alcanza para
+saber de qué día fue el aviso; por eso se usa el historial.
+
+Una dosis cuyo horario pasó hace menos de REMINDER_WINDOW no es vencida:
+todavía la avisa el temporizador de recordatorios.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from core import regimen
+from core.scheduler import REMINDER_WINDOW
+
+
+# Dosis vencidas de un medicamento: slots son sus horarios (DoseSlots), del
+# más antiguo al más reciente
+Overdue = namedtuple('Overdue', 'med slots')
+
+# Horarios que se listan por medicamento en el aviso consolidado
+MAX_LISTED_SLOTS = 3
+
+
+class DoseSlots:
+    """Horarios timetable[first:stop] sin materializarlos.
+
+    find_overdue guarda solo el rango de índices: cada medicamento cuesta
+    O(1) aunque tenga muchas dosis vencidas, y los datetime se calculan al
+    leerlos (el aviso muestra solo los últimos).
+    """
+
+    __slots__ = ('timetable', 'first', 'stop')
+
+    def __init__(self, timetable, first, stop):
+        self.timetable = timetable
+        self.first = first
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.first
+
+    def __getitem__(self, index):
+        indexes = range(self.first, self.stop)[index]
+        if isinstance(index, slice):
+            return [self.timetable[i] for i in indexes]
+        return self.timetable[indexes]
+
+    def __iter__(self):
+        return (self.timetable[i] for i in range(self.first, self.stop))
+
+    def __add__(self, other):
+        if (isinstance(other, DoseSlots) and other.first == self.stop
+                and (other.timetable.start, other.timetable.stride)
+                == (self.timetable.start, self.timetable.stride)):
+            # Rangos seguidos del mismo horario (p. ej. dos revisiones sin responder)
+            return DoseSlots(other.timetable, self.first, other.stop)
+        return list(self) + list(other)
+
+    def __eq__(self, other):
+        if isinstance(other, (DoseSlots, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"DoseSlots({list(self)!r})"
+
+
+def find_overdue(medicines, now=None, settled=None, window=REMINDER_WINDOW):
+    """Dosis vencidas sin registrar, en una sola pasada sobre los medicamentos.
+
+    settled es med_id -> horario (datetime) hasta el que ya se resolvió.
+    Los horarios de los últimos `window` segundos no se cuentan. Devuelve
+    la lista de Overdue, en el orden de medicines.
+    """
+    now = now or datetime.now()
+    settled = settled or {}
+    cutoff = now - timedelta(seconds=window)
+    overdue = []
+    for med in medicines:
+        if med.get('completed', False) or med.get('id') is None:
+            continue
+        try:
+            timetable = regimen.dose_timetable(med)
+        except (KeyError, TypeError, ValueError):
+            continue
+        first = med.get('taken_doses', 0)
+        last_settled = settled.get(med['id'])
+        if last_settled is not None:
+            first = max(first, timetable.expected_by(last_settled))
+        due = timetable.expected_by(cutoff)
+        if due > first:
+            overdue.append(Overdue(med, DoseSlots(timetable, first, due)))
+    return overdue
+
+
+def merge_settled(*sources):
+    """Combina varios med_id -> horario quedándose con el más reciente de cada uno"""
+    merged = {}
+    for source in sources:
+        for med_id, when in source.items():
+            if when is not None and (med_id not in merged or when > merged[med_id]):
+                merged[med_id] = when
+    return merged
+
+
+def format_overdue(overdue, now=None):
+    """Texto del aviso consolidado: una línea por medicamento"""
+    today = (now or datetime.now()).date()
+    lines = []
+    for item in overdue:
+        listed = item.slots[-MAX_LISTED_SLOTS:]
+        times = ", ".join(
+            f"{slot:%H:%M}" if slot.date() == today else f"{slot:%d/%m %H:%M}" for slot in listed
+        )
+        if len(item.slots) > len(listed):
+            times = f"…, {times}"
+        lines.append(f"{item.med['name']}: {len(item.slots)} dosis ({times})")
+    return "\n".join(lines)
@@ -0,0 +1,91 @@
+"""
+Capa de conexión SQLite reutilizable para Sonnar.
+
+Mantiene una conexión abierta por hilo (en lugar de abrir y cerrar una
+conexión en cada operación) configurada en modo WAL con pragmas ajustados
+para escrituras pequeñas y frecuentes.
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+# Pragmas aplicados a cada conexión nueva
+DEFAULT_PRAGMAS = (
+    ("journal_mode", "WAL"),     # Lectores y escritor no se bloquean entre sí
+    ("synchronous", "NORMAL"),   # En WAL basta con fsync en cada checkpoint
+    ("foreign_keys", "ON"),
+    ("temp_store", "MEMORY"),
+    ("cache_size", "-8000"),     # ~8 MB de caché de páginas
+    ("busy_timeout", "5000"),    # Esperar hasta 5 s si otra conexión escribe
+)
+
+
+class ConnectionManager:
+    """Administra una conexión SQLite de larga duración por hilo."""
+
+    def __init__(self, db_path, pragmas=DEFAULT_PRAGMAS):
+        self.db_path = db_path
+        self.pragmas = pragmas
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def connection(self):
+        """Devuelve la conexión del hilo actual, creándola si no existe"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: las transacciones se abren explícitamente
+            # en transaction(), así una lectura nunca deja un BEGIN colgado.
+            # check_same_thread=False solo para poder cerrarla en close_all();
+            # cada hilo usa únicamente su propia conexión.
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            for name, value in self.pragmas:
+                conn.execute(f"PRAGMA {name}={value}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Ejecuta el bloque dentro de una transacción (commit o rollback)"""
+        conn = self.connection()
+        conn.execute("BEGIN")
+        try:
+            yield conn.cursor()
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def execute(self, sql, params=()):
+        """Ejecuta una consulta de lectura en la conexión del hilo actual"""
+        return self.connection().execute(sql, params)
+
+    def release(self):
+        """Cierra y olvida la conexión del hilo actual.
+
+        Los hilos de corta vida (cargas, respaldos) la llaman al terminar;
+        si no, su conexión queda abierta hasta close_all().
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    def close_all(self):
+        """Cierra todas las conexiones abiertas por cualquier hilo"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
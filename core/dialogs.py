@@ -0,0 +1,103 @@
+"""
+Cola de diálogos con plantillas reutilizables.
+
+Cada tipo de diálogo (información, confirmación, avisos...) se construye
+una sola vez, la primera vez que se muestra, y queda como plantilla: las
+siguientes veces solo se rellena con el texto y las acciones nuevas antes
+de abrirlo. Construir el árbol de widgets de un MDDialog es lo que más
+tarda al abrirlo.
+
+Se muestra un diálogo a la vez: lo que llega mientras hay uno abierto se
+encola y se abre al cerrarse el actual, en lugar de cerrar el que estaba
+abierto. No depende de Kivy: una plantilla es cualquier objeto con
+open(), dismiss() y bind(on_dismiss=...), como MDDialog.
+"""
+from collections import deque
+
+
+class DialogManager:
+    """Muestra diálogos de a uno reutilizando una plantilla por tipo"""
+
+    def __init__(self):
+        self._kinds = {}        # tipo -> (crear, rellenar, se actualiza abierto)
+        self._templates = {}    # tipo -> plantilla ya creada
+        self._queue = deque()   # [tipo, contenido] pendientes
+        self.current = None     # tipo del diálogo abierto
+
+    def __len__(self):
+        """Diálogos pendientes (sin contar el abierto)"""
+        return len(self._queue)
+
+    def register(self, kind, build, fill, live=False):
+        """Registra un tipo de diálogo.
+
+        build() crea la plantilla y fill(plantilla, **contenido) la rellena.
+        Si live es True, mostrar de nuevo ese tipo mientras está abierto (o
+        encolado) actualiza su contenido en lugar de encolar otro.
+        """
+        self._kinds[kind] = (build, fill, live)
+
+    def template(self, kind):
+        """Plantilla de un tipo, creada la primera vez que se pide"""
+        template = self._templates.get(kind)
+        if template is None:
+            build = self._kinds[kind][0]
+            template = self._templates[kind] = build()
+            template.bind(on_dismiss=self._on_dismiss)
+        return template
+
+    def is_open(self, kind=None):
+        return self.current is not None and (kind is None or self.current == kind)
+
+    def show(self, kind, first=False, **content):
+        """Abre un diálogo o lo encola si ya hay uno abierto.
+
+        first pone el diálogo delante de los pendientes (p. ej. los avisos
+        de medicamentos). Devuelve True si quedó abierto.
+        """
+        _, fill, live = self._kinds[kind]
+        if live and self.current == kind:
+            fill(self.template(kind), **content)
+            return True
+        if live:
+            for entry in self._queue:
+                if entry[0] == kind:
+                    entry[1] = content
+                    return False
+        if self.current is not None:
+            if first:
+                self._queue.appendleft([kind, content])
+            else:
+                self._queue.append([kind, content])
+            return False
+        self._open(kind, content)
+        return True
+
+    def dismiss(self, kind=None):
+        """Cierra el diálogo abierto (solo si es de ese tipo, si se indica)"""
+        if self.current is not None and (kind is None or self.current == kind):
+            self._templates[self.current].dismiss()
+
+    def discard(self, kind=None):
+        """Descarta los diálogos pendientes (todos o los de un tipo)"""
+        if kind is None:
+            self._queue.clear()
+        else:
+            self._queue = deque(entry for entry in self._queue if entry[0] != kind)
+
+    def clear(self):
+        """Descarta los pendientes y cierra el diálogo abierto"""
+        self._queue.clear()
+        self.dismiss()
+
+    def _open(self, kind, content):
+        template = self.template(kind)
+        self._kinds[kind][1](template, **content)
+        self.current = kind
+        template.open()
+
+    def _on_dismiss(self, *args):
+        self.current = None
+        if self._queue:
+            kind, content = self._queue.popleft()
+            self._open(kind, content)
@@ -0,0 +1,270 @@
+"""
+Versionado del esquema de la base de medicamentos.
+
+La versión del esquema se guarda en PRAGMA user_version y MIGRATIONS
+lista, en orden, los pasos que llevan la base de una versión a la
+siguiente. migrate() aplica solo los que faltan; si la base ya está al
+día no abre ninguna transacción, así init_db es casi gratis en cada
+arranque y al cambiar de perfil.
+
+Cada paso se confirma en su propia transacción. Los pasos que reescriben
+tablas grandes se marcan con chunked(): se ejecutan por tandas de filas
+(keyset sobre la clave) y cada tanda se confirma aparte, de modo que la
+actualización de una base grande no retiene el bloqueo de escritura
+durante segundos. Esos pasos deben poder repetirse: si la app se cierra a
+mitad de una migración, la versión no avanzó y el paso vuelve a correr
+desde el principio, saltando lo que ya se hizo.
+
+Para agregar un cambio de esquema (índices, tablas, columnas) se suma una
+Migration al final de MIGRATIONS con la versión siguiente; nunca se
+modifican los pasos de una versión ya publicada.
+"""
+from collections import namedtuple
+
+
+# Un cambio de esquema: version es la que queda al terminar todos sus pasos
+Migration = namedtuple('Migration', 'version description steps')
+
+# Filas por transacción en los pasos por tandas
+CHUNK_SIZE = 500
+
+
+def chunked(step):
+    """Marca un paso que se aplica por tandas.
+
+    step(cur, after, limit) procesa hasta `limit` filas con clave mayor que
+    `after` (None en la primera tanda) y devuelve la última clave procesada,
+    o None cuando ya no quedan filas.
+    """
+    step.chunked = True
+    return step
+
+
+def schema_version(db):
+    """Versión del esquema guardada en la base (0 si nunca se migró)"""
+    return db.execute("PRAGMA user_version").fetchone()[0]
+
+
+def legacy_version(db):
+    """Versión de una base creada antes del versionado, según sus tablas"""
+    tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    if 'dose_events' in tables:
+        return 2
+    if 'medicamentos' in tables:
+        return 1
+    return 0
+
+
+def migrate(db, migrations=None, chunk_size=CHUNK_SIZE):
+    """Aplica en orden las migraciones pendientes y devuelve la versión final.
+
+    db es un ConnectionManager. La versión se actualiza en la misma
+    transacción que el último paso de cada migración.
+    """
+    migrations = MIGRATIONS if migrations is None else migrations
+    version = schema_version(db)
+    if version == 0:
+        version = legacy_version(db)
+        if version:
+            # Se guarda antes de migrar: si se interrumpe, la próxima vez no
+            # se deduce de tablas a medio crear
+            with db.transaction() as cur:
+                _set_version(cur, version)
+    for migration in migrations:
+        if migration.version <= version:
+            continue
+        *steps, last = migration.steps
+        for step in steps:
+            _run_step(db, step, chunk_size)
+        _run_step(db, last, chunk_size, migration.version)
+        version = migration.version
+    return version
+
+
+def _run_step(db, step, chunk_size, version=None):
+    if getattr(step, 'chunked', False):
+        after = None
+        while True:
+            with db.transaction() as cur:
+                after = step(cur, after, chunk_size)
+            if after is None:
+                break
+        if version is not None:
+            with db.transaction() as cur:
+                _set_version(cur, version)
+        return
+    with db.transaction() as cur:
+        step(cur)
+        if version is not None:
+            _set_version(cur, version)
+
+
+def _set_version(cur, version):
+    # PRAGMA no admite parámetros; version siempre es un entero de MIGRATIONS
+    cur.execute(f"PRAGMA user_version = {int(version)}")
+
+
+# ====== Versión 1: medicamentos ======
+def create_medicines(cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS medicamentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            time TEXT NOT NULL,
+            grams TEXT NOT NULL,
+            days INTEGER NOT NULL,
+            hours INTEGER NOT NULL,
+            total_doses INTEGER NOT NULL,
+            taken_doses INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            start_date TEXT,
+            current_alert_time TEXT,
+            last_notification_time TEXT
+        )
+        """
+    )
+    # Índice para evitar duplicados lógicos (name+time)
+    cur.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_meds_name_time
+        ON medicamentos(name, time)
+        """
+    )
+
+
+# ====== Versión 2: historial de dosis ======
+def create_dose_events(cur):
+    """Historial de dosis (solo inserciones).
+
+    taken_doses, completed, current_alert_time y last_notification_time
+    quedan como contadores materializados: los triggers (create_dose_triggers)
+    los actualizan con cada evento insertado.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS dose_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            med_id INTEGER NOT NULL REFERENCES medicamentos(id) ON DELETE CASCADE,
+            event TEXT NOT NULL CHECK (event IN ('taken', 'snoozed', 'missed')),
+            alert_time TEXT NOT NULL,
+            scheduled_at TEXT NOT NULL,
+            recorded_at TEXT NOT NULL,
+            next_alert_time TEXT
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_dose_events_med_time
+        ON dose_events(med_id, recorded_at)
+        """
+    )
+
+
+@chunked
+def seed_dose_events(cur, after, limit):
+    """Convierte los contadores de una base anterior al historial en eventos semilla.
+
+    Corre antes de crear los triggers (para no contarlos dos veces) y solo
+    para los medicamentos que todavía no tienen eventos, así una tanda
+    repetida tras una interrupción no los duplica.
+    """
+    cur.execute(
+        "SELECT id FROM medicamentos WHERE id > ? ORDER BY id LIMIT ?",
+        (-1 if after is None else after, limit),
+    )
+    ids = [row[0] for row in cur.fetchall()]
+    if not ids:
+        return None
+    cur.execute(
+        """
+        WITH RECURSIVE seq(n) AS (
+            SELECT 1
+            UNION ALL
+            SELECT n + 1 FROM seq
+            WHERE n < (SELECT COALESCE(MAX(taken_doses), 0) FROM medicamentos
+                       WHERE id BETWEEN ? AND ?)
+        )
+        INSERT INTO dose_events (med_id, event, alert_time, scheduled_at, recorded_at)
+        SELECT id, 'taken', time, at, at
+        FROM (
+            SELECT m.id, m.time,
+                   COALESCE(
+                       datetime(m.start_date || ' ' || m.time,
+                                '+' || ((seq.n - 1) * m.hours) || ' hours'),
+                       datetime('now')
+                   ) AS at
+            FROM medicamentos m
+            JOIN seq ON seq.n <= m.taken_doses
+            WHERE m.id BETWEEN ? AND ?
+              AND NOT EXISTS (SELECT 1 FROM dose_events e WHERE e.med_id = m.id)
+            ORDER BY m.id, seq.n
+        )
+        """,
+        (ids[0], ids[-1], ids[0], ids[-1]),
+    )
+    return ids[-1] if len(ids) == limit else None
+
+
+def create_dose_triggers(cur):
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_dose_taken
+        AFTER INSERT ON dose_events WHEN NEW.event = 'taken'
+        BEGIN
+            UPDATE medicamentos
+            SET taken_doses = MIN(taken_doses + 1, total_doses),
+                completed = CASE WHEN taken_doses + 1 >= total_doses THEN 1 ELSE 0 END,
+                last_notification_time = NEW.alert_time,
+                current_alert_time = time
+            WHERE id = NEW.med_id;
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_dose_snoozed
+        AFTER INSERT ON dose_events WHEN NEW.event = 'snoozed'
+        BEGIN
+            UPDATE medicamentos
+            SET last_notification_time = NEW.alert_time,
+                current_alert_time = NEW.next_alert_time
+            WHERE id = NEW.med_id;
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_dose_missed
+        AFTER INSERT ON dose_events WHEN NEW.event = 'missed'
+        BEGIN
+            UPDATE medicamentos
+            SET last_notification_time = NEW.alert_time
+            WHERE id = NEW.med_id;
+        END
+        """
+    )
+
+
+# ====== Versión 3: páginas de activos y completados ======
+def create_completed_index(cur):
+    # id es el rowid: la búsqueda por completed, el orden y el keyset
+    # se resuelven en el índice
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_meds_completed_id
+        ON medicamentos(completed, id)
+        """
+    )
+
+
+MIGRATIONS = (
+    Migration(1, "Tabla de medicamentos", (create_medicines,)),
+    Migration(2, "Historial de dosis con contadores por triggers",
+              (create_dose_events, seed_dose_events, create_dose_triggers)),
+    Migration(3, "Índice para paginar activos y completados", (create_completed_index,)),
+)
+
+# Versión del esquema que deja migrate()
+LATEST_VERSION = MIGRATIONS[-1].version
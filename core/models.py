@@ -0,0 +1,200 @@
+"""
+Registro compacto de un medicamento cargado desde la base de datos.
+
+Medication reemplaza al diccionario de 13 claves que se creaba por cada
+fila: usa __slots__, guarda días y horas como enteros, la hora de inicio
+y la de aviso como minutos desde medianoche y cachea el total de dosis y
+el horario de tomas (DoseTimetable) del régimen. Mantiene el acceso
+tipo diccionario (med['days'], med.get(...), 'clave' in med) para que
+el resto de la aplicación no cambie.
+"""
+from core.regimen import build_timetable, calculate_doses
+
+
+# Marca de valor derivado aún no calculado (None es un resultado válido)
+_UNSET = object()
+
+
+def _minutes(time_str):
+    """'HH:MM' -> minutos desde medianoche (None si no es válido)"""
+    try:
+        hour, minute = time_str.split(':')
+        return int(hour) * 60 + int(minute)
+    except (AttributeError, ValueError):
+        return None
+
+
+class Medication:
+    """Medicamento con campos ya convertidos y acceso compatible con dict"""
+
+    # Claves expuestas como diccionario, en el orden de la tabla
+    FIELDS = (
+        'id', 'name', 'time', 'grams', 'days', 'hours', 'total_doses',
+        'taken_doses', 'completed', 'start_date', 'current_alert_time',
+        'last_notification_time', 'taken',
+    )
+    _FIELD_SET = frozenset(FIELDS)
+
+    __slots__ = (
+        'id', 'name', 'grams', 'total_doses', 'taken_doses', 'completed',
+        'last_notification_time', 'taken',
+        '_time', '_days', '_hours', '_current_alert_time', '_start_date',
+        '_start_minutes', '_alert_minutes', '_dose_count', '_timetable', '_extra',
+    )
+
+    def __init__(self, id=None, name='', time='00:00', grams='', days=0, hours=0,
+                 total_doses=0, taken_doses=0, completed=False, start_date=None,
+                 current_alert_time=None, last_notification_time=None, taken=False):
+        self.id = id
+        self.name = name
+        self.grams = grams
+        self._time = time
+        self._days = int(days)
+        self._hours = int(hours)
+        self._current_alert_time = current_alert_time or time
+        self.total_doses = total_doses
+        self.taken_doses = taken_doses
+        self.completed = completed
+        self._start_date = start_date
+        self.last_notification_time = last_notification_time
+        self.taken = taken
+        # Los derivados se calculan la primera vez que se consultan
+        self._start_minutes = self._alert_minutes = self._dose_count = _UNSET
+        self._timetable = None
+        self._extra = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Crea el registro desde un diccionario de medicamento"""
+        med = cls()
+        for key, value in data.items():
+            med[key] = value
+        if data.get('current_alert_time') is None:
+            med.current_alert_time = med.time
+        return med
+
+    # Campos con valores derivados: al asignarlos se invalida la caché
+
+    @property
+    def time(self):
+        return self._time
+
+    @time.setter
+    def time(self, value):
+        self._time = value
+        self._start_minutes = _UNSET
+        self._timetable = None
+
+    @property
+    def start_date(self):
+        return self._start_date
+
+    @start_date.setter
+    def start_date(self, value):
+        self._start_date = value
+        self._timetable = None
+
+    @property
+    def current_alert_time(self):
+        return self._current_alert_time
+
+    @current_alert_time.setter
+    def current_alert_time(self, value):
+        self._current_alert_time = value
+        self._alert_minutes = _UNSET
+
+    @property
+    def days(self):
+        return self._days
+
+    @days.setter
+    def days(self, value):
+        self._days = int(value)
+        self._dose_count = _UNSET
+        self._timetable = None
+
+    @property
+    def hours(self):
+        return self._hours
+
+    @hours.setter
+    def hours(self, value):
+        self._hours = int(value)
+        self._dose_count = _UNSET
+        self._timetable = None
+
+    @property
+    def start_minutes(self):
+        """Hora de inicio en minutos desde medianoche"""
+        if self._start_minutes is _UNSET:
+            self._start_minutes = _minutes(self._time)
+        return self._start_minutes
+
+    @property
+    def alert_minutes(self):
+        """Hora de aviso vigente en minutos desde medianoche"""
+        if self._alert_minutes is _UNSET:
+            self._alert_minutes = _minutes(self._current_alert_time)
+        return self._alert_minutes
+
+    @property
+    def dose_count(self):
+        """Total de dosis del régimen (días y frecuencia)"""
+        if self._dose_count is _UNSET:
+            self._dose_count = calculate_doses(self._days, self._hours)
+        return self._dose_count
+
+    @property
+    def timetable(self):
+        """Horario absoluto de todas las dosis del tratamiento"""
+        if self._timetable is None:
+            self._timetable = build_timetable(self._start_date, self.start_minutes,
+                                              self._days, self._hours)
+        return self._timetable
+
+    # Acceso compatible con diccionario
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        return key in self._FIELD_SET or (self._extra is not None and key in self._extra)
+
+    def get(self, key, default=None):
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def keys(self):
+        if self._extra:
+            return list(self.FIELDS) + list(self._extra)
+        return list(self.FIELDS)
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.FIELDS) + (len(self._extra) if self._extra else 0)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"Medication(id={self.id!r}, name={self.name!r}, time={self._time!r})"
@@ -0,0 +1,186 @@
+"""
+Instrumentación opcional de las rutas críticas.
+
+Se activa con la variable de entorno SONNAR_PERF=1 antes de iniciar la
+app (o con enable() antes de importar los módulos instrumentados, en
+tests y benchmarks). Con la instrumentación activa:
+
+- @instrument registra la duración de cada llamada de la función.
+- with span("nombre"): registra la duración de un bloque.
+- Cada medición entra en un buffer circular (RING_SIZE entradas) y se
+  acumula por nombre (llamadas, tiempo total y máximo).
+- summary() da el resumen que muestra el panel en pantalla y
+  dump_trace() guarda el buffer en formato Chrome trace (JSON), que se
+  abre en chrome://tracing o https://ui.perfetto.dev. Si SONNAR_PERF_TRACE
+  indica un archivo, la app lo escribe al cerrarse.
+
+Desactivada, @instrument devuelve la función sin envolver (costo cero) y
+span() devuelve un contexto vacío compartido.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+
+ENV_VAR = "SONNAR_PERF"
+TRACE_ENV_VAR = "SONNAR_PERF_TRACE"
+
+# Mediciones que conserva el buffer circular
+RING_SIZE = 10000
+
+_enabled = os.environ.get(ENV_VAR, "") not in ("", "0")
+_ring = deque(maxlen=RING_SIZE)  # (nombre, inicio_ns, duración_ns, id del hilo)
+_totals = {}                     # nombre -> [llamadas, total_ns, máximo_ns]
+_lock = threading.Lock()
+_origin_ns = time.perf_counter_ns()
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable():
+    """Activa la instrumentación (solo afecta lo que se decore después)"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    """Descarta las mediciones registradas"""
+    with _lock:
+        _ring.clear()
+        _totals.clear()
+
+
+def record(name, start_ns, duration_ns):
+    """Registra una medición ya tomada (inicio según time.perf_counter_ns)"""
+    with _lock:
+        _ring.append((name, start_ns, duration_ns, threading.get_ident()))
+        totals = _totals.get(name)
+        if totals is None:
+            _totals[name] = [1, duration_ns, duration_ns]
+        else:
+            totals[0] += 1
+            totals[1] += duration_ns
+            if duration_ns > totals[2]:
+                totals[2] = duration_ns
+
+
+def instrument(name=None):
+    """Decorador que mide cada llamada; sin efecto si la instrumentación está desactivada.
+
+    Se usa como @instrument() o @instrument("nombre"); por defecto el
+    nombre es Clase.método.
+    """
+    def decorator(func):
+        if not _enabled:
+            return func
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, start, time.perf_counter_ns() - start)
+        return wrapper
+    return decorator
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Contexto que mide un bloque: with span("writer.commit"): ..."""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def summary(limit=None):
+    """Totales por nombre, de mayor a menor tiempo acumulado.
+
+    Cada elemento es un diccionario con name, calls, total_ms, mean_ms y max_ms.
+    """
+    with _lock:
+        items = [(name, *values) for name, values in _totals.items()]
+    items.sort(key=lambda item: item[2], reverse=True)
+    rows = [
+        {
+            'name': name,
+            'calls': calls,
+            'total_ms': total / 1e6,
+            'mean_ms': total / calls / 1e6,
+            'max_ms': maximum / 1e6,
+        }
+        for name, calls, total, maximum in items
+    ]
+    return rows[:limit] if limit else rows
+
+
+def format_summary(limit=8):
+    """Texto del panel en pantalla: una línea por función instrumentada"""
+    lines = [f"{'función':<36}{'n':>6}{'media':>9}{'máx':>9}"]
+    for row in summary(limit):
+        lines.append(f"{row['name'][-36:]:<36}{row['calls']:>6}"
+                     f"{row['mean_ms']:>7.2f}ms{row['max_ms']:>7.1f}ms")
+    return "\n".join(lines)
+
+
+def trace_events():
+    """Mediciones del buffer como eventos completos ('X') de Chrome trace"""
+    with _lock:
+        entries = list(_ring)
+    pid = os.getpid()
+    return [
+        {
+            'name': name,
+            'cat': 'sonnar',
+            'ph': 'X',
+            'ts': (start - _origin_ns) / 1000,
+            'dur': duration / 1000,
+            'pid': pid,
+            'tid': tid,
+        }
+        for name, start, duration, tid in entries
+    ]
+
+
+def dump_trace(path):
+    """Guarda el buffer en path (JSON de Chrome trace) y devuelve la cantidad de eventos"""
+    events = trace_events()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    return len(events)
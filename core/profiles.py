@@ -0,0 +1,180 @@
+"""
+Perfiles de pacientes, cada uno con su propia base de datos.
+
+Un índice (perfiles.db) lista los perfiles y el archivo de cada uno; los
+medicamentos y el historial de un perfil viven en su propio archivo, así
+cargar la lista de un paciente solo lee su base. Los repositorios de los
+perfiles usados recientemente quedan abiertos en una caché LRU; al
+superar su tamaño se cierra el usado hace más tiempo.
+
+La base única anterior (medicamentos.db) pasa a ser el perfil principal.
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from core.database import ConnectionManager
+from core.repository import MedicineRepository
+
+
+INDEX_FILENAME = "perfiles.db"
+DEFAULT_PROFILE_NAME = "Principal"
+DEFAULT_DB_FILENAME = "medicamentos.db"
+
+# Perfiles con la conexión abierta a la vez
+CACHE_SIZE = 3
+
+
+class ProfileStore:
+    """Índice de perfiles y caché LRU de sus repositorios"""
+
+    def __init__(self, base_dir, cache_size=CACHE_SIZE):
+        self.base_dir = base_dir
+        self.cache_size = max(1, cache_size)
+        self.db = ConnectionManager(os.path.join(base_dir, INDEX_FILENAME))
+        self._repositories = OrderedDict()  # profile_id -> MedicineRepository
+        self._lock = threading.Lock()
+
+    def init(self):
+        """Crea el índice; la primera vez registra el perfil principal"""
+        with self.db.transaction() as cur:
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS perfiles (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+                    db_file TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    last_used_at TEXT
+                )
+                """
+            )
+            cur.execute("SELECT 1 FROM perfiles LIMIT 1")
+            if cur.fetchone() is None:
+                cur.execute(
+                    "INSERT INTO perfiles (name, db_file, created_at) VALUES (?, ?, ?)",
+                    (DEFAULT_PROFILE_NAME, DEFAULT_DB_FILENAME, _now()),
+                )
+
+    def list_profiles(self):
+        """Perfiles ordenados por nombre"""
+        rows = self.db.execute(
+            "SELECT id, name, db_file, last_used_at FROM perfiles ORDER BY name"
+        ).fetchall()
+        return [_profile(row) for row in rows]
+
+    def get_profile(self, profile_id):
+        row = self.db.execute(
+            "SELECT id, name, db_file, last_used_at FROM perfiles WHERE id=?",
+            (int(profile_id),),
+        ).fetchone()
+        return _profile(row) if row else None
+
+    def active_profile(self):
+        """Perfil usado más recientemente (el principal si nunca se eligió otro)"""
+        row = self.db.execute(
+            """
+            SELECT id, name, db_file, last_used_at FROM perfiles
+            ORDER BY last_used_at IS NULL, last_used_at DESC, id
+            LIMIT 1
+            """
+        ).fetchone()
+        return _profile(row) if row else None
+
+    def create_profile(self, name):
+        """Registra un perfil nuevo con su propio archivo y lo devuelve.
+
+        Lanza ValueError si el nombre está vacío o ya existe.
+        """
+        name = " ".join(name.split())
+        if not name:
+            raise ValueError("El nombre del perfil no puede estar vacío")
+        try:
+            with self.db.transaction() as cur:
+                cur.execute(
+                    "INSERT INTO perfiles (name, db_file, created_at) VALUES (?, '', ?)",
+                    (name, _now()),
+                )
+                profile_id = cur.lastrowid
+                cur.execute(
+                    "UPDATE perfiles SET db_file=? WHERE id=?",
+                    (f"perfil_{profile_id}.db", profile_id),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Ya existe un perfil llamado {name}") from None
+        return self.get_profile(profile_id)
+
+    def touch(self, profile_id):
+        """Marca el perfil como el usado más recientemente"""
+        with self.db.transaction() as cur:
+            cur.execute("UPDATE perfiles SET last_used_at=? WHERE id=?", (_now(), int(profile_id)))
+
+    def delete_profile(self, profile_id):
+        """Elimina un perfil y su base de datos (no puede quedar el índice vacío)"""
+        profile = self.get_profile(profile_id)
+        if profile is None:
+            return
+        if len(self.list_profiles()) == 1:
+            raise ValueError("No se puede eliminar el único perfil")
+
+        with self._lock:
+            repository = self._repositories.pop(profile['id'], None)
+        if repository is not None:
+            repository.close()
+        with self.db.transaction() as cur:
+            cur.execute("DELETE FROM perfiles WHERE id=?", (profile['id'],))
+
+        path = self.db_path(profile)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    def db_path(self, profile):
+        return os.path.join(self.base_dir, profile['db_file'])
+
+    def repository(self, profile_id):
+        """Repositorio del perfil, abierto una sola vez mientras siga en la caché"""
+        profile_id = int(profile_id)
+        evicted = []
+        with self._lock:
+            repository = self._repositories.get(profile_id)
+            if repository is not None:
+                self._repositories.move_to_end(profile_id)
+                return repository
+
+            profile = self.get_profile(profile_id)
+            if profile is None:
+                raise KeyError(profile_id)
+            repository = MedicineRepository(self.db_path(profile))
+            self._repositories[profile_id] = repository
+            while len(self._repositories) > self.cache_size:
+                evicted.append(self._repositories.popitem(last=False)[1])
+
+        # Cerrar confirma las escrituras pendientes; se hace fuera del lock
+        for old in evicted:
+            old.close()
+        return repository
+
+    def cached_profiles(self):
+        """Ids de los perfiles con repositorio abierto, del menos al más reciente"""
+        with self._lock:
+            return list(self._repositories)
+
+    def close(self):
+        """Cierra los repositorios abiertos y el índice"""
+        with self._lock:
+            repositories = list(self._repositories.values())
+            self._repositories.clear()
+        for repository in repositories:
+            repository.close()
+        self.db.close_all()
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _profile(row):
+    return {'id': row[0], 'name': row[1], 'db_file': row[2], 'last_used_at': row[3]}
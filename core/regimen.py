@@ -0,0 +1,159 @@
+"""
+Cálculos del régimen de dosis de un medicamento.
+
+Funciones puras sobre los diccionarios de medicamento; no dependen de la
+base de datos ni de la interfaz. El horario completo de tomas se
+representa con DoseTimetable (inicio + intervalo + cantidad).
+"""
+import math
+from datetime import datetime, timedelta
+
+
+def calculate_doses(days, hours):
+    """Calcula el número total de dosis basado en días y frecuencia en horas"""
+    try:
+        days_int = int(days)
+        hours_int = int(hours)
+        if days_int <= 0 or hours_int <= 0:
+            return 0
+        # Calcular dosis totales: (días * 24 horas) / frecuencia en horas
+        total_doses = math.ceil((days_int * 24) / hours_int)
+        return total_doses
+    except (ValueError, TypeError):
+        return 0
+
+
+class DoseTimetable:
+    """Horario absoluto de todas las dosis de un tratamiento.
+
+    Se guarda como inicio, intervalo y cantidad de dosis: la dosis i es
+    start + i * stride, así que todas las consultas son aritméticas (O(1)).
+    """
+
+    __slots__ = ('start', 'stride', 'count')
+
+    def __init__(self, start, stride, count):
+        self.start = start
+        self.stride = stride
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self.start + index * self.stride
+
+    def __iter__(self):
+        return (self.start + i * self.stride for i in range(self.count))
+
+    @property
+    def end(self):
+        """Fecha/hora de la última dosis (None si no hay dosis)"""
+        return self[-1] if self.count else None
+
+    def expected_by(self, now):
+        """Dosis cuyo horario ya llegó a `now` (incluida la de ese instante)"""
+        if self.count == 0 or now < self.start:
+            return 0
+        return min((now - self.start) // self.stride + 1, self.count)
+
+    def next_dose(self, taken_doses):
+        """Horario de la siguiente dosis a tomar, o None si ya se tomaron todas"""
+        if taken_doses >= self.count:
+            return None
+        return self[max(taken_doses, 0)]
+
+    def next_after(self, now):
+        """Primer horario estrictamente posterior a `now`, o None"""
+        index = self.expected_by(now)
+        return self[index] if index < self.count else None
+
+    def is_due(self, now, taken_doses):
+        """True si la siguiente dosis a tomar ya debería haberse tomado"""
+        due = self.next_dose(taken_doses)
+        return due is not None and due <= now
+
+
+def build_timetable(start_date, start_minutes, days, hours):
+    """Crea el horario desde la fecha de inicio (YYYY-MM-DD) y la hora en minutos"""
+    if days <= 0 or hours <= 0 or start_minutes is None:
+        return DoseTimetable(datetime.min, timedelta(hours=1), 0)
+    try:
+        year, month, day = map(int, start_date.split('-'))
+        start = datetime(year, month, day)
+    except (AttributeError, ValueError):
+        # Sin fecha de inicio válida se asume hoy (como al cargar de la BD)
+        start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return DoseTimetable(start + timedelta(minutes=start_minutes), timedelta(hours=hours),
+                         calculate_doses(days, hours))
+
+
+def dose_timetable(med):
+    """Horario de dosis de un medicamento (cacheado en los Medication)"""
+    try:
+        return med.timetable
+    except AttributeError:
+        try:
+            hour, minute = med['time'].split(':')
+            start_minutes = int(hour) * 60 + int(minute)
+        except (KeyError, AttributeError, ValueError):
+            start_minutes = None
+        return build_timetable(med.get('start_date'), start_minutes,
+                               int(med['days']), int(med['hours']))
+
+
+def get_medication_progress(med, now=None):
+    """Calcula el progreso del medicamento basado en las dosis tomadas.
+
+    Devuelve (total_doses, expected_doses, taken_doses); las dosis esperadas
+    son las del horario cuya hora ya pasó.
+    """
+    try:
+        timetable = dose_timetable(med)
+        if not timetable.count:
+            return 0, 0, 0
+        taken_doses = med.get('taken_doses', 0)
+        return timetable.count, timetable.expected_by(now or datetime.now()), taken_doses
+    except Exception:
+        return 0, 0, 0
+
+
+def next_dose_datetime(med):
+    """Fecha/hora de la próxima dosis según las dosis tomadas (None si terminó)"""
+    try:
+        return dose_timetable(med).next_dose(med.get('taken_doses', 0))
+    except Exception:
+        return None
+
+
+def upcoming_dose_datetime(med, now, settled=None, window=0):
+    """Dosis que toca avisar: la siguiente sin tomar o, si esa ya se avisó u
+    omitió (settled es el horario hasta el que se resolvió), el primer
+    horario posterior. Los horarios que pasaron hace más de `window`
+    segundos se saltean (son dosis vencidas). None si ya no quedan dosis.
+    """
+    timetable = dose_timetable(med)
+    due = timetable.next_dose(med.get('taken_doses', 0))
+    if due is not None and settled is not None and due <= settled:
+        return timetable.next_after(max(now - timedelta(seconds=window), settled))
+    return due
+
+
+def calculate_next_dose_time(med):
+    """Calcula la hora (HH:MM) de la próxima dosis basada en las dosis tomadas"""
+    next_dose = next_dose_datetime(med)
+    if next_dose is None:
+        return med.get('time', '00:00')
+    return f"{next_dose:%H:%M}"
+
+
+def is_valid_time_format(time_str):
+    try:
+        datetime.strptime(time_str, "%H:%M")
+        return True
+    except Exception:
+        return False
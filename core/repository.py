@@ -0,0 +1,340 @@
+"""
+Repositorio SQLite de medicamentos e historial de dosis.
+
+Concentra todo el acceso a la base de datos de Sonnar para que pueda
+usarse sin la interfaz gráfica (tests, benchmarks, tareas por lotes).
+"""
+from datetime import datetime
+
+from core import migrations, perf
+from core.database import ConnectionManager
+from core.models import Medication
+from core.writer import WriteBehindQueue
+
+
+# Filas por tanda al leer los medicamentos (ver iter_medicines)
+LOAD_CHUNK_SIZE = 200
+
+
+class MedicineRepository:
+    """Acceso a las tablas medicamentos y dose_events de una base de datos"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.db = ConnectionManager(db_path)
+        # Escrituras de dosis y borrados se confirman en lote en segundo plano
+        self.writer = WriteBehindQueue(lambda: self.db)
+
+    def flush(self, timeout=None):
+        """Fuerza la escritura de las mutaciones encoladas"""
+        return self.writer.flush(timeout)
+
+    def release(self):
+        """Cierra la conexión del hilo actual (ver ConnectionManager.release)"""
+        self.db.release()
+
+    def close(self):
+        """Confirma lo pendiente y cierra las conexiones"""
+        self.writer.stop()
+        self.db.close_all()
+
+    def init_db(self):
+        """Crea la base o la actualiza a la última versión del esquema (ver core.migrations)"""
+        return migrations.migrate(self.db)
+
+    _INSERT_DOSE_EVENT = """
+        INSERT INTO dose_events
+        (med_id, event, alert_time, scheduled_at, recorded_at, next_alert_time)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """
+
+    @perf.instrument()
+    def record_dose_event(self, med, event, alert_time, next_alert_time=None, when=None,
+                          scheduled_at=None):
+        """Registra una dosis tomada, pospuesta u omitida en el historial.
+
+        Es una sola inserción que se confirma en segundo plano; los triggers
+        mantienen los contadores de la tabla medicamentos. scheduled_at es
+        el horario de la dosis; por defecto, alert_time del día de `when`.
+        """
+        if med.get('id') is None:
+            return
+        when = when or datetime.now()
+        if scheduled_at is None:
+            scheduled_at = datetime.combine(when.date(), datetime.strptime(alert_time, "%H:%M").time())
+        self.writer.submit(
+            int(med['id']),
+            self._INSERT_DOSE_EVENT,
+            (
+                int(med['id']),
+                event,
+                alert_time,
+                scheduled_at.strftime("%Y-%m-%d %H:%M:%S"),
+                when.strftime("%Y-%m-%d %H:%M:%S"),
+                next_alert_time,
+            ),
+        )
+
+    @perf.instrument()
+    def record_dose_events(self, med, event, slots, when=None):
+        """Registra varias dosis ('taken' o 'missed') de un medicamento, una por horario.
+
+        Se confirman juntas en la misma transacción. Una dosis omitida
+        termina además con cualquier aviso pospuesto del medicamento.
+        """
+        self.record_dose_batch([(med, event, f"{slot:%H:%M}", None, slot) for slot in slots], when)
+
+    @perf.instrument()
+    def record_dose_batch(self, events, when=None):
+        """Registra en una sola transacción eventos de uno o varios medicamentos.
+
+        events son tuplas (med, event, alert_time, next_alert_time, scheduled_at);
+        scheduled_at puede ser None como en record_dose_event.
+        """
+        when = when or datetime.now()
+        recorded_at = when.strftime("%Y-%m-%d %H:%M:%S")
+        ops = []
+        missed = {}  # med_id -> None, en orden: las omitidas cancelan el aviso pospuesto
+        for med, event, alert_time, next_alert_time, scheduled_at in events:
+            if med.get('id') is None:
+                continue
+            med_id = int(med['id'])
+            if scheduled_at is None:
+                scheduled_at = datetime.combine(when.date(), datetime.strptime(alert_time, "%H:%M").time())
+            ops.append((
+                med_id,
+                self._INSERT_DOSE_EVENT,
+                (med_id, event, alert_time, scheduled_at.strftime("%Y-%m-%d %H:%M:%S"),
+                 recorded_at, next_alert_time),
+            ))
+            if event == 'missed':
+                missed[med_id] = None
+        # Después de las inserciones, para que cada grupo vaya en un executemany
+        ops.extend((med_id, "UPDATE medicamentos SET current_alert_time=time WHERE id=?", (med_id,))
+                   for med_id in missed)
+        if ops:
+            self.writer.submit_many(ops)
+
+    def last_missed_doses(self):
+        """Horario de la última dosis omitida de cada medicamento: med_id -> datetime"""
+        self.flush()
+        rows = self.db.execute(
+            """
+            SELECT med_id, MAX(scheduled_at)
+            FROM dose_events
+            WHERE event = 'missed'
+            GROUP BY med_id
+            """
+        ).fetchall()
+        return {med_id: datetime.strptime(at, "%Y-%m-%d %H:%M:%S") for med_id, at in rows}
+
+    def get_dose_history(self, med_id):
+        """Devuelve el historial de eventos de un medicamento, del más antiguo al más reciente"""
+        self.flush()
+        rows = self.db.execute(
+            """
+            SELECT event, alert_time, scheduled_at, recorded_at, next_alert_time
+            FROM dose_events
+            WHERE med_id=?
+            ORDER BY recorded_at, id
+            """,
+            (int(med_id),),
+        ).fetchall()
+        return [
+            {
+                'event': r[0],
+                'alert_time': r[1],
+                'scheduled_at': r[2],
+                'recorded_at': r[3],
+                'next_alert_time': r[4],
+            }
+            for r in rows
+        ]
+
+    _MEDICINE_COLUMNS = """
+        id, name, time, grams, days, hours, total_doses, taken_doses,
+        completed, start_date, current_alert_time, last_notification_time
+    """
+
+    @perf.instrument()
+    def load_medicines(self, completed=None):
+        """Todos los medicamentos (o solo los activos/completados según completed)"""
+        return [med for chunk in self.iter_medicines(completed=completed) for med in chunk]
+
+    def iter_medicines(self, chunk_size=LOAD_CHUNK_SIZE, first_chunk=None, completed=None):
+        """Lee los medicamentos por tandas (listas de Medication), del más reciente al más antiguo.
+
+        Cada tanda es una página por keyset (ver load_medicines_page), así
+        no queda una lectura abierta entre tandas. first_chunk permite que
+        la primera tanda sea más chica (p. ej. lo que entra en pantalla).
+        """
+        # Leer lo que aún está en la cola de escritura
+        self.flush()
+        size = first_chunk or chunk_size
+        before_id = None
+        while True:
+            page = self._medicines_page(before_id, size, completed)
+            if page:
+                yield page
+            if len(page) < size:
+                return
+            before_id = page[-1]['id']
+            size = chunk_size
+
+    def load_medicines_page(self, before_id=None, limit=LOAD_CHUNK_SIZE, completed=None):
+        """Página de hasta `limit` medicamentos con id menor a before_id (keyset).
+
+        Con completed=True/False solo entran los completados o los activos;
+        idx_meds_completed_id resuelve el filtro, el orden y el salto a
+        before_id sin recorrer las páginas anteriores.
+        """
+        self.flush()
+        return self._medicines_page(before_id, limit, completed)
+
+    # Instrumentada aquí y no solo en load_medicines: la carga inicial y el
+    # cambio de perfil leen por tandas con iter_medicines
+    @perf.instrument()
+    def _medicines_page(self, before_id, limit, completed):
+        where, params = [], []
+        if completed is not None:
+            where.append("completed = ?")
+            params.append(1 if completed else 0)
+        if before_id is not None:
+            where.append("id < ?")
+            params.append(int(before_id))
+        rows = self.db.execute(
+            f"""
+            SELECT {self._MEDICINE_COLUMNS}
+            FROM medicamentos
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (*params, limit),
+        ).fetchall()
+        return [self._medication(r) for r in rows]
+
+    def count_medicines(self, completed=None):
+        """Cantidad de medicamentos (activos o completados según completed)"""
+        self.flush()
+        if completed is None:
+            return self.db.execute("SELECT COUNT(*) FROM medicamentos").fetchone()[0]
+        return self.db.execute("SELECT COUNT(*) FROM medicamentos WHERE completed = ?",
+                               (1 if completed else 0,)).fetchone()[0]
+
+    def load_completed_since(self, since=None):
+        """Medicamentos completados con algún evento desde `since` (todos si es None)"""
+        if since is None:
+            return self.load_medicines(completed=True)
+        self.flush()
+        rows = self.db.execute(
+            f"""
+            SELECT {self._MEDICINE_COLUMNS}
+            FROM medicamentos m
+            WHERE completed = 1
+              AND EXISTS (SELECT 1 FROM dose_events e
+                          WHERE e.med_id = m.id AND e.recorded_at > ?)
+            ORDER BY id DESC
+            """,
+            (since.strftime("%Y-%m-%d %H:%M:%S"),),
+        ).fetchall()
+        return [self._medication(r) for r in rows]
+
+    @staticmethod
+    def _medication(r):
+        return Medication(
+            id=r[0],
+            name=r[1],
+            time=r[2],
+            grams=r[3],
+            days=r[4],
+            hours=r[5],
+            total_doses=int(r[6]) if r[6] is not None else 0,
+            taken_doses=int(r[7]) if r[7] is not None else 0,
+            completed=bool(r[8]),
+            start_date=r[9] or datetime.now().strftime("%Y-%m-%d"),
+            current_alert_time=r[10] or r[2],
+            last_notification_time=r[11],
+        )
+
+    def find_registered(self, name, time):
+        """(id, completed) del medicamento registrado con ese name+time, o None"""
+        # Un borrado encolado del mismo name+time ya no cuenta
+        self.flush()
+        row = self.db.execute(
+            "SELECT id, completed FROM medicamentos WHERE name=? AND time=?", (name, time)
+        ).fetchone()
+        return None if row is None else (row[0], bool(row[1]))
+
+    @perf.instrument()
+    def insert_medicine(self, med_dict):
+        # Un borrado encolado del mismo name+time debe aplicarse antes
+        self.flush()
+        with self.db.transaction() as cur:
+            cur.execute(
+                """
+                INSERT OR IGNORE INTO medicamentos
+                (name, time, grams, days, hours, total_doses, taken_doses, completed,
+                 start_date, current_alert_time, last_notification_time)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    med_dict['name'],
+                    med_dict['time'],
+                    med_dict['grams'],
+                    int(med_dict['days']),
+                    int(med_dict['hours']),
+                    int(med_dict.get('total_doses', 0)),
+                    int(med_dict.get('taken_doses', 0)),
+                    1 if med_dict.get('completed', False) else 0,
+                    med_dict.get('start_date'),
+                    med_dict.get('current_alert_time', med_dict['time']),
+                    med_dict.get('last_notification_time'),
+                ),
+            )
+            # Si fue ignorado por duplicado, obtenemos el id existente
+            if cur.rowcount == 0:
+                cur.execute(
+                    "SELECT id FROM medicamentos WHERE name=? AND time=?",
+                    (med_dict['name'], med_dict['time']),
+                )
+                row = cur.fetchone()
+                new_id = row[0] if row else None
+            else:
+                new_id = cur.lastrowid
+        return new_id
+
+    @perf.instrument()
+    def update_medicine(self, med_dict):
+        if 'id' not in med_dict or med_dict['id'] is None:
+            return
+        # Las dosis encoladas deben aplicarse antes que la edición completa
+        self.flush()
+        with self.db.transaction() as cur:
+            cur.execute(
+                """
+                UPDATE medicamentos
+                SET grams=?, days=?, hours=?, total_doses=?, taken_doses=?,
+                    completed=?, start_date=?, current_alert_time=?, last_notification_time=?
+                WHERE id=?
+                """,
+                (
+                    med_dict['grams'],
+                    int(med_dict['days']),
+                    int(med_dict['hours']),
+                    int(med_dict.get('total_doses', 0)),
+                    int(med_dict.get('taken_doses', 0)),
+                    1 if med_dict.get('completed', False) else 0,
+                    med_dict.get('start_date'),
+                    med_dict.get('current_alert_time', med_dict['time']),
+                    med_dict.get('last_notification_time'),
+                    int(med_dict['id']),
+                ),
+            )
+
+    @perf.instrument()
+    def delete_medicine(self, med_id):
+        """Elimina un medicamento de la base de datos (en segundo plano)"""
+        if med_id is None:
+            return
+        self.writer.submit_delete(int(med_id), "DELETE FROM medicamentos WHERE id=?", (int(med_id),))
@@ -0,0 +1,220 @@
+"""
+Planificador de recordatorios basado en una cola de prioridad.
+
+Guarda la próxima hora absoluta de aviso de cada medicamento en un heap,
+de modo que la app solo necesita programar un único temporizador para el
+aviso más cercano en lugar de revisar toda la lista cada minuto. Los
+avisos que vencen juntos se muestran en un único diálogo, respaldado por
+NotificationQueue.
+"""
+import heapq
+import itertools
+from collections import OrderedDict, namedtuple
+from datetime import timedelta
+
+from core import regimen
+
+
+# Los avisos que vencen dentro de esta ventana (segundos) se muestran juntos.
+# Una dosis cuyo horario pasó hace menos que esto todavía se avisa: no cuenta
+# como vencida con la app cerrada (ver catchup.find_overdue)
+REMINDER_WINDOW = 60
+
+
+def next_alert_datetime(alert_time, now, last_notified=None, minutes=None):
+    """Calcula la próxima fecha/hora absoluta para una hora de aviso HH:MM.
+
+    Si la hora de aviso coincide con el minuto actual se devuelve el minuto
+    actual, salvo que ya se haya notificado esa misma hora (last_notified).
+    minutes permite pasar la hora ya convertida a minutos desde medianoche.
+    """
+    if minutes is None:
+        hour, minute = map(int, alert_time.split(':'))
+    else:
+        hour, minute = divmod(minutes, 60)
+    candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    current_minute = now.replace(second=0, microsecond=0)
+    if candidate < current_minute or (candidate == current_minute and last_notified == alert_time):
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def next_reminder_datetime(med, now, notified=None):
+    """Próximo aviso de un medicamento según su horario de dosis.
+
+    Un aviso pospuesto (current_alert_time distinta de time) se respeta tal
+    cual. Si no, se avisa a la hora de la siguiente dosis a tomar; si esa
+    dosis ya se avisó (`notified` es su horario) se espera al siguiente
+    horario del tratamiento. Devuelve None si ya no quedan dosis.
+    """
+    alert_time = med.get('current_alert_time', med['time'])
+    if alert_time != med['time']:
+        return next_alert_datetime(alert_time, now, med.get('last_notification_time'),
+                                   getattr(med, 'alert_minutes', None))
+
+    return regimen.upcoming_dose_datetime(med, now, notified, REMINDER_WINDOW)
+
+
+class ReminderScheduler:
+    """Cola de prioridad con la próxima hora de aviso de cada medicamento.
+
+    Reprogramar o cancelar un medicamento no recorre el heap: la entrada
+    vieja queda invalidada y se descarta cuando llega a la cima.
+    """
+
+    def __init__(self):
+        self._heap = []       # (fire_at, seq, med_id)
+        self._entries = {}    # med_id -> (fire_at, seq) vigente
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, med_id):
+        return med_id in self._entries
+
+    def schedule(self, med_id, fire_at):
+        """Programa (o reprograma) el aviso de un medicamento"""
+        seq = next(self._counter)
+        self._entries[med_id] = (fire_at, seq)
+        heapq.heappush(self._heap, (fire_at, seq, med_id))
+
+    def cancel(self, med_id):
+        """Quita el aviso pendiente de un medicamento"""
+        self._entries.pop(med_id, None)
+
+    def clear(self):
+        self._heap = []
+        self._entries = {}
+
+    def fire_time(self, med_id):
+        """Devuelve la hora programada de un medicamento o None"""
+        entry = self._entries.get(med_id)
+        return entry[0] if entry else None
+
+    def _discard_stale(self):
+        heap = self._heap
+        while heap:
+            fire_at, seq, med_id = heap[0]
+            if self._entries.get(med_id) == (fire_at, seq):
+                return
+            heapq.heappop(heap)
+
+    def peek(self):
+        """Devuelve la hora del aviso más cercano o None si no hay avisos"""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now, limit=None):
+        """Extrae, en orden, los medicamentos cuyo aviso ya venció"""
+        due = []
+        while limit is None or len(due) < limit:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, _, med_id = heapq.heappop(self._heap)
+            del self._entries[med_id]
+            due.append(med_id)
+        return due
+
+
+# Aviso mostrado: alert_time es la hora avisada (HH:MM) y due_at el horario
+# de la dosis en el tratamiento; en un aviso pospuesto (delayed) sigue
+# siendo el horario original, no la hora a la que se pospuso
+Reminder = namedtuple('Reminder', 'med_id alert_time due_at delayed')
+
+
+class NotificationQueue:
+    """Avisos mostrados y todavía sin respuesta, en el orden en que vencieron.
+
+    Hay como mucho un aviso por medicamento: si vuelve a vencer antes de
+    que se responda, reemplaza al anterior en su misma posición.
+    """
+
+    def __init__(self):
+        self._items = OrderedDict()  # med_id -> Reminder
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, med_id):
+        return med_id in self._items
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def push(self, reminder):
+        """Agrega un aviso; devuelve True si el medicamento no tenía uno pendiente"""
+        is_new = reminder.med_id not in self._items
+        self._items[reminder.med_id] = reminder
+        return is_new
+
+    def pop(self, med_id):
+        """Quita y devuelve el aviso de un medicamento (None si no había)"""
+        return self._items.pop(med_id, None)
+
+    def drain(self):
+        """Quita y devuelve todos los avisos, en orden"""
+        items = list(self._items.values())
+        self._items.clear()
+        return items
+
+    def clear(self):
+        self._items.clear()
+
+
+def make_reminder(med, notified=None, snoozed=None):
+    """Aviso de la dosis que toca: la pospuesta o la que indica el horario.
+
+    notified es el horario de la última dosis ya avisada u omitida y
+    snoozed el horario original de la dosis pospuesta (si se conoce).
+    """
+    delayed = med.get('current_alert_time', med['time']) != med['time']
+    if delayed:
+        # La dosis sigue siendo la original: su horario es la referencia del
+        # historial (sin él, tras reiniciar, la primera dosis sin tomar)
+        due_at = snoozed or regimen.next_dose_datetime(med)
+        return Reminder(med.get('id'), med['current_alert_time'], due_at, delayed)
+    due_at = regimen.next_dose_datetime(med)
+    if due_at is not None and notified is not None and due_at <= notified:
+        # Las dosis anteriores ya se avisaron u omitieron: es el horario siguiente
+        due_at = regimen.dose_timetable(med).next_after(notified) or due_at
+    alert_time = f"{due_at:%H:%M}" if due_at else med['time']
+    return Reminder(med.get('id'), alert_time, due_at, delayed)
+
+
+def drain_due(reminders, notifications, find_medicine, now, notified, snoozed,
+              window=REMINDER_WINDOW):
+    """Pasa a notifications todos los avisos que vencen dentro de la ventana.
+
+    reminders es el ReminderScheduler, find_medicine(med_id) devuelve el
+    medicamento (o None) y notified/snoozed son los diccionarios med_id ->
+    horario de MedicineApp, que se actualizan aquí. Cada medicamento avisado
+    queda marcado y con su siguiente aviso programado, por si el diálogo se
+    cierra sin responder: un aviso pospuesto se consume al mostrarse, así
+    los siguientes vuelven al horario del tratamiento. Devuelve la cantidad
+    de avisos agregados.
+    """
+    pushed = 0
+    for med_id in reminders.pop_due(now + timedelta(seconds=window)):
+        med = find_medicine(med_id)
+        if med is None or med.get('completed', False):
+            continue
+        reminder = make_reminder(med, notified.get(med_id), snoozed.get(med_id))
+        notifications.push(reminder)
+        pushed += 1
+
+        # Marcar como notificado para este tiempo específico
+        med['last_notification_time'] = reminder.alert_time
+        if reminder.delayed:
+            # Responderlo sigue usando el Reminder; sin respuesta, la dosis
+            # pospuesta queda como avisada
+            med['current_alert_time'] = med['time']
+            snoozed.pop(med_id, None)
+        if reminder.due_at is not None:
+            last = notified.get(med_id)
+            notified[med_id] = reminder.due_at if last is None else max(last, reminder.due_at)
+        fire_at = next_reminder_datetime(med, now, notified.get(med_id))
+        if fire_at is not None:
+            reminders.schedule(med_id, fire_at)
+    return pushed
@@ -0,0 +1,215 @@
+"""
+Exportación e importación de regímenes e historial de dosis.
+
+Se copian las tablas medicamentos y dose_events a un único archivo, en
+JSON Lines (un objeto por línea) o CSV. Cada registro lleva un campo
+'tipo' ('medicamento' o 'dosis'); los medicamentos van primero.
+
+Las filas se procesan de a una con generadores: la exportación recorre el
+cursor de SQLite y la importación lee el archivo línea por línea e inserta
+en lotes con executemany. Así la memoria no depende del tamaño del
+historial.
+
+Al importar, cada medicamento recibe un id nuevo y sus eventos se
+reasignan a ese id. Un medicamento que ya existe (mismo nombre y hora) se
+omite junto con su historial, así importar dos veces el mismo respaldo
+no duplica datos. Los triggers del historial actualizan los contadores
+al insertar cada evento; al terminar se restauran los valores exportados.
+"""
+import csv
+import json
+import os
+import time
+
+
+MED_FIELDS = (
+    'id', 'name', 'time', 'grams', 'days', 'hours', 'total_doses', 'taken_doses',
+    'completed', 'start_date', 'current_alert_time', 'last_notification_time',
+)
+DOSE_FIELDS = ('med_id', 'event', 'alert_time', 'scheduled_at', 'recorded_at', 'next_alert_time')
+
+# Columnas del CSV: el tipo de registro y la unión de los campos de ambas tablas
+CSV_FIELDS = ('tipo',) + MED_FIELDS + tuple(f for f in DOSE_FIELDS if f not in MED_FIELDS)
+
+KIND_MEDICATION = 'medicamento'
+KIND_DOSE = 'dosis'
+
+FORMATS = ('jsonl', 'csv')
+
+# Filas por executemany al importar
+BATCH_SIZE = 1000
+
+# Campos que la importación restaura tras insertar el historial
+_COUNTER_FIELDS = ('taken_doses', 'completed', 'current_alert_time', 'last_notification_time')
+
+
+def detect_format(path):
+    """Formato según la extensión del archivo ('jsonl' o 'csv')"""
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    if ext in ('jsonl', 'ndjson', 'json'):
+        return 'jsonl'
+    if ext == 'csv':
+        return 'csv'
+    raise ValueError(f"Formato no reconocido para {path} (usar .jsonl o .csv)")
+
+
+def iter_records(db):
+    """Registros a exportar: primero los medicamentos y luego el historial"""
+    for row in db.execute(f"SELECT {', '.join(MED_FIELDS)} FROM medicamentos ORDER BY id"):
+        record = dict(zip(MED_FIELDS, row))
+        record['tipo'] = KIND_MEDICATION
+        yield record
+    for row in db.execute(f"SELECT {', '.join(DOSE_FIELDS)} FROM dose_events ORDER BY id"):
+        record = dict(zip(DOSE_FIELDS, row))
+        record['tipo'] = KIND_DOSE
+        yield record
+
+
+def write_jsonl(records, f):
+    count = 0
+    for record in records:
+        f.write(json.dumps(record, ensure_ascii=False))
+        f.write('\n')
+        count += 1
+    return count
+
+
+def write_csv(records, f):
+    writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    count = 0
+    for record in records:
+        writer.writerow(record)
+        count += 1
+    return count
+
+
+def read_jsonl(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def read_csv(f):
+    # En CSV no hay nulos: una celda vacía se lee como None
+    for row in csv.DictReader(f):
+        yield {key: (value if value != '' else None) for key, value in row.items()}
+
+
+def _report(medications, doses, skipped, start):
+    elapsed = time.perf_counter() - start
+    rows = medications + doses
+    return {
+        'medicamentos': medications,
+        'dosis': doses,
+        'omitidos': skipped,
+        'segundos': elapsed,
+        'filas_por_segundo': rows / elapsed if elapsed > 0 else float(rows),
+    }
+
+
+def format_summary(result):
+    """Resumen legible de export_data o import_data"""
+    text = f"{result['medicamentos']} medicamentos, {result['dosis']} dosis"
+    if result['omitidos']:
+        text += f" ({result['omitidos']} omitidos por estar ya registrados)"
+    rate = f"{result['filas_por_segundo']:,.0f}".replace(',', '.')
+    return f"{text}\n{result['segundos']:.2f} s, {rate} filas/s"
+
+
+def export_data(repository, path, fmt=None):
+    """Exporta medicamentos e historial a path y devuelve el resumen con el rendimiento"""
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconocido: {fmt}")
+    start = time.perf_counter()
+    repository.flush()
+
+    counts = {KIND_MEDICATION: 0, KIND_DOSE: 0}
+
+    def counted(records):
+        for record in records:
+            counts[record['tipo']] += 1
+            yield record
+
+    # Se escribe a un temporal para no dejar un respaldo a medias si falla
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        (write_jsonl if fmt == 'jsonl' else write_csv)(counted(iter_records(repository.db)), f)
+    os.replace(tmp_path, path)
+    return _report(counts[KIND_MEDICATION], counts[KIND_DOSE], 0, start)
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_data(repository, path, fmt=None, batch_size=BATCH_SIZE):
+    """Importa un respaldo de export_data en una sola transacción.
+
+    Devuelve el resumen con las filas importadas, las omitidas (medicamentos
+    ya existentes y sus dosis) y el rendimiento.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconocido: {fmt}")
+    start = time.perf_counter()
+    repository.init_db()
+    repository.flush()
+
+    id_map = {}     # id del respaldo -> id nuevo (None si se omitió)
+    counters = []   # valores exportados de los contadores, por medicamento importado
+    medications = doses = skipped = 0
+
+    insert_med = f"""
+        INSERT OR IGNORE INTO medicamentos ({', '.join(MED_FIELDS[1:])})
+        VALUES ({', '.join('?' * (len(MED_FIELDS) - 1))})
+    """
+    insert_dose = f"""
+        INSERT INTO dose_events ({', '.join(DOSE_FIELDS)})
+        VALUES ({', '.join('?' * len(DOSE_FIELDS))})
+    """
+
+    with open(path, newline='', encoding='utf-8') as f, repository.db.transaction() as cur:
+        records = read_jsonl(f) if fmt == 'jsonl' else read_csv(f)
+        for batch in _batches(records, batch_size):
+            dose_rows = []
+            for record in batch:
+                kind = record.get('tipo')
+                if kind == KIND_MEDICATION:
+                    # Pocas filas: de a una para conocer el id asignado
+                    cur.execute(insert_med, [record.get(field) for field in MED_FIELDS[1:]])
+                    if cur.rowcount:
+                        id_map[int(record['id'])] = cur.lastrowid
+                        counters.append([record.get(field) for field in _COUNTER_FIELDS]
+                                        + [cur.lastrowid])
+                        medications += 1
+                    else:
+                        id_map[int(record['id'])] = None
+                        skipped += 1
+                elif kind == KIND_DOSE:
+                    med_id = id_map.get(int(record['med_id']))
+                    if med_id is None:
+                        skipped += 1
+                        continue
+                    dose_rows.append([med_id] + [record.get(field) for field in DOSE_FIELDS[1:]])
+                else:
+                    raise ValueError(f"Tipo de registro desconocido: {kind!r}")
+            if dose_rows:
+                cur.executemany(insert_dose, dose_rows)
+                doses += len(dose_rows)
+
+        # Los triggers recalcularon los contadores; se dejan como en el respaldo
+        cur.executemany(
+            f"UPDATE medicamentos SET {', '.join(f'{field}=?' for field in _COUNTER_FIELDS)} WHERE id=?",
+            counters,
+        )
+    return _report(medications, doses, skipped, start)
@@ -0,0 +1,237 @@
+"""
+Datos de presentación de la lista de medicamentos, de los avisos y de las
+estadísticas.
+
+Convierte un medicamento (o sus métricas de cumplimiento) en el
+diccionario que consume el RecycleView (textos, progreso y colores). No
+crea widgets, por lo que también puede medirse o probarse sin cargar Kivy.
+"""
+from datetime import datetime, timedelta
+
+from core import regimen
+from core.scheduler import REMINDER_WINDOW
+
+
+def format_dose_time(when, now):
+    """Hora de una dosis con el día si no es hoy ('mañana 08:00', '25/10 08:00')"""
+    if when.date() == now.date():
+        return f"{when:%H:%M}"
+    if when.date() == now.date() + timedelta(days=1):
+        return f"mañana {when:%H:%M}"
+    return f"{when:%d/%m %H:%M}"
+
+
+def medication_card_data(med, now=None, settled=None):
+    """Genera el diccionario de datos de la tarjeta de un medicamento.
+
+    settled es el horario de la última dosis ya avisada u omitida: la
+    próxima dosis se calcula igual que el próximo aviso (ver
+    regimen.upcoming_dose_datetime).
+    """
+    now = now or datetime.now()
+
+    # Calcular progreso actual
+    total_doses, expected_doses, taken_doses = regimen.get_medication_progress(med, now)
+
+    # Actualizar solo total_doses, no sobrescribir taken_doses
+    med['total_doses'] = total_doses
+
+    # Calcular próxima dosis basada en la frecuencia del medicamento
+    # Solo usar el tiempo de alerta actual si el medicamento está retrasado y no se ha tomado
+    delayed = med.get('current_alert_time', med['time']) != med['time']
+    if delayed and not med.get('taken', False):
+        # Si está retrasado y no se ha tomado, mostrar el tiempo retrasado
+        next_dose_time = med.get('current_alert_time', med['time'])
+    else:
+        # Si ya se tomó o no está retrasado, la próxima dosis sale del horario
+        try:
+            next_dose = regimen.upcoming_dose_datetime(med, now, settled, REMINDER_WINDOW)
+        except Exception:
+            next_dose = None
+        next_dose_time = format_dose_time(next_dose, now) if next_dose else "completado"
+
+    # Determinar los colores de la card basado en el progreso
+    progress_value = taken_doses / total_doses if total_doses > 0 else 0
+    if progress_value >= 1.0:
+        card_color = (0.9, 0.98, 0.9, 1)  # Verde muy claro para completado
+        border_color = (0.2, 0.7, 0.2, 1)
+    elif progress_value > 0.5:
+        card_color = (0.95, 0.97, 1, 1)  # Azul muy claro para en progreso
+        border_color = (0.2, 0.6, 0.9, 1)
+    else:
+        card_color = (1, 0.98, 0.95, 1)  # Naranja muy claro para pendiente
+        border_color = (0.9, 0.6, 0.2, 1)
+
+    percentage = int(progress_value * 100) if total_doses > 0 else 0
+
+    return {
+        'med_id': med['id'] if med.get('id') is not None else -1,
+        'med_name': med['name'].title(),
+        'dose_text': f"Dosis: {med.get('taken_doses', 0)}/{med.get('total_doses', 0)}",
+        'next_dose_text': f"Próxima dosis: {next_dose_time}{' (Retrasado)' if delayed else ''}",
+        'next_dose_color': (0.7, 0.3, 0.0, 1) if delayed else (0.2, 0.2, 0.2, 1),
+        'hours_text': f"Cada {med['hours']}h",
+        'days_text': f"{med['days']} días restantes",
+        'percentage_text': f"{percentage}%",
+        'progress': min(progress_value, 1.0),
+        'progress_color': border_color,
+        'md_bg_color': card_color,
+        'line_color': border_color,
+    }
+
+
+def _percent(rate):
+    return f"{int(round(rate * 100))}%"
+
+
+def stats_summary_text(total):
+    """Resumen del período para el encabezado de la pantalla de estadísticas"""
+    if not total['expected'] and not total['taken']:
+        return "Sin dosis registradas en este período"
+    delay = total['mean_delay']
+    return (
+        f"Adherencia {_percent(total['adherence'])} · A tiempo {_percent(total['on_time_rate'])}\n"
+        f"Retraso medio: {'-' if delay is None else f'{delay:.0f} min'} · "
+        f"Pospuestas: {total['snoozed']}"
+    )
+
+
+def stats_row_data(stats):
+    """Genera el diccionario de datos de la fila de estadísticas de un medicamento"""
+    adherence = stats['adherence']
+    if adherence >= 0.9:
+        color = (0.2, 0.7, 0.2, 1)
+    elif adherence >= 0.6:
+        color = (0.2, 0.6, 0.9, 1)
+    else:
+        color = (0.9, 0.6, 0.2, 1)
+
+    delay = stats['mean_delay']
+    return {
+        'med_id': stats['id'] if stats.get('id') is not None else -1,
+        'med_name': stats['name'].title(),
+        'adherence_text': _percent(adherence),
+        'detail_text': (
+            f"Tomadas {stats['taken']}/{stats['expected']} · "
+            f"A tiempo {_percent(stats['on_time_rate'])} · "
+            f"Retraso {'-' if delay is None else f'{delay:.0f} min'}"
+        ),
+        'streak_text': (
+            f"Racha: {stats['current_streak']} (mejor {stats['best_streak']}) · "
+            f"Pospuestas: {stats['snoozed']}"
+        ),
+        'progress': adherence,
+        'progress_color': color,
+    }
+
+
+def reminder_headline(count):
+    """Título del diálogo de avisos según cuántos medicamentos incluye"""
+    if count == 1:
+        return "¡Es hora de tu medicamento!"
+    return f"¡Es hora de {count} medicamentos!"
+
+
+def reminder_row_text(med, reminder):
+    """Texto de la fila de un medicamento en el diálogo de avisos"""
+    delay_text = " (Retrasado)" if reminder.delayed else ""
+    return (
+        f"{med['name']} ({med['grams']}mg)\n"
+        f"Dosis {med.get('taken_doses', 0) + 1}/{med.get('total_doses', 0)} · "
+        f"{reminder.alert_time}{delay_text}"
+    )
+
+
+def archive_header_data(total, expanded):
+    """Datos de la fila que abre o cierra la sección de tratamientos completados"""
+    return {
+        'text': f"Tratamientos completados ({total})",
+        'icon': "chevron-up" if expanded else "chevron-down",
+    }
+
+
+class ListInvalidation:
+    """Cambios de la lista pendientes de dibujar, acumulados hasta el próximo frame.
+
+    mark() pide actualizar la tarjeta de un medicamento; mark_all() pide
+    reconstruir el modelo completo (altas, bajas o recarga) y absorbe las
+    tarjetas ya marcadas.
+    """
+
+    def __init__(self):
+        self.full = False
+        self.ids = set()
+
+    def __bool__(self):
+        return self.full or bool(self.ids)
+
+    def mark(self, med_id):
+        if not self.full:
+            self.ids.add(med_id)
+
+    def mark_all(self):
+        self.full = True
+        self.ids.clear()
+
+    def take(self):
+        """Devuelve (reconstruir todo, ids a actualizar) y deja la lista limpia"""
+        full, ids = self.full, self.ids
+        self.full, self.ids = False, set()
+        return full, ids
+
+
+def _card_signature(med, today, settled):
+    """Valores de los que dependen los datos de la tarjeta (y la fecha de hoy)"""
+    return (
+        today, settled, med.get('taken_doses', 0), med.get('current_alert_time'), med.get('taken', False),
+        med['time'], med.get('start_date'), med['days'], med['hours'], med['name'], med.get('id'),
+    )
+
+
+class CardDataPool:
+    """Diccionarios de datos de tarjeta reutilizables, uno por medicamento.
+
+    Cada refresco de la lista vuelve a entregar el mismo diccionario de
+    cada medicamento; solo se recalcula (en sitio) si cambió algún valor
+    que muestra la tarjeta, así un refresco sin cambios no crea textos,
+    tuplas ni diccionarios nuevos.
+    """
+
+    def __init__(self):
+        self._entries = {}  # med_id -> [firma, datos]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def bind(self, med, now=None, settled=None):
+        """Datos de la tarjeta de med, actualizados si hizo falta"""
+        now = now or datetime.now()
+        signature = _card_signature(med, now.date(), settled)
+        key = med.get('id')
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [signature, medication_card_data(med, now, settled)]
+        elif entry[0] != signature:
+            entry[0] = signature
+            entry[1].update(medication_card_data(med, now, settled))
+        return entry[1]
+
+    def build(self, meds, now=None, settled=None):
+        """Lista de datos para el RecycleView; descarta los medicamentos que ya no están.
+
+        settled es med_id -> horario de la última dosis ya avisada u omitida.
+        """
+        now = now or datetime.now()
+        settled = settled or {}
+        data = [self.bind(med, now, settled.get(med.get('id'))) for med in meds]
+        if len(self._entries) > len(data):
+            current = {med.get('id') for med in meds}
+            for key in [key for key in self._entries if key not in current]:
+                del self._entries[key]
+        return data
+
+    def discard(self, med_id):
+        self._entries.pop(med_id, None)
+
+    def clear(self):
+        self._entries.clear()
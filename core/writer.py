@@ -0,0 +1,216 @@
+"""
+Cola de escritura diferida (write-behind) para SQLite.
+
+Las mutaciones se encolan desde el hilo de la interfaz y un hilo de fondo
+las confirma en una sola transacción cada cierto intervalo, de modo que
+tocar "Ya lo tomé" no espera al commit ni al fsync del almacenamiento.
+
+Si la base está bloqueada por otra conexión (p. ej. una importación en
+curso) el lote vuelve a la cola y se reintenta; solo se descartan las
+escrituras que la base rechaza por sí mismas (restricciones, UNIQUE).
+"""
+import atexit
+import logging
+import sqlite3
+import threading
+from itertools import groupby
+
+from core import perf
+
+
+logger = logging.getLogger(__name__)
+
+# Segundos entre reintentos de un lote que encontró la base bloqueada
+RETRY_DELAY = 1.0
+
+# Reintentos al detener la cola antes de dejar el lote sin escribir
+STOP_ATTEMPTS = 3
+
+
+def is_busy_error(exc):
+    """True si exc indica que otra conexión retiene la base (error transitorio)"""
+    message = str(exc).lower()
+    return isinstance(exc, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+
+class WriteBehindQueue:
+    """Agrupa escrituras pendientes por medicamento y las confirma en lote.
+
+    get_db es una función que devuelve el ConnectionManager a usar; el hilo
+    escritor obtiene así su propia conexión.
+    """
+
+    def __init__(self, get_db, flush_interval=0.25, retry_delay=RETRY_DELAY):
+        self.get_db = get_db
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self._cond = threading.Condition()
+        self._pending = {}         # med_id -> [(sql, params), ...] en orden
+        self._replaced = set()     # med_id borrados desde que se tomó el lote en curso
+        self._submitted = 0        # número de la última operación encolada
+        self._committed = 0        # número de la última operación confirmada
+        self._failures = 0         # lotes que no se pudieron confirmar
+        self._flush_requested = False
+        self._stopping = False
+        self._thread = None
+        self._atexit_registered = False
+
+    def submit(self, med_id, sql, params):
+        """Encola una escritura asociada a un medicamento"""
+        with self._cond:
+            self._pending.setdefault(med_id, []).append((sql, params))
+            self._submitted += 1
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def submit_many(self, ops):
+        """Encola varias escrituras (med_id, sql, params) de una vez.
+
+        Se agregan bajo el mismo candado, así el hilo escritor las confirma
+        siempre en la misma transacción.
+        """
+        with self._cond:
+            for med_id, sql, params in ops:
+                self._pending.setdefault(med_id, []).append((sql, params))
+                self._submitted += 1
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def submit_delete(self, med_id, sql, params):
+        """Encola el borrado de un medicamento descartando sus escrituras pendientes"""
+        with self._cond:
+            self._pending[med_id] = [(sql, params)]
+            self._replaced.add(med_id)
+            self._submitted += 1
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def has_pending(self):
+        with self._cond:
+            return self._committed < self._submitted
+
+    def flush(self, timeout=None):
+        """Bloquea hasta que todo lo encolado antes de la llamada esté confirmado.
+
+        Devuelve False si algo quedó sin confirmar: venció el timeout o el
+        intento de escritura encontró la base bloqueada (el lote sigue en la
+        cola y se reintenta).
+        """
+        with self._cond:
+            target = self._submitted
+            if self._committed >= target:
+                return True
+            if self._thread is not None:
+                failures = self._failures
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._cond.wait_for(
+                    lambda: self._committed >= target or self._failures != failures, timeout)
+                return self._committed >= target
+            batch, batch_target = self._take_batch_locked()
+        # Sin hilo escritor (p. ej. tras stop()): confirmar en este hilo
+        self._commit(batch, batch_target)
+        with self._cond:
+            return self._committed >= target
+
+    def stop(self):
+        """Confirma lo pendiente y detiene el hilo escritor"""
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        thread.join()
+        with self._cond:
+            self._thread = None
+            self._stopping = False
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sonnar-writer", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                # Garantiza que nada quede sin escribir al salir del intérprete
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def _run(self):
+        failed = 0  # intentos seguidos con la base bloqueada
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                if failed:
+                    if self._stopping and failed >= STOP_ATTEMPTS:
+                        logger.error("La base sigue bloqueada: %d escrituras quedan sin confirmar",
+                                     self._submitted - self._committed)
+                        return
+                    self._cond.wait_for(lambda: self._stopping, self.retry_delay)
+                # Ventana de agrupamiento, salvo que se pida un flush o se detenga
+                elif not self._flush_requested and not self._stopping:
+                    self._cond.wait(self.flush_interval)
+                batch, target = self._take_batch_locked()
+                failures = self._failures
+            # El commit ocurre sin el candado: la UI puede seguir encolando
+            self._commit(batch, target)
+            with self._cond:
+                failed = failed + 1 if self._failures != failures else 0
+
+    def _take_batch_locked(self):
+        batch, self._pending = self._pending, {}
+        self._replaced = set()
+        self._flush_requested = False
+        return batch, self._submitted
+
+    def _requeue(self, batch):
+        """Devuelve un lote fallido a la cola, antes de lo encolado después.
+
+        Las operaciones de un medicamento borrado mientras tanto se descartan
+        (su borrado ya reemplazó lo pendiente, como en submit_delete).
+        """
+        with self._cond:
+            pending = {}
+            for med_id, ops in batch.items():
+                if med_id not in self._replaced:
+                    pending[med_id] = ops + self._pending.pop(med_id, [])
+            pending.update(self._pending)
+            self._pending = pending
+            self._failures += 1
+            self._cond.notify_all()
+
+    @perf.instrument("WriteBehindQueue.commit")
+    def _commit(self, batch, target):
+        try:
+            with self.get_db().transaction() as cur:
+                for ops in batch.values():
+                    # Operaciones consecutivas con la misma sentencia van juntas;
+                    # un savepoint por grupo evita que un error descarte el lote
+                    for sql, group in groupby(ops, key=lambda op: op[0]):
+                        cur.execute("SAVEPOINT grupo")
+                        try:
+                            cur.executemany(sql, [params for _, params in group])
+                        except Exception as exc:
+                            if is_busy_error(exc):
+                                raise
+                            # La base rechaza estas escrituras: se descartan
+                            cur.execute("ROLLBACK TO grupo")
+                            logger.exception("Error al confirmar una escritura pendiente")
+                        cur.execute("RELEASE grupo")
+        except Exception as exc:
+            # Si falló el COMMIT la transacción sigue abierta
+            conn = self.get_db().connection()
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if is_busy_error(exc):
+                logger.warning("Base bloqueada; se reintentarán %d escrituras",
+                               sum(map(len, batch.values())))
+            else:
+                logger.exception("Error al confirmar escrituras pendientes")
+            self._requeue(batch)
+            return
+        with self._cond:
+            self._committed = max(self._committed, target)
+            self._cond.notify_all()
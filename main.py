@@ -4,31 +4,30 @@ Config.set('graphics', 'height', '900')
 Config.set('graphics', 'resizable', False)
 
 from kivy.lang import Builder
-from kivy.properties import StringProperty, ListProperty, NumericProperty
+from kivy.properties import StringProperty, ListProperty, NumericProperty, ColorProperty, ObjectProperty
+from kivy.uix.label import Label
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivymd.app import MDApp
 from kivymd.uix.navigationbar import MDNavigationItem
 from kivymd.uix.screen import MDScreen
-from kivymd.uix.button import MDButton, MDButtonText, MDButtonIcon
-from kivymd.uix.list import (
-    MDListItem,
-    MDListItemHeadlineText,
-    MDListItemSupportingText,
-    MDListItemLeadingIcon,
-    MDListItemTrailingIcon,
-)
-from kivymd.uix.dialog import MDDialog, MDDialogHeadlineText, MDDialogSupportingText, MDDialogButtonContainer
-from kivymd.uix.selectioncontrol import MDCheckbox
-from kivymd.uix.progressindicator import MDLinearProgressIndicator
-from kivymd.uix.menu import MDDropdownMenu
-from kivymd.uix.button import MDButton
+from kivymd.uix.card import MDCard
+from kivymd.uix.boxlayout import MDBoxLayout
 from kivy.clock import Clock
-from kivy.uix.image import Image
 from kivy.metrics import dp
-from kivy.graphics import Color, Rectangle, Line
 from datetime import datetime, timedelta
-import sqlite3
+import importlib
 import os
-import math
+import sqlite3
+import threading
+
+from core import catchup, perf, regimen, scheduler, transfer, viewmodel
+from core.catalog import open_catalog
+from core.dialogs import DialogManager
+from core.models import Medication
+from core.profiles import ProfileStore
+from core.repository import MedicineRepository
+from core.scheduler import (NotificationQueue, ReminderScheduler, REMINDER_WINDOW,
+                            next_reminder_datetime)
 
 
 class BaseMDNavigationItem(MDNavigationItem):
@@ -40,298 +39,315 @@ class MedicineScreen(MDScreen):
     pass
 
 
+class MedicationCard(RecycleDataViewBehavior, MDCard):
+    """Tarjeta reciclable de la lista de medicamentos.
+
+    El RecycleView reutiliza estas tarjetas al hacer scroll; cada una se
+    rellena con un diccionario de datos generado por medication_card_data.
+    """
+    med_id = NumericProperty(-1)
+    med_name = StringProperty("")
+    dose_text = StringProperty("")
+    next_dose_text = StringProperty("")
+    next_dose_color = ColorProperty((0.2, 0.2, 0.2, 1))
+    hours_text = StringProperty("")
+    days_text = StringProperty("")
+    percentage_text = StringProperty("")
+    progress = NumericProperty(0)
+    progress_color = ColorProperty((0.9, 0.6, 0.2, 1))
+
+
 class AddMedicineScreen(MDScreen):
     pass
 
 
+class StatisticsScreen(MDScreen):
+    pass
+
+
+class MedicationStatsRow(RecycleDataViewBehavior, MDBoxLayout):
+    """Fila reciclable con las estadísticas de un medicamento (ver stats_row_data)"""
+    med_id = NumericProperty(-1)
+    med_name = StringProperty("")
+    adherence_text = StringProperty("")
+    detail_text = StringProperty("")
+    streak_text = StringProperty("")
+    progress = NumericProperty(0)
+    progress_color = ColorProperty((0.9, 0.6, 0.2, 1))
+
+
+class ReminderRow(MDBoxLayout):
+    """Fila de un medicamento en el diálogo de avisos"""
+    med_id = NumericProperty(-1)
+    text = StringProperty("")
+
+
 class SplashScreen(MDScreen):
     pass
 
 
+class PerfOverlay(Label):
+    """Panel con los tiempos de core.perf (solo con SONNAR_PERF=1)"""
+
+
 class MedicineApp(MDApp):
     medicines = ListProperty([])
-    dialog = None
+    _dialogs = None
+    _repository = None
+    _profiles = None
+    _profile = None
+    _profile_menu = None
+    _file_manager = None
+    _perf_overlay = None
+    _catalog = None
+    _reminder_event = None
+    _card_index = None  # med_id -> posición de su tarjeta en meds_list.data
+    # Carga de medicamentos en curso (ver load_medicines_async)
+    _loading = False
+    _load_generation = 0
+    _on_first_chunk = None
+    # Medicamentos de la primera tanda: lo que entra en una pantalla
+    FIRST_SCREEN_MEDS = 10
+    # Tratamientos completados: se leen por páginas solo con la sección abierta
+    _archive_open = False
+    _archive_more = False
+    _archive_loading = False
+    _archive_total = 0
+    ARCHIVE_PAGE_SIZE = 20
+    # Distancia al final de la lista (dp) desde la que se pide la página siguiente
+    ARCHIVE_PREFETCH = 600
+    # Tope de espera del temporizador: si el dispositivo se suspende el reloj
+    # de Kivy se detiene, así que se revisa al menos una vez por hora
+    MAX_REMINDER_SLEEP = 3600
+    # Los avisos que vencen dentro de esta ventana (segundos) se muestran juntos
+    REMINDER_WINDOW = REMINDER_WINDOW
+    # Módulos que no hacen falta para la splash ni para la lista inicial
+    DEFERRED_MODULES = ("kivymd.uix.dialog", "kivymd.uix.menu")
+    # Plantillas de diálogo que se crean tras el primer frame (ver core.dialogs)
+    PRELOADED_DIALOGS = ("medicamento", "confirmar", "recordatorio")
     selected_medication = StringProperty("")
     db_path = StringProperty("")
-    
-    # Lista de medicamentos
-    MEDICATIONS_LIST = [
-        {"name": "Paracetamol", "typical_dose": "500mg", "description": "Analgésico y antipirético"},
-        {"name": "Ibuprofeno", "typical_dose": "400mg", "description": "Antiinflamatorio no esteroideo"},
-        {"name": "Aspirina", "typical_dose": "100mg", "description": "Analgésico y antiagregante plaquetario"},
-        {"name": "Omeprazol", "typical_dose": "20mg", "description": "Inhibidor de bomba de protones"},
-        {"name": "Loratadina", "typical_dose": "10mg", "description": "Antihistamínico para alergias"},
-        {"name": "Amoxicilina", "typical_dose": "500mg", "description": "Antibiótico de amplio espectro"},
-        {"name": "Metformina", "typical_dose": "500mg", "description": "Antidiabético oral"},
-        {"name": "Losartán", "typical_dose": "50mg", "description": "Antihipertensivo"},
-        {"name": "Atorvastatina", "typical_dose": "20mg", "description": "Hipolipemiante"},
-        {"name": "Levotiroxina", "typical_dose": "50mcg", "description": "Hormona tiroidea"},
-        {"name": "Clonazepam", "typical_dose": "0.5mg", "description": "Ansiolítico y anticonvulsivo"},
-        {"name": "Sertralina", "typical_dose": "50mg", "description": "Antidepresivo"},
-        {"name": "Diclofenaco", "typical_dose": "50mg", "description": "Antiinflamatorio y analgésico"},
-        {"name": "Ranitidina", "typical_dose": "150mg", "description": "Antagonista H2"},
-        {"name": "Prednisona", "typical_dose": "5mg", "description": "Corticoide antiinflamatorio"}
-    ]
+    profile_name = StringProperty("")
+    # Sugerencias que se muestran mientras se escribe el nombre
+    SUGGESTION_LIMIT = 5
+    # Imágenes de las tarjetas: se cargan una vez y todas comparten la textura
+    SHARED_IMAGES = {
+        'pill_texture': "images/pastilla2.png",
+        'clock_texture': "images/reloj.png",
+    }
+    pill_texture = ObjectProperty(None, allownone=True)
+    clock_texture = ObjectProperty(None, allownone=True)
+    # Carpeta de respaldos, junto a la base de datos
+    BACKUP_DIR = "respaldos"
+    # Período (en días) de la pantalla de estadísticas
+    stats_days = NumericProperty(30)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.reminders = ReminderScheduler()
+        # Avisos mostrados en el diálogo y todavía sin responder
+        self.notifications = NotificationQueue()
+        # Dosis vencidas del aviso consolidado todavía sin responder
+        self._overdue_pending = []
+        # Widgets que se rellenan de cada plantilla de diálogo y acciones de sus botones
+        self._dialog_parts = {}
+        self._dialog_actions = {}
+        # med_id -> horario de la última dosis ya avisada
+        self._notified = {}
+        # med_id -> horario original de la dosis pospuesta
+        self._snoozed = {}
+        # Datos de las tarjetas, reutilizados entre refrescos de la lista
+        self._card_pool = viewmodel.CardDataPool()
+        # Cambios pendientes de la lista: se dibujan a lo sumo una vez por frame
+        self._meds_dirty = viewmodel.ListInvalidation()
+        self._render_trigger = Clock.create_trigger(self.render_meds_list)
+        # Página abierta de tratamientos completados y la fila que abre la sección
+        self.archived = []
+        self._archive_header = {'viewclass': "ArchiveHeader", 'height': dp(56)}
 
     def build(self):
         self.title = "Sonnar"
         self.theme_cls.primary_palette = "Blue"
         self.theme_cls.theme_style = "Light"  # Volver a tema claro
         self.theme_cls.accent_palette = "Teal"
+        self.load_shared_textures()
         return Builder.load_file("medicamentos.kv")
 
+    def load_shared_textures(self):
+        """Carga una sola vez las imágenes que se repiten en cada tarjeta"""
+        from kivy.core.image import Image as CoreImage
+
+        for name, path in self.SHARED_IMAGES.items():
+            setattr(self, name, CoreImage(path).texture)
+
     # ====== Persistencia: SQLite ======
+    def get_profiles(self):
+        """Índice de perfiles (cada perfil tiene su propia BD)"""
+        if self._profiles is None:
+            base_dir = os.path.dirname(os.path.abspath(__file__))
+            self._profiles = ProfileStore(base_dir)
+            self._profiles.init()
+        return self._profiles
+
+    def get_profile(self):
+        """Perfil activo; al iniciar es el último que se usó"""
+        if self._profile is None:
+            self._profile = self.get_profiles().active_profile()
+            self.profile_name = self._profile['name']
+        return self._profile
+
     def get_db_path(self):
+        # Una ruta fija (p. ej. en tests) tiene prioridad sobre los perfiles
+        if self.db_path:
+            return self.db_path
+        return self.get_profiles().db_path(self.get_profile())
+
+    def get_repository(self):
+        """Devuelve el repositorio de la BD actual"""
         if not self.db_path:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            self.db_path = os.path.join(base_dir, "medicamentos.db")
-        return self.db_path
+            # Los perfiles usados recientemente quedan abiertos en la caché del índice
+            return self.get_profiles().repository(self.get_profile()['id'])
+
+        repository = self._repository
+        if repository is None or repository.db_path != self.db_path:
+            # Si cambió la ruta (p. ej. en tests) se cierra el repositorio anterior
+            if repository is not None:
+                repository.close()
+            repository = MedicineRepository(self.db_path)
+            self._repository = repository
+        return repository
+
+    def get_db(self):
+        """Devuelve el administrador de conexiones para la BD actual"""
+        return self.get_repository().db
+
+    def flush_writes(self, timeout=None):
+        """Fuerza la escritura de las mutaciones encoladas (útil en tests)"""
+        return self.get_repository().flush(timeout)
+
+    def close_db(self):
+        """Confirma lo pendiente y cierra las conexiones a la base de datos"""
+        if self._repository is not None:
+            self._repository.close()
+            self._repository = None
+        if self._profiles is not None:
+            self._profiles.close()
+            self._profiles = None
+            self._profile = None
 
     def init_db(self):
-        conn = sqlite3.connect(self.get_db_path())
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS medicamentos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                time TEXT NOT NULL,
-                grams TEXT NOT NULL,
-                days INTEGER NOT NULL,
-                hours INTEGER NOT NULL,
-                total_doses INTEGER NOT NULL,
-                taken_doses INTEGER NOT NULL DEFAULT 0,
-                completed INTEGER NOT NULL DEFAULT 0,
-                start_date TEXT,
-                current_alert_time TEXT,
-                last_notification_time TEXT
-            )
-            """
-        )
-        # Índice para evitar duplicados lógicos (name+time)
-        cur.execute(
-            """
-            CREATE UNIQUE INDEX IF NOT EXISTS idx_meds_name_time
-            ON medicamentos(name, time)
-            """
-        )
-        conn.commit()
-        conn.close()
+        self.get_repository().init_db()
 
+    @perf.instrument()
     def load_medicines_from_db(self):
-        conn = sqlite3.connect(self.get_db_path())
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, name, time, grams, days, hours, total_doses, taken_doses,
-                   completed, start_date, current_alert_time, last_notification_time
-            FROM medicamentos
-            ORDER BY id DESC
-            """
-        )
-        rows = cur.fetchall()
-        conn.close()
-
-        loaded = []
-        for r in rows:
-            med = {
-                'id': r[0],
-                'name': r[1],
-                'time': r[2],
-                'grams': r[3],
-                'days': str(r[4]),
-                'hours': str(r[5]),
-                'total_doses': int(r[6]) if r[6] is not None else 0,
-                'taken_doses': int(r[7]) if r[7] is not None else 0,
-                'completed': bool(r[8]),
-                'start_date': r[9] or datetime.now().strftime("%Y-%m-%d"),
-                'current_alert_time': r[10] or r[2],
-                'last_notification_time': r[11],
-                'taken': False,
-            }
-            loaded.append(med)
-        self.medicines = loaded
+        self.medicines = self.get_repository().load_medicines()
 
     def insert_medicine_db(self, med_dict):
-        conn = sqlite3.connect(self.get_db_path())
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT OR IGNORE INTO medicamentos
-            (name, time, grams, days, hours, total_doses, taken_doses, completed,
-             start_date, current_alert_time, last_notification_time)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                med_dict['name'],
-                med_dict['time'],
-                med_dict['grams'],
-                int(med_dict['days']),
-                int(med_dict['hours']),
-                int(med_dict.get('total_doses', 0)),
-                int(med_dict.get('taken_doses', 0)),
-                1 if med_dict.get('completed', False) else 0,
-                med_dict.get('start_date'),
-                med_dict.get('current_alert_time', med_dict['time']),
-                med_dict.get('last_notification_time'),
-            ),
-        )
-        # Si fue ignorado por duplicado, obtenemos el id existente
-        if cur.rowcount == 0:
-            cur.execute(
-                "SELECT id FROM medicamentos WHERE name=? AND time=?",
-                (med_dict['name'], med_dict['time']),
-            )
-            row = cur.fetchone()
-            new_id = row[0] if row else None
-        else:
-            new_id = cur.lastrowid
-        conn.commit()
-        conn.close()
-        return new_id
+        return self.get_repository().insert_medicine(med_dict)
 
     def update_medicine_db(self, med_dict):
-        if 'id' not in med_dict or med_dict['id'] is None:
-            return
-        conn = sqlite3.connect(self.get_db_path())
-        cur = conn.cursor()
-        cur.execute(
-            """
-            UPDATE medicamentos
-            SET grams=?, days=?, hours=?, total_doses=?, taken_doses=?,
-                completed=?, start_date=?, current_alert_time=?, last_notification_time=?
-            WHERE id=?
-            """,
-            (
-                med_dict['grams'],
-                int(med_dict['days']),
-                int(med_dict['hours']),
-                int(med_dict.get('total_doses', 0)),
-                int(med_dict.get('taken_doses', 0)),
-                1 if med_dict.get('completed', False) else 0,
-                med_dict.get('start_date'),
-                med_dict.get('current_alert_time', med_dict['time']),
-                med_dict.get('last_notification_time'),
-                int(med_dict['id']),
-            ),
-        )
-        conn.commit()
-        conn.close()
+        self.get_repository().update_medicine(med_dict)
 
     def delete_medicine_db(self, med_id):
-        """Elimina un medicamento de la base de datos"""
-        if med_id is None:
-            return
-        conn = sqlite3.connect(self.get_db_path())
-        cur = conn.cursor()
-        cur.execute("DELETE FROM medicamentos WHERE id=?", (int(med_id),))
-        conn.commit()
-        conn.close()
+        """Elimina un medicamento de la base de datos (en segundo plano)"""
+        self.get_repository().delete_medicine(med_id)
+
+    def record_dose_event(self, med, event, alert_time, next_alert_time=None, when=None):
+        """Registra una dosis tomada, pospuesta u omitida en el historial"""
+        self.get_repository().record_dose_event(med, event, alert_time, next_alert_time, when)
+
+    def get_dose_history(self, med_id):
+        return self.get_repository().get_dose_history(med_id)
 
+    def get_adherence_report(self, days=None, now=None):
+        """Estadísticas de cumplimiento de los medicamentos (ver core.analytics).
+
+        NumPy solo se importa aquí: si no está disponible se lanza ImportError.
+        """
+        from core import analytics
+
+        self.flush_writes()
+        days = days or self.stats_days
+        # Los tratamientos que terminaron en el período también cuentan
+        since = (now or datetime.now()) - timedelta(days=days)
+        loaded = {med.get('id') for med in self.medicines}
+        medicines = self.medicines + [med for med in self.get_repository().load_completed_since(since)
+                                      if med['id'] not in loaded]
+        return analytics.adherence_report(self.get_db(), medicines, now, days)
+
+    # ====== Régimen de dosis (ver core.regimen) ======
     def calculate_doses(self, days, hours):
-        """Calcula el número total de dosis basado en días y frecuenc.asaia en horas"""
-        try:
-            days_int = int(days)
-            hours_int = int(hours)
-            if days_int <= 0 or hours_int <= 0:
-                return 0
-            # Calcular dosis totales: (días * 24 horas) / frecuencia en horas
-            total_doses = math.ceil((days_int * 24) / hours_int)
-            return total_doses
-        except (ValueError, TypeError):
-            return 0
+        """Calcula el número total de dosis basado en días y frecuencia en horas"""
+        return regimen.calculate_doses(days, hours)
 
     def get_medication_progress(self, med):
         """Calcula el progreso del medicamento basado en las dosis tomadas"""
-        try:
-            days_int = int(med['days'])
-            hours_int = int(med['hours'])
-            
-            if days_int <= 0 or hours_int <= 0:
-                return 0, 0, 0
-            
-            # Calcular dosis totales
-            total_doses = self.calculate_doses(med['days'], med['hours'])
-            
-            # Dosis tomadas (usar el campo correcto)
-            taken_doses = med.get('taken_doses', 0)
-            
-            # Dosis esperadas (basado en tiempo transcurrido)
-            start_time = datetime.now().replace(hour=int(med['time'].split(':')[0]), 
-                                              minute=int(med['time'].split(':')[1]), 
-                                              second=0, microsecond=0)
-            
-            # Si ya pasó la hora de hoy, empezar desde ayer
-            if start_time > datetime.now():
-                start_time -= timedelta(days=1)
-            
-            elapsed_hours = (datetime.now() - start_time).total_seconds() / 3600
-            expected_doses = min(math.floor(elapsed_hours / hours_int) + 1, total_doses)
-            
-            return total_doses, expected_doses, taken_doses
-        except Exception:
-            return 0, 0, 0
+        return regimen.get_medication_progress(med)
+
+    def next_dose_datetime(self, med):
+        """Fecha/hora de la próxima dosis según el horario del tratamiento"""
+        return regimen.next_dose_datetime(med)
 
     def calculate_next_dose_time(self, med):
         """Calcula la hora de la próxima dosis basada en la última dosis tomada"""
-        try:
-            # Obtener la hora de inicio del medicamento
-            start_time_str = med.get('time', '00:00')
-            start_hour, start_minute = map(int, start_time_str.split(':'))
-            
-            # Calcular cuántas dosis se han tomado
-            taken_doses = med.get('taken_doses', 0)
-            hours_interval = int(med.get('hours', 1))
-            
-            # Calcular la hora de la próxima dosis
-            next_dose_hour = (start_hour + (taken_doses * hours_interval)) % 24
-            next_dose_minute = start_minute
-            
-            return f"{next_dose_hour:02d}:{next_dose_minute:02d}"
-        except:
-            return med.get('time', '00:00')
+        return regimen.calculate_next_dose_time(med)
 
     def on_switch_tabs(self, bar, item, icon, text):
         self.root.ids.screen_manager.current = text
+        if text == "Estadísticas":
+            self.update_statistics()
+
+    def get_catalog(self):
+        """Catálogo de medicamentos, abierto la primera vez que se usa"""
+        if self._catalog is None:
+            self._catalog = open_catalog()
+        return self._catalog
+
+    def on_medication_search(self, text):
+        """Actualiza las sugerencias mientras se escribe el nombre"""
+        add_screen = self.root.ids.screen_manager.get_screen("Agregar")
+        catalog = self.get_catalog()
+
+        # Un nombre exacto del catálogo queda seleccionado sin tocar la sugerencia
+        medication = catalog.get(text) if text.strip() else None
+        if medication is not None:
+            self.select_medication(medication)
+            return
 
-    def show_medication_menu(self, button):
-        """Muestra el menú desplegable de medicamentos"""
-        menu_items = []
-        for med in self.MEDICATIONS_LIST:
-            menu_items.append({
-                "text": f"{med['name']} ({med['typical_dose']})",
-                "on_release": lambda x=None, medication=med: self.select_medication(medication),
-            })
-        MDDropdownMenu(
-            caller=button,
-            items=menu_items,
-        ).open()
+        self.selected_medication = ""
+        add_screen.ids.med_name_info.text = ""
+        matches = catalog.search(text, self.SUGGESTION_LIMIT) if text.strip() else []
+        add_screen.ids.med_suggestions.data = [
+            {
+                'med_name': med['name'],
+                'label_text': f"{med['name']} ({med['typical_dose']})",
+            }
+            for med in matches
+        ]
+        self.on_text_fields_change()
 
     def select_medication(self, medication):
-        """Selecciona un medicamento de la lista"""
+        """Selecciona un medicamento del catálogo"""
         self.selected_medication = medication['name']
         add_screen = self.root.ids.screen_manager.get_screen("Agregar")
-        # Actualizar el texto del botón
-        add_screen.ids.med_name.children[0].text = f"✓ {medication['name']} ({medication['typical_dose']})"
+        add_screen.ids.med_suggestions.data = []
+        if add_screen.ids.med_name.text != medication['name']:
+            add_screen.ids.med_name.text = medication['name']
+        add_screen.ids.med_name_info.text = f"✓ {medication['name']} ({medication['typical_dose']})"
         self.on_text_fields_change()  # Actualizar estado del botón
 
     def get_medication_info(self, name):
         """Obtiene información de un medicamento por nombre"""
-        for med in self.MEDICATIONS_LIST:
-            if med['name'] == name:
-                return med
-        return None
+        return self.get_catalog().get(name)
 
     def is_valid_time_format(self, time_str):
-        try:
-            datetime.strptime(time_str, "%H:%M")
-            return True
-        except Exception:
-            return False
+        return regimen.is_valid_time_format(time_str)
 
     def reset_add_screen(self):
         add_screen = self.root.ids.screen_manager.get_screen("Agregar")
-        add_screen.ids.med_name.children[0].text = "Toca para seleccionar medicamento"
+        add_screen.ids.med_name.text = ""
+        add_screen.ids.med_name_info.text = ""
+        add_screen.ids.med_suggestions.data = []
         add_screen.ids.med_time.text = ""
         add_screen.ids.med_grm.text = ""
         add_screen.ids.med_days.text = ""
@@ -355,8 +371,12 @@ class MedicineApp(MDApp):
             self.show_info_dialog("⏰ Formato inválido.\nUsa HH:MM (ejemplo: 08:30).")
             return
 
-        if any(med['name'] == name and med['time'] == time for med in self.medicines):
-            self.show_info_dialog("⚠️ Este medicamento ya está registrado.")
+        # Se consulta la BD: los tratamientos completados no están en self.medicines
+        registered = self.get_repository().find_registered(name, time)
+        if registered is not None:
+            completed = registered[1]
+            self.show_info_dialog("⚠️ Este medicamento ya está registrado"
+                                  + (" entre los tratamientos completados." if completed else "."))
             return
 
         # Calcular dosis totales
@@ -379,497 +399,191 @@ class MedicineApp(MDApp):
         }
         # Guardar en SQLite y recuperar id
         new_id = self.insert_medicine_db(new_med)
+        new_med = Medication.from_dict(new_med)
         new_med['id'] = new_id
         self.medicines.append(new_med)
-        self.update_meds_list()
+        self.schedule_reminder(new_med)
+        self.arm_reminders()
+        self.request_meds_render()
         self.reset_add_screen()
         self.root.ids.screen_manager.current = "Medicamentos"
 
-    def update_meds_list(self):
-        """Refresca la lista en la pantalla Medicamentos."""
-        med_screen = self.root.ids.screen_manager.get_screen("Medicamentos")
-        meds_box = med_screen.ids.meds_box
-        meds_box.clear_widgets()
+    def medication_card_data(self, med):
+        """Genera el diccionario de datos de la tarjeta de un medicamento"""
+        return viewmodel.medication_card_data(med, settled=self._notified.get(med.get('id')))
 
-        from kivy.metrics import dp
+    def request_meds_render(self, med_ids=None):
+        """Pide refrescar la lista en el próximo frame.
 
-        # Si no hay medicamentos, mostrar mensaje
-        if not self.medicines:
-            self.show_empty_state(meds_box)
+        Sin med_ids se reconstruye el modelo completo (altas, bajas o
+        recarga); con med_ids solo se actualizan esas tarjetas. Varios
+        pedidos en el mismo frame se dibujan una sola vez.
+        """
+        if med_ids is None:
+            self._meds_dirty.mark_all()
+        else:
+            for med_id in med_ids:
+                self._meds_dirty.mark(med_id)
+        self._render_trigger()
+
+    @perf.instrument()
+    def render_meds_list(self, dt=None):
+        """Dibuja los cambios pendientes de la lista (ver request_meds_render)"""
+        full, med_ids = self._meds_dirty.take()
+        index = self._card_index or {}
+        if full or any(med_id not in index for med_id in med_ids):
+            self.update_meds_list()
             return
+        for med_id in med_ids:
+            med = self.find_medicine(med_id)
+            if med is not None:
+                self.refresh_medication_card(med)
 
-        for med in self.medicines:
-            # Calcular progreso actual
-            total_doses, expected_doses, taken_doses = self.get_medication_progress(med)
-            
-            # Actualizar solo total_doses, no sobrescribir taken_doses
-            med['total_doses'] = total_doses
-            
-            # Calcular próxima dosis basada en la frecuencia del medicamento
-            # Solo usar el tiempo de alerta actual si el medicamento está retrasado y no se ha tomado
-            if med.get('current_alert_time', med['time']) != med['time'] and not med.get('taken', False):
-                # Si está retrasado y no se ha tomado, mostrar el tiempo retrasado
-                next_dose_time = med.get('current_alert_time', med['time'])
-            else:
-                # Si ya se tomó o no está retrasado, calcular la próxima dosis normal
-                next_dose_time = self.calculate_next_dose_time(med)
-            
-            # Crear contenedor para cada medicamento
-            from kivymd.uix.boxlayout import MDBoxLayout
-            from kivymd.uix.label import MDLabel
-            from kivymd.uix.card import MDCard
-            
-            # Determinar el color de la card basado en el progreso
-            progress_value = taken_doses / total_doses if total_doses > 0 else 0
-            if progress_value >= 1.0:
-                card_color = (0.9, 0.98, 0.9, 1)  # Verde muy claro para completado
-                border_color = (0.2, 0.7, 0.2, 1)
-            elif progress_value > 0.5:
-                card_color = (0.95, 0.97, 1, 1)  # Azul muy claro para en progreso
-                border_color = (0.2, 0.6, 0.9, 1)
-            else:
-                card_color = (1, 0.98, 0.95, 1)  # Naranja muy claro para pendiente
-                border_color = (0.9, 0.6, 0.2, 1)
-            
-            # Contenedor principal del medicamento con diseño mejorado
-            med_container = MDCard(
-                orientation='vertical',
-                size_hint_y=None,
-                height=dp(170),  # Altura optimizada
-                padding=[dp(16), dp(12), dp(16), dp(12)],  # Padding reducido
-                spacing=dp(8),  # Espaciado reducido
-                md_bg_color=card_color,
-                radius=[dp(16), dp(16), dp(16), dp(16)],
-                elevation=3,
-                line_color=border_color,
-                line_width=1
-            )
-            
-            # Fila superior: Icono pastilla, nombre y mg con diseño optimizado
-            top_row = MDBoxLayout(
-                orientation='horizontal',
-                size_hint_y=None,
-                height=dp(45),  # Altura reducida
-                spacing=dp(8),  # Espaciado reducido
-                pos_hint={'center_y': 0.5}
-            )
-            
-            # Icono de pastilla sin fondo circular
-            pill_icon = Image(
-                source="images/pastilla2.png",
-                size_hint_x=None,
-                width=dp(24),  # Ligeramente más grande sin contenedor
-                height=dp(24),  # Ligeramente más grande sin contenedor
-                pos_hint={'center_y': 0.5}
-            )
-            top_row.add_widget(pill_icon)
-            
-            # Contenedor del nombre del medicamento
-            name_container = MDBoxLayout(
-                orientation='vertical',
-                size_hint_x=1,
-                spacing=dp(1)  # Espaciado mínimo
-            )
-            
-            # Nombre del medicamento con contraste moderado
-            med_name = MDLabel(
-                text=med['name'].title(),
-                theme_text_color="Custom",
-                text_color=(0.15, 0.15, 0.15, 1),  # Negro suave
-                font_size="16sp",
-                bold=True,
-                size_hint_x=1,
-                halign="left",
-                size_hint_y=None,
-                height=dp(20)
-            )
-            
-            # Información adicional del medicamento con contraste moderado
-            med_info = MDLabel(
-                text=f"Dosis: {med.get('taken_doses', 0)}/{med.get('total_doses', 0)}",
-                theme_text_color="Custom",
-                text_color=(0.3, 0.3, 0.3, 1),  # Gris oscuro moderado
-                font_size="11sp",
-                bold=True,
-                size_hint_x=1,
-                halign="left",
-                size_hint_y=None,
-                height=dp(16)
-            )
-            
-            name_container.add_widget(med_name)
-            name_container.add_widget(med_info)
-            top_row.add_widget(name_container)
-            
-            # Botón de información con icono de exclamación
-            info_button = MDButton(
-                style="text",
-                on_release=lambda x, m=med: self.show_medication_info(m),
-                size_hint=(None, None),
-                size=(dp(40), dp(40)),
-                pos_hint={'center_y': 0.5}
-            )
-            info_icon = MDButtonIcon(
-                icon="information",
-                theme_text_color="Custom",
-                text_color=(0.2, 0.6, 0.9, 1)  # Azul
-            )
-            info_button.add_widget(info_icon)
-            top_row.add_widget(info_button)
-            
-            # Botón de eliminar en la esquina superior derecha
-            delete_button = MDButton(
-                style="text",
-                on_release=lambda x, m=med: self.confirm_delete_medicine(m),
-                size_hint=(None, None),
-                size=(dp(40), dp(40)),
-                pos_hint={'center_y': 0.5}
-            )
-            delete_icon = MDButtonIcon(
-                icon="delete",
-                theme_text_color="Custom",
-                text_color=(0.9, 0.3, 0.3, 1)  # Rojo suave
-            )
-            delete_button.add_widget(delete_icon)
-            top_row.add_widget(delete_button)
-            
-            med_container.add_widget(top_row)
-            
-            # Contenedor para la barra de progreso optimizada
-            progress_container = MDBoxLayout(
-                orientation='vertical',
-                size_hint_y=None,
-                height=dp(40),  # Altura reducida
-                spacing=dp(6)  # Espaciado reducido
-            )
-            
-            # Información de progreso con porcentaje
-            progress_info = MDBoxLayout(
-                orientation='horizontal',
-                size_hint_y=None,
-                height=dp(16),  # Altura reducida
-                spacing=dp(8)  # Espaciado reducido
-            )
-            
-            # Texto de progreso con contraste moderado
-            progress_text = MDLabel(
-                text="Progreso",
-                theme_text_color="Custom",
-                text_color=(0.2, 0.2, 0.2, 1),  # Gris oscuro moderado
-                font_size="11sp",
-                bold=True,
-                size_hint_x=1,
-                halign="left"
-            )
-            
-            # Porcentaje con contraste moderado
-            percentage = int(progress_value * 100) if total_doses > 0 else 0
-            percentage_text = MDLabel(
-                text=f"{percentage}%",
-                theme_text_color="Custom",
-                text_color=(0.15, 0.15, 0.15, 1),  # Negro suave
-                font_size="11sp",
-                bold=True,
-                size_hint_x=None,
-                width=dp(35),
-                halign="right"
-            )
-            
-            progress_info.add_widget(progress_text)
-            progress_info.add_widget(percentage_text)
-            progress_container.add_widget(progress_info)
-            
-            # Barra de progreso personalizada optimizada
-            progress_bar_container = MDBoxLayout(
-                orientation='horizontal',
-                size_hint_y=None,
-                height=dp(6),  # Altura reducida
-                md_bg_color=(0.85, 0.85, 0.85, 1),
-                radius=[dp(3), dp(3), dp(3), dp(3)]  # Radio reducido
-            )
-            
-            # Parte llena de la barra con gradiente de color
-            if progress_value > 0:
-                filled_width = progress_value
-                
-                # Color basado en el progreso
-                if progress_value >= 1.0:
-                    progress_color = (0.2, 0.7, 0.2, 1)  # Verde para completado
-                elif progress_value > 0.5:
-                    progress_color = (0.2, 0.6, 0.9, 1)  # Azul para en progreso
-                else:
-                    progress_color = (0.9, 0.6, 0.2, 1)  # Naranja para pendiente
-                
-                # Parte llena
-                filled_part = MDBoxLayout(
-                    size_hint_x=filled_width,
-                    md_bg_color=progress_color,
-                    radius=[dp(4), 0, 0, dp(4)] if filled_width < 1 else [dp(4), dp(4), dp(4), dp(4)]
-                )
-                progress_bar_container.add_widget(filled_part)
-                
-                # Parte vacía
-                if filled_width < 1:
-                    empty_part = MDBoxLayout(
-                        size_hint_x=1 - filled_width,
-                        md_bg_color=(0.85, 0.85, 0.85, 1),
-                        radius=[0, dp(4), dp(4), 0]
-                    )
-                    progress_bar_container.add_widget(empty_part)
-            else:
-                # Barra completamente vacía
-                empty_bar = MDBoxLayout(
-                    size_hint_x=1,
-                    md_bg_color=(0.85, 0.85, 0.85, 1),
-                    radius=[dp(4), dp(4), dp(4), dp(4)]
-                )
-                progress_bar_container.add_widget(empty_bar)
-            
-            progress_container.add_widget(progress_bar_container)
-            
-            # Información de horarios y frecuencia optimizada
-            schedule_container = MDBoxLayout(
-                orientation='vertical',
-                size_hint_y=None,
-                height=dp(50),  # Altura reducida
-                spacing=dp(6)  # Espaciado reducido
-            )
-            
-            # Próxima dosis con reloj optimizado
-            next_dose_row = MDBoxLayout(
-                orientation='horizontal',
-                size_hint_y=None,
-                height=dp(22),  # Altura reducida
-                spacing=dp(6)  # Espaciado reducido
-            )
-            
-            # Icono de reloj sin fondo circular
-            clock_icon = Image(
-                source="images/reloj.png",
-                size_hint_x=None,
-                width=dp(14),  # Ligeramente más grande sin contenedor
-                height=dp(14),  # Ligeramente más grande sin contenedor
-                pos_hint={'center_y': 0.5}
-            )
-            next_dose_row.add_widget(clock_icon)
-            
-            # Texto de próxima dosis con indicador de retraso
-            delay_indicator = ""
-            time_color = (0.4, 0.4, 0.4, 1)
-            if med.get('current_alert_time', med['time']) != med['time']:
-                delay_indicator = " (Retrasado)"
-                time_color = (0.9, 0.4, 0.2, 1)
-            
-            next_dose_text = MDLabel(
-                text=f"Próxima dosis: {next_dose_time}{delay_indicator}",
-                theme_text_color="Custom",
-                text_color=(0.2, 0.2, 0.2, 1) if not delay_indicator else (0.7, 0.3, 0.0, 1),  # Gris oscuro o naranja moderado
-                font_size="12sp",
-                bold=True,
-                size_hint_x=1,
-                halign="left"
-            )
-            next_dose_row.add_widget(next_dose_text)
-            schedule_container.add_widget(next_dose_row)
-            
-            # Información de frecuencia y días con iconos optimizada
-            frequency_row = MDBoxLayout(
-                orientation='horizontal',
-                size_hint_y=None,
-                height=dp(22),  # Altura reducida
-                spacing=dp(12)  # Espaciado reducido
-            )
-            
-            # Cada cuántas horas (sin icono)
-            hours_info = MDBoxLayout(
-                orientation='horizontal',
-                size_hint_x=0.5,
-                spacing=dp(3)
-            )
-            hours_text = MDLabel(
-                text=f"Cada {med['hours']}h",
-                theme_text_color="Custom",
-                text_color=(0.35, 0.35, 0.35, 1),
-                font_size="10sp",
-                bold=True,
-                size_hint_x=1,
-                halign="left"
-            )
-            hours_info.add_widget(hours_text)
-            
-            # Días restantes (sin icono)
-            days_info = MDBoxLayout(
-                orientation='horizontal',
-                size_hint_x=0.5,
-                spacing=dp(3)
-            )
-            days_text = MDLabel(
-                text=f"{med['days']} días restantes",
-                theme_text_color="Custom",
-                text_color=(0.35, 0.35, 0.35, 1),
-                font_size="10sp",
-                bold=True,
-                size_hint_x=1,
-                halign="left"
-            )
-            days_info.add_widget(days_text)
-            
-            frequency_row.add_widget(hours_info)
-            frequency_row.add_widget(days_info)
-            schedule_container.add_widget(frequency_row)
-            
-            med_container.add_widget(schedule_container)
-            
-            # Barra de progreso (abajo del todo)
-            med_container.add_widget(progress_container)
+    @perf.instrument()
+    def update_meds_list(self):
+        """Refresca la lista en la pantalla Medicamentos.
+
+        Solo se reemplaza el modelo de datos del RecycleView; las tarjetas
+        visibles se reciclan en lugar de reconstruirse y los diccionarios de
+        datos salen del pool (solo se recalculan los que cambiaron).
+        """
+        # Los cambios pendientes quedan incluidos en este refresco
+        self._meds_dirty.take()
+        med_screen = self.root.ids.screen_manager.get_screen("Medicamentos")
+        active = len(self.medicines)
+        data = self._card_pool.build(self.medicines + self.archived, settled=self._notified)
+        if self._archive_total:
+            # Los completados van debajo de los activos, detrás de su encabezado
+            self._archive_header.update(viewmodel.archive_header_data(self._archive_total,
+                                                                      self._archive_open))
+            data.insert(active, self._archive_header)
+        self._card_index = {med.get('id'): i for i, med in enumerate(self.medicines)}
+        self._card_index.update((med.get('id'), active + 1 + i) for i, med in enumerate(self.archived))
+        med_screen.ids.meds_list.data = data
+
+        # Si no hay medicamentos, mostrar mensaje (no mientras se siguen leyendo)
+        med_screen.ids.empty_state.opacity = 0 if data or self._loading else 1
+
+    def update_statistics(self, days=None):
+        """Recalcula las estadísticas del período y refresca su pantalla"""
+        if days:
+            self.stats_days = days
+        stats_screen = self.root.ids.screen_manager.get_screen("Estadísticas")
+        try:
+            report = self.get_adherence_report()
+        except ImportError:
+            stats_screen.ids.stats_summary.text = "Las estadísticas requieren NumPy"
+            stats_screen.ids.stats_list.data = []
+            return
+        stats_screen.ids.stats_summary.text = viewmodel.stats_summary_text(report['total'])
+        stats_screen.ids.stats_list.data = [
+            viewmodel.stats_row_data(stats) for stats in report['medicamentos']
+        ]
+
+    @perf.instrument()
+    def refresh_medication_card(self, med):
+        """Actualiza solo la tarjeta de un medicamento (dosis, progreso, colores).
+
+        Se usa cuando cambia el estado de un único medicamento; los cambios
+        estructurales (agregar o eliminar) siguen pasando por update_meds_list.
+        """
+        index = self._card_index.get(med.get('id')) if self._card_index else None
+        if index is None:
+            self.update_meds_list()
+            return
 
-            meds_box.add_widget(med_container)
+        meds_list = self.root.ids.screen_manager.get_screen("Medicamentos").ids.meds_list
+        # El pool actualiza en sitio el diccionario que ya está en meds_list.data,
+        # lo que no dispara un refresco de toda la lista
+        card_data = self._card_pool.bind(med, settled=self._notified.get(med.get('id')))
 
-    def show_empty_state(self, container):
-        """Muestra un mensaje cuando no hay medicamentos"""
-        from kivymd.uix.boxlayout import MDBoxLayout
-        from kivymd.uix.label import MDLabel
-        from kivymd.uix.card import MDCard
-        from kivy.uix.image import Image
-        
-        # Contenedor principal del mensaje
-        empty_container = MDBoxLayout(
-            orientation='vertical',
-            size_hint_y=None,
-            height=dp(220),  # Altura reducida sin icono
-            spacing=dp(20),
-            pos_hint={'center_x': 0.5, 'center_y': 0.5},
-            size_hint_x=1
-        )
-        
-        # Card del mensaje
-        message_card = MDCard(
-            orientation='vertical',
-            size_hint_y=None,
-            height=dp(180),  # Altura reducida sin icono
-            padding=[dp(30), dp(20), dp(30), dp(20)],
-            spacing=dp(15),  # Espaciado reducido
-            md_bg_color=(0.98, 0.98, 0.98, 1),
-            radius=[dp(20), dp(20), dp(20), dp(20)],
-            elevation=2,
-            pos_hint={'center_x': 0.5, 'center_y': 0.5},
-            size_hint_x=0.9
-        )
-        
-        # Espaciador para el icono (removido)
-        icon_container = MDBoxLayout(
-            size_hint_y=None,
-            height=dp(20),  # Altura reducida
-            pos_hint={'center_x': 0.5}
-        )
-        
-        # Título del mensaje
-        title_label = MDLabel(
-            text="No hay medicamentos",
-            theme_text_color="Custom",
-            text_color=(0.3, 0.3, 0.3, 1),
-            font_size="24sp",
-            bold=True,
-            halign="center",
-            size_hint_y=None,
-            height=dp(35)
-        )
-        
-        # Mensaje descriptivo
-        message_label = MDLabel(
-            text="Cuando agregues un medicamento\nse mostrará aquí",
-            theme_text_color="Custom",
-            text_color=(0.5, 0.5, 0.5, 1),
-            font_size="16sp",
-            halign="center",
-            size_hint_y=None,
-            height=dp(50)
-        )
-        
-        # Instrucción
-        instruction_label = MDLabel(
-            text="Ve a la pestaña 'Agregar' para comenzar",
-            theme_text_color="Custom",
-            text_color=(0.2, 0.6, 0.9, 1),
-            font_size="14sp",
-            bold=True,
-            halign="center",
-            size_hint_y=None,
-            height=dp(25)
-        )
-        
-        # Agregar elementos al card
-        message_card.add_widget(icon_container)
-        message_card.add_widget(title_label)
-        message_card.add_widget(message_label)
-        message_card.add_widget(instruction_label)
-        
-        # Agregar el card al contenedor
-        empty_container.add_widget(message_card)
-        
-        # Agregar al contenedor principal
-        container.add_widget(empty_container)
+        # Si la tarjeta está visible se actualizan sus widgets directamente
+        view = meds_list.view_adapter.get_visible_view(index)
+        if view is not None:
+            meds_list.view_adapter.refresh_view_attrs(index, card_data, view)
 
     def toggle_medication_details(self, medication):
         """Alterna la vista expandida de un medicamento"""
         medication['expanded'] = not medication.get('expanded', False)
-        self.update_meds_list()
-
-    def show_info_dialog(self, text):
-        if self.dialog:
-            self.dialog.dismiss()
-
-        self.dialog = MDDialog(
+        self.request_meds_render([medication.get('id')])
+
+    # ====== Diálogos (ver core.dialogs) ======
+    def get_dialogs(self):
+        """Gestor de diálogos; cada plantilla se crea la primera vez que se muestra"""
+        if self._dialogs is None:
+            dialogs = DialogManager()
+            dialogs.register('info', self._build_info_dialog, self._fill_info_dialog)
+            dialogs.register('medicamento', self._build_medication_dialog, self._fill_medication_dialog)
+            dialogs.register('confirmar', self._build_confirm_dialog, self._fill_confirm_dialog)
+            dialogs.register('perfil', self._build_profile_dialog, self._fill_profile_dialog)
+            dialogs.register('recordatorio', self.build_reminder_dialog, self._fill_reminder_dialog,
+                             live=True)
+            dialogs.register('vencidas', self._build_overdue_dialog, self._fill_overdue_dialog,
+                             live=True)
+            self._dialogs = dialogs
+        return self._dialogs
+
+    def dismiss_dialog(self, *args):
+        """Cierra el diálogo abierto; se abre el siguiente de la cola, si hay"""
+        self.get_dialogs().dismiss()
+
+    def _prepare_dialog(self, dialog):
+        """Deja lista para abrir una plantilla que quizá todavía se está cerrando.
+
+        Al cerrarse, MDDialog se quita de la ventana al terminar la animación;
+        si se vuelve a abrir antes, esa animación la quitaría ya abierta.
+        """
+        from kivy.animation import Animation
+        from kivy.core.window import Window
+
+        if dialog._is_open or dialog.parent is None:
+            return
+        Animation.cancel_all(dialog)
+        Window.remove_widget(dialog)
+        if dialog._scrim is not None:
+            Animation.cancel_all(dialog._scrim)
+            Window.remove_widget(dialog._scrim)
+
+    def _run_dialog_action(self, kind):
+        """Cierra el diálogo y ejecuta la acción con la que se rellenó"""
+        action = self._dialog_actions.pop(kind, None)
+        self.dismiss_dialog()
+        if action is not None:
+            action()
+
+    def _build_info_dialog(self):
+        from kivymd.uix.button import MDButton, MDButtonText, MDButtonIcon
+        from kivymd.uix.dialog import MDDialog, MDDialogHeadlineText, MDDialogSupportingText
+
+        text = MDDialogSupportingText()
+        self._dialog_parts['info'] = {'text': text}
+        return MDDialog(
             MDDialogHeadlineText(text="Aviso"),
-            MDDialogSupportingText(text=text),
+            text,
             MDButton(
                 style="filled",
-                on_release=lambda x: self.dialog.dismiss(),
+                on_release=self.dismiss_dialog,
                 children=[
                     MDButtonIcon(icon="check"),
                     MDButtonText(text="OK")
                 ]
             ),
         )
-        self.dialog.open()
-
-    def on_text_fields_change(self, *args):
-        add_screen = self.root.ids.screen_manager.get_screen("Agregar")
-        name = self.selected_medication
-        time = add_screen.ids.med_time.text
-        grams = add_screen.ids.med_grm.text
-        days = add_screen.ids.med_days.text
-        hours = add_screen.ids.med_hours.text
-        add_screen.ids.save_button.disabled = not (name and time.strip() and grams.strip() and days.strip() and hours.strip())
 
-    def show_medication_info(self, med):
-        """Muestra un diálogo con información detallada del medicamento"""
-        if self.dialog:
-            self.dialog.dismiss()
-
-        # Obtener información adicional del medicamento si existe en la lista
-        med_info = self.get_medication_info(med['name'])
-        description = med_info['description'] if med_info else "Sin descripción disponible"
-        
-        # Calcular progreso
-        total_doses, expected_doses, taken_doses = self.get_medication_progress(med)
-        progress_percentage = int((taken_doses / total_doses * 100)) if total_doses > 0 else 0
-        
-        info_text = f"""• Medicamento: {med['name']}
-
-• Descripción: {description}
-
-• Dosis: {med['grams']}mg
-
-• Frecuencia: Cada {med['hours']} horas
-
-• Duración: {med['days']} días
-
-• Progreso: {taken_doses}/{total_doses} dosis ({progress_percentage}%)
-
-• Hora de inicio: {med['time']}"""
+    def _build_medication_dialog(self):
+        from kivymd.uix.button import MDButton, MDButtonText
+        from kivymd.uix.dialog import (
+            MDDialog, MDDialogHeadlineText, MDDialogSupportingText, MDDialogButtonContainer,
+        )
 
-        self.dialog = MDDialog(
+        text = MDDialogSupportingText(
+            halign="left",
+            theme_text_color="Custom",
+            text_color=(0.4, 0.4, 0.4, 1),
+            font_size="14sp"
+        )
+        self._dialog_parts['medicamento'] = {'text': text}
+        return MDDialog(
             MDDialogHeadlineText(
                 text="Información del Medicamento",
                 halign="center",
@@ -878,13 +592,7 @@ class MedicineApp(MDApp):
                 font_size="20sp",
                 bold=True
             ),
-            MDDialogSupportingText(
-                text=info_text,
-                halign="left",
-                theme_text_color="Custom",
-                text_color=(0.4, 0.4, 0.4, 1),
-                font_size="14sp"
-            ),
+            text,
             MDDialogButtonContainer(
                 MDButton(
                     MDButtonText(
@@ -896,7 +604,7 @@ class MedicineApp(MDApp):
                     ),
                     style="filled",
                     md_bg_color=(0.2, 0.6, 0.9, 1),
-                    on_release=lambda x: self.dialog.dismiss()
+                    on_release=self.dismiss_dialog
                 ),
                 spacing="16dp"
             ),
@@ -905,43 +613,44 @@ class MedicineApp(MDApp):
             radius=[dp(20), dp(20), dp(20), dp(20)],
             elevation=8
         )
-        self.dialog.open()
 
+    def _fill_info_dialog(self, dialog, text):
+        self._prepare_dialog(dialog)
+        self._dialog_parts['info']['text'].text = text
 
-    def confirm_delete_medicine(self, med):
-        """Muestra un diálogo de confirmación antes de eliminar un medicamento"""
-        if self.dialog:
-            self.dialog.dismiss()
+    def _fill_medication_dialog(self, dialog, text):
+        self._prepare_dialog(dialog)
+        self._dialog_parts['medicamento']['text'].text = text
 
-        def delete_confirmed(*args):
-            # Eliminar de la base de datos
-            if 'id' in med and med['id'] is not None:
-                self.delete_medicine_db(med['id'])
-            
-            # Eliminar de la lista en memoria
-            if med in self.medicines:
-                self.medicines.remove(med)
-            
-            # Actualizar la vista
-            self.update_meds_list()
-            self.dialog.dismiss()
+    def _build_confirm_dialog(self):
+        from kivymd.uix.button import MDButton, MDButtonText
+        from kivymd.uix.dialog import (
+            MDDialog, MDDialogHeadlineText, MDDialogSupportingText, MDDialogButtonContainer,
+        )
 
-        self.dialog = MDDialog(
-            MDDialogHeadlineText(
-                text="¿Eliminar medicamento?",
-                halign="center",
-                theme_text_color="Custom",
-                text_color=(0.9, 0.3, 0.3, 1),
-                font_size="20sp",
-                bold=True
-            ),
-            MDDialogSupportingText(
-                text=f"¿Estás seguro de que deseas eliminar\n{med['name']}?\n\nEsta acción no se puede deshacer.",
-                halign="center",
-                theme_text_color="Custom",
-                text_color=(0.4, 0.4, 0.4, 1),
-                font_size="16sp"
-            ),
+        headline = MDDialogHeadlineText(
+            halign="center",
+            theme_text_color="Custom",
+            text_color=(0.9, 0.3, 0.3, 1),
+            font_size="20sp",
+            bold=True
+        )
+        text = MDDialogSupportingText(
+            halign="center",
+            theme_text_color="Custom",
+            text_color=(0.4, 0.4, 0.4, 1),
+            font_size="16sp"
+        )
+        confirm_text = MDButtonText(
+            theme_text_color="Custom",
+            text_color=(1, 1, 1, 1),
+            font_size="14sp",
+            bold=True
+        )
+        self._dialog_parts['confirmar'] = {'headline': headline, 'text': text, 'confirm': confirm_text}
+        return MDDialog(
+            headline,
+            text,
             MDDialogButtonContainer(
                 MDButton(
                     MDButtonText(
@@ -952,19 +661,13 @@ class MedicineApp(MDApp):
                     ),
                     style="outlined",
                     line_color=(0.6, 0.6, 0.6, 1),
-                    on_release=lambda x: self.dialog.dismiss()
+                    on_release=self.dismiss_dialog
                 ),
                 MDButton(
-                    MDButtonText(
-                        text="Eliminar",
-                        theme_text_color="Custom",
-                        text_color=(1, 1, 1, 1),
-                        font_size="14sp",
-                        bold=True
-                    ),
+                    confirm_text,
                     style="filled",
                     md_bg_color=(0.9, 0.3, 0.3, 1),
-                    on_release=delete_confirmed
+                    on_release=lambda x: self._run_dialog_action('confirmar')
                 ),
                 spacing="16dp"
             ),
@@ -973,25 +676,156 @@ class MedicineApp(MDApp):
             radius=[dp(20), dp(20), dp(20), dp(20)],
             elevation=8
         )
-        self.dialog.open()
 
+    def _fill_confirm_dialog(self, dialog, headline, text, confirm_text, on_confirm):
+        self._prepare_dialog(dialog)
+        parts = self._dialog_parts['confirmar']
+        parts['headline'].text = headline
+        parts['text'].text = text
+        parts['confirm'].text = confirm_text
+        self._dialog_actions['confirmar'] = on_confirm
 
+    def show_info_dialog(self, text):
+        self.get_dialogs().show('info', text=text)
 
-    def on_start(self):
-        # Mostrar splash screen primero
-        self.root.ids.screen_manager.current = "Splash"
+    def on_text_fields_change(self, *args):
+        add_screen = self.root.ids.screen_manager.get_screen("Agregar")
+        name = self.selected_medication
+        time = add_screen.ids.med_time.text
+        grams = add_screen.ids.med_grm.text
+        days = add_screen.ids.med_days.text
+        hours = add_screen.ids.med_hours.text
+        add_screen.ids.save_button.disabled = not (name and time.strip() and grams.strip() and days.strip() and hours.strip())
+
+    @perf.instrument()
+    def show_medication_info(self, med):
+        """Muestra un diálogo con información detallada del medicamento"""
+        # Obtener información adicional del medicamento si existe en la lista
+        med_info = self.get_medication_info(med['name'])
+        description = med_info['description'] if med_info else "Sin descripción disponible"
+        
+        # Calcular progreso
+        total_doses, expected_doses, taken_doses = self.get_medication_progress(med)
+        progress_percentage = int((taken_doses / total_doses * 100)) if total_doses > 0 else 0
         
-        # Programar el cambio a la pantalla principal después de 1.5 segundos
-        Clock.schedule_once(self.show_main_screen, 1.5)
+        info_text = f"""• Medicamento: {med['name']}
 
-    def show_main_screen(self, dt):
-        """Cambia a la pantalla principal después de la splash screen"""
-        # Inicializar y cargar DB
-        self.init_db()
-        self.load_medicines_from_db()
+• Descripción: {description}
+
+• Dosis: {med['grams']}mg
+
+• Frecuencia: Cada {med['hours']} horas
+
+• Duración: {med['days']} días
 
-        Clock.schedule_interval(self.check_reminders, 60)
+• Progreso: {taken_doses}/{total_doses} dosis ({progress_percentage}%)
+
+• Hora de inicio: {med['time']}"""
 
+        self.get_dialogs().show('medicamento', text=info_text)
+
+
+    def confirm_delete_medicine(self, med):
+        """Muestra un diálogo de confirmación antes de eliminar un medicamento"""
+        def delete_confirmed():
+            # Eliminar de la base de datos
+            if 'id' in med and med['id'] is not None:
+                self.delete_medicine_db(med['id'])
+            
+            # Eliminar de la lista en memoria
+            if med in self.medicines:
+                self.medicines.remove(med)
+            elif med in self.archived:
+                self.archived.remove(med)
+                self._archive_total -= 1
+
+            # Quitar su recordatorio pendiente
+            self.reminders.cancel(med.get('id'))
+            self._notified.pop(med.get('id'), None)
+            self._snoozed.pop(med.get('id'), None)
+            self.arm_reminders()
+            
+            # Actualizar la vista
+            self.request_meds_render()
+
+        self.get_dialogs().show(
+            'confirmar',
+            headline="¿Eliminar medicamento?",
+            text=f"¿Estás seguro de que deseas eliminar\n{med['name']}?\n\nEsta acción no se puede deshacer.",
+            confirm_text="Eliminar",
+            on_confirm=delete_confirmed,
+        )
+
+
+
+    def on_start(self):
+        # Mostrar splash screen primero
+        self.root.ids.screen_manager.current = "Splash"
+
+        # La BD se abre y se lee en un hilo mientras se muestra la splash;
+        # la pantalla principal aparece con la primera tanda de medicamentos
+        self.load_medicines_async(self.get_repository(), on_first=self.show_main_screen)
+
+        # Los módulos de diálogos y menús se precargan tras el primer frame.
+        # Se importan en el hilo principal: al importarse registran reglas kv
+        # y Builder no es seguro entre hilos
+        Clock.schedule_once(self.preload_deferred_modules)
+
+        if perf.is_enabled():
+            self.show_perf_overlay()
+
+    def preload_deferred_modules(self, dt=None):
+        """Importa los módulos diferidos para que el primer diálogo abra rápido"""
+        for name in self.DEFERRED_MODULES:
+            importlib.import_module(name)
+        Clock.schedule_once(lambda dt: self.preload_dialogs())
+
+    def preload_dialogs(self, kinds=None):
+        """Crea las plantillas de diálogo más usadas, una por frame para no trabar la interfaz"""
+        kinds = list(self.PRELOADED_DIALOGS if kinds is None else kinds)
+        if kinds:
+            self.get_dialogs().template(kinds.pop(0))
+            Clock.schedule_once(lambda dt: self.preload_dialogs(kinds))
+
+    def on_stop(self):
+        self.cancel_reminder_timer()
+        self.close_db()
+        trace_path = os.environ.get(perf.TRACE_ENV_VAR)
+        if perf.is_enabled() and trace_path:
+            perf.dump_trace(trace_path)
+
+    def show_perf_overlay(self):
+        """Muestra sobre todas las pantallas los tiempos de las funciones instrumentadas"""
+        from kivy.core.window import Window
+
+        self._perf_overlay = PerfOverlay()
+        Window.add_widget(self._perf_overlay)
+        Clock.schedule_interval(self.update_perf_overlay, 1)
+
+    def update_perf_overlay(self, dt):
+        overlay = self._perf_overlay
+        overlay.text = perf.format_summary()
+        overlay.texture_update()
+        overlay.x = 0
+        overlay.top = overlay.get_root_window().height
+
+    def on_pause(self):
+        # El sistema puede cerrar la app en pausa: no dejar escrituras en cola
+        self.flush_writes()
+        return True
+
+    def on_resume(self):
+        # Las dosis que vencieron durante la pausa se avisan juntas
+        self.reconcile_missed_doses()
+        # El temporizador pudo quedar desfasado durante la suspensión
+        self.arm_reminders()
+
+    def show_main_screen(self):
+        """Cambia a la pantalla principal con los medicamentos ya leídos.
+
+        Se llama al llegar la primera tanda; las siguientes se agregan a la
+        lista a medida que se leen (ver load_medicines_async).
+        """
         # Mostrar estado vacío o lista
         self.update_meds_list()
 
@@ -1001,6 +835,10 @@ class MedicineApp(MDApp):
         add_screen.ids.med_grm.bind(text=self.on_text_fields_change)
         add_screen.ids.med_days.bind(text=self.on_text_fields_change)
         add_screen.ids.med_hours.bind(text=self.on_text_fields_change)
+
+        # Las páginas de completados se piden al acercarse al final de la lista
+        med_screen = self.root.ids.screen_manager.get_screen("Medicamentos")
+        med_screen.ids.meds_list.bind(scroll_y=self.on_meds_scroll)
         
         # Mostrar el navbar
         self.root.ids.nav_bar.opacity = 1
@@ -1009,130 +847,671 @@ class MedicineApp(MDApp):
         # Cambiar a la pantalla de medicamentos
         self.root.ids.screen_manager.current = "Medicamentos"
 
+    # ====== Carga en segundo plano ======
+    def load_medicines_async(self, repository, on_first=None):
+        """Abre y lee la BD de `repository` en un hilo, sin trabar la interfaz.
+
+        Las tandas de medicamentos llegan al hilo principal con
+        Clock.schedule_once: la primera reemplaza self.medicines y llama a
+        on_first(); las demás se agregan. Al terminar se revisan los avisos
+        y las dosis vencidas (finish_loading). Una carga nueva descarta la
+        anterior (p. ej. al cambiar de perfil a mitad de la lectura).
+        """
+        self._load_generation += 1
+        self._loading = True
+        self._on_first_chunk = on_first
+        self.close_archive()
+        threading.Thread(target=self._load_medicines, args=(repository, self._load_generation),
+                         daemon=True).start()
+
+    def _load_medicines(self, repository, generation):
+        """Hilo de carga: crea o actualiza el esquema y lee los activos por tandas"""
+        try:
+            repository.init_db()
+            first = True
+            for chunk in repository.iter_medicines(first_chunk=self.FIRST_SCREEN_MEDS,
+                                                   completed=False):
+                Clock.schedule_once(lambda dt, chunk=chunk, first=first:
+                                    self._on_medicines_chunk(generation, chunk, first))
+                first = False
+            if first:
+                Clock.schedule_once(lambda dt: self._on_medicines_chunk(generation, [], True))
+            missed = repository.last_missed_doses()
+            archived = repository.count_medicines(completed=True)
+        except Exception:
+            # Reintentar en el hilo principal
+            Clock.schedule_once(lambda dt: self._on_load_failed(generation))
+            return
+        finally:
+            repository.release()
+        Clock.schedule_once(lambda dt: self._on_medicines_loaded(generation, missed, archived))
 
-    def check_reminders(self, dt):
-        now = datetime.now().strftime("%H:%M")
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        
+    def _on_medicines_chunk(self, generation, chunk, first):
+        if generation != self._load_generation:
+            return
+        if first:
+            self.medicines = chunk
+        else:
+            # Un alta durante la carga pudo agregar uno que aún no se había leído
+            loaded = {med.get('id') for med in self.medicines}
+            self.medicines.extend(med for med in chunk if med['id'] not in loaded)
+        on_first, self._on_first_chunk = self._on_first_chunk, None
+        if on_first is not None:
+            on_first()
+        else:
+            self.request_meds_render()
+
+    def _on_medicines_loaded(self, generation, missed, archived):
+        if generation == self._load_generation:
+            self.finish_loading(missed, archived)
+
+    def _on_load_failed(self, generation):
+        """La carga del hilo falló: se repite completa en el hilo principal"""
+        if generation != self._load_generation:
+            return
+        self.init_db()
+        medicines = self.get_repository().load_medicines(completed=False)
+        self._on_medicines_chunk(generation, medicines, True)
+        self.finish_loading()
+
+    def finish_loading(self, missed=None, archived=None):
+        """Con todos los activos leídos se arman los avisos del perfil.
+
+        archived es la cantidad de tratamientos completados (la sección
+        que se abre aparte); si no se pasa se cuenta en la BD.
+        """
+        self._loading = False
+        if archived is None:
+            archived = self.get_repository().count_medicines(completed=True)
+        self._archive_total = archived
+        self.load_settled_doses(missed)
+        self.rebuild_reminders()
+        self.request_meds_render()
+        # Dosis que vencieron con la app cerrada
+        self.reconcile_missed_doses()
+
+    # ====== Tratamientos completados ======
+    def toggle_archive(self):
+        """Abre o cierra la sección de tratamientos completados"""
+        if self._archive_open:
+            self.close_archive()
+        else:
+            self._archive_open = True
+            self._archive_more = True
+            self.load_archive_page()
+        self.request_meds_render()
+
+    def close_archive(self):
+        """Cierra la sección y libera sus medicamentos"""
+        self._archive_open = False
+        self._archive_more = False
+        self._archive_loading = False
+        self.archived = []
+
+    def archive_completed(self, meds):
+        """Pasa a la sección de completados los medicamentos que terminaron.
+
+        Si la sección está abierta y el medicamento cae dentro de las
+        páginas ya leídas se agrega en su lugar (por id descendente); si no,
+        llegará con la página que le corresponda. Devuelve True si alguno
+        cambió de sección (la lista debe redibujarse completa).
+        """
+        moved = False
+        for med in meds:
+            if not med.get('completed', False) or med not in self.medicines:
+                continue
+            self.medicines.remove(med)
+            self._archive_total += 1
+            self._notified.pop(med.get('id'), None)
+            self._snoozed.pop(med.get('id'), None)
+            moved = True
+            if self._archive_open and (not self._archive_more or
+                                       (self.archived and med['id'] > self.archived[-1]['id'])):
+                index = next((i for i, other in enumerate(self.archived)
+                              if other['id'] < med['id']), len(self.archived))
+                self.archived.insert(index, med)
+        return moved
+
+    def on_meds_scroll(self, meds_list, scroll_y):
+        """Pide la página siguiente de completados cerca del final de la lista"""
+        if not (self._archive_open and self._archive_more) or self._archive_loading:
+            return
+        hidden = meds_list.children[0].height - meds_list.height
+        if hidden <= 0 or scroll_y * hidden < dp(self.ARCHIVE_PREFETCH):
+            self.load_archive_page()
+
+    def load_archive_page(self):
+        """Lee en un hilo la página de completados que sigue a la última mostrada"""
+        if self._archive_loading or not self._archive_more:
+            return
+        self._archive_loading = True
+        before_id = self.archived[-1]['id'] if self.archived else None
+        threading.Thread(target=self._read_archive_page,
+                         args=(self.get_repository(), self._load_generation, before_id),
+                         daemon=True).start()
+
+    def _read_archive_page(self, repository, generation, before_id):
+        try:
+            page = repository.load_medicines_page(before_id, self.ARCHIVE_PAGE_SIZE, completed=True)
+        except sqlite3.Error:
+            page = None
+        finally:
+            repository.release()
+        Clock.schedule_once(lambda dt: self._on_archive_page(generation, page))
+
+    def _on_archive_page(self, generation, page):
+        # Descartar si cambió el perfil o se cerró la sección mientras se leía
+        if generation != self._load_generation or not self._archive_loading:
+            return
+        self._archive_loading = False
+        self._archive_more = page is not None and len(page) == self.ARCHIVE_PAGE_SIZE
+        # Un tratamiento completado en esta sesión puede estar ya en la sección
+        loaded = {med.get('id') for med in self.medicines + self.archived}
+        self.archived.extend(med for med in page or () if med['id'] not in loaded)
+        self.request_meds_render()
+
+
+    # ====== Perfiles ======
+    def _dismiss_profile_menu(self):
+        if self._profile_menu is not None:
+            self._profile_menu.dismiss()
+            self._profile_menu = None
+
+    def switch_profile(self, profile_id):
+        """Cambia de paciente: solo se abre y se lee la BD de ese perfil"""
+        self._dismiss_profile_menu()
+        current = self.get_profile()
+        profiles = self.get_profiles()
+        profile = profiles.get_profile(profile_id)
+        if profile is None or profile['id'] == current['id']:
+            return
+
+        # Los diálogos y avisos abiertos o pendientes son del perfil anterior
+        self.get_dialogs().clear()
+        self.notifications.clear()
+        self._overdue_pending = []
+        self._notified.clear()
+        self._snoozed.clear()
+        self._card_pool.clear()
+
+        profiles.touch(profile['id'])
+        self._profile = profile
+        self.profile_name = profile['name']
+
+        # Las tarjetas del perfil anterior no deben seguir respondiendo
+        self.medicines = []
+        self.reminders.clear()
+        self.cancel_reminder_timer()
+        self.load_medicines_async(self.get_repository(), on_first=self._on_profile_loaded)
+        self.request_meds_render()
+
+    def _on_profile_loaded(self):
+        """Primera tanda del perfil nuevo: su BD ya está lista para las estadísticas"""
+        self.request_meds_render()
+        if self.root.ids.screen_manager.current == "Estadísticas":
+            self.update_statistics()
+
+    def open_profile_menu(self, caller):
+        """Menú con los perfiles y la opción de crear uno nuevo"""
+        from kivymd.uix.menu import MDDropdownMenu
+
+        current_id = self.get_profile()['id']
+        items = [
+            {
+                "text": profile['name'],
+                "leading_icon": "check" if profile['id'] == current_id else "account",
+                "on_release": lambda profile_id=profile['id']: self.switch_profile(profile_id),
+            }
+            for profile in self.get_profiles().list_profiles()
+        ]
+        items += [
+            {
+                "text": "Nuevo perfil",
+                "leading_icon": "account-plus",
+                "on_release": self.show_new_profile_dialog,
+            },
+            {
+                "text": "Exportar respaldo",
+                "leading_icon": "export",
+                "on_release": self.export_backup,
+            },
+            {
+                "text": "Importar respaldo",
+                "leading_icon": "import",
+                "on_release": self.open_import_picker,
+            },
+        ]
+        self._profile_menu = MDDropdownMenu(caller=caller, items=items)
+        self._profile_menu.open()
+
+    def show_new_profile_dialog(self):
+        self._dismiss_profile_menu()
+        self.get_dialogs().show('perfil')
+
+    def _build_profile_dialog(self):
+        from kivymd.uix.button import MDButton, MDButtonText
+        from kivymd.uix.dialog import (
+            MDDialog, MDDialogHeadlineText, MDDialogContentContainer, MDDialogButtonContainer,
+        )
+        from kivymd.uix.textfield import MDTextField, MDTextFieldHintText
+
+        name_field = MDTextField(MDTextFieldHintText(text="Nombre del paciente"), mode="outlined")
+        self._dialog_parts['perfil'] = {'name': name_field}
+
+        def crear(*args):
+            self.dismiss_dialog()
+            self.create_profile(name_field.text)
+
+        return MDDialog(
+            MDDialogHeadlineText(text="Nuevo perfil", halign="center"),
+            MDDialogContentContainer(name_field),
+            MDDialogButtonContainer(
+                MDButton(MDButtonText(text="Cancelar"), style="text", on_release=self.dismiss_dialog),
+                MDButton(MDButtonText(text="Crear"), style="filled", on_release=crear),
+                spacing="8dp",
+            ),
+        )
+
+    def _fill_profile_dialog(self, dialog):
+        self._prepare_dialog(dialog)
+        self._dialog_parts['perfil']['name'].text = ""
+
+    def create_profile(self, name):
+        """Registra un perfil con su propia BD y cambia a él"""
+        try:
+            profile = self.get_profiles().create_profile(name)
+        except ValueError as error:
+            self.show_info_dialog(f"⚠️ {error}.")
+            return
+        self.switch_profile(profile['id'])
+
+
+    # ====== Respaldo (ver core.transfer y respaldo.py) ======
+    def get_backup_dir(self):
+        """Carpeta donde se guardan y se buscan los respaldos"""
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        backup_dir = os.path.join(base_dir, self.BACKUP_DIR)
+        os.makedirs(backup_dir, exist_ok=True)
+        return backup_dir
+
+    def export_backup(self, fmt="jsonl"):
+        """Exporta el perfil activo en segundo plano"""
+        self._dismiss_profile_menu()
+        name = "_".join(self.get_profile()['name'].lower().split())
+        path = os.path.join(self.get_backup_dir(),
+                            f"sonnar_{name}_{datetime.now():%Y%m%d_%H%M%S}.{fmt}")
+        self._start_transfer(transfer.export_data, path)
+
+    def open_import_picker(self):
+        from kivymd.uix.filemanager import MDFileManager
+
+        self._dismiss_profile_menu()
+        self._file_manager = MDFileManager(
+            exit_manager=lambda *args: self._file_manager.close(),
+            select_path=self.import_backup,
+            ext=[".jsonl", ".csv"],
+        )
+        self._file_manager.show(self.get_backup_dir())
+
+    def import_backup(self, path):
+        """Importa un respaldo al perfil activo en segundo plano"""
+        if self._file_manager is not None:
+            self._file_manager.close()
+        self._start_transfer(transfer.import_data, path)
+
+    def _start_transfer(self, func, path):
+        # Un historial grande puede tardar: no bloquear la interfaz
+        repository = self.get_repository()
+        threading.Thread(target=self._run_transfer, args=(func, repository, path),
+                         daemon=True).start()
+
+    def _run_transfer(self, func, repository, path):
+        try:
+            result, error = func(repository, path), None
+        except (OSError, ValueError, sqlite3.Error) as exc:
+            result, error = None, exc
+        finally:
+            repository.release()
+        Clock.schedule_once(lambda dt: self._on_transfer_done(func, repository, path, result, error))
+
+    def _on_transfer_done(self, func, repository, path, result, error):
+        exporting = func is transfer.export_data
+        if error is not None:
+            action = "exportar" if exporting else "importar"
+            self.show_info_dialog(f"⚠️ No se pudo {action} el respaldo:\n{error}")
+            return
+        if exporting:
+            self.show_info_dialog(f"Respaldo guardado en\n{path}\n\n{transfer.format_summary(result)}")
+            return
+        # Recargar solo si sigue activo el perfil en el que se importó
+        if repository is self.get_repository():
+            self.load_medicines_async(repository)
+        self.show_info_dialog(f"Respaldo importado\n\n{transfer.format_summary(result)}")
+
+
+    # ====== Recordatorios ======
+    def find_medicine(self, med_id):
+        """Busca un medicamento cargado por su id"""
+        index = self._card_index.get(med_id) if self._card_index else None
+        if index is not None:
+            active = len(self.medicines)
+            meds, index = (self.medicines, index) if index < active else (self.archived, index - active - 1)
+            if 0 <= index < len(meds) and meds[index].get('id') == med_id:
+                return meds[index]
+        for med in self.medicines + self.archived:
+            if med.get('id') == med_id:
+                return med
+        return None
+
+    def schedule_reminder(self, med, now=None):
+        """Programa en la cola el próximo aviso de un medicamento"""
+        med_id = med.get('id')
+        if med_id is None:
+            return
+        if med.get('completed', False):
+            self.reminders.cancel(med_id)
+            return
+        fire_at = next_reminder_datetime(med, now or datetime.now(), self._notified.get(med_id))
+        if fire_at is None:
+            self.reminders.cancel(med_id)
+        else:
+            self.reminders.schedule(med_id, fire_at)
+
+    def rebuild_reminders(self):
+        """Reconstruye la cola de avisos a partir de self.medicines"""
+        self.reminders.clear()
+        now = datetime.now()
         for med in self.medicines:
-            # Verificar si es hora de tomar el medicamento (incluyendo retrasos)
-            current_time = med.get('current_alert_time', med['time'])
-            if current_time == now:
-                # Verificar si no está completado
-                if not med.get('completed', False):
-                    # Verificar si ya se notificó para este tiempo específico
-                    last_notification_time = med.get('last_notification_time')
-                    if last_notification_time != current_time:
-                        if self.dialog:
-                            self.dialog.dismiss()
-
-                        def marcar_tomado(*args):
-                            med['taken'] = True
-                            med['taken_doses'] = min(med.get('taken_doses', 0) + 1, med.get('total_doses', 0))
-                            
-                            # Verificar si se completaron todas las dosis
-                            if med['taken_doses'] >= med.get('total_doses', 0):
-                                med['completed'] = True
-                            
-                            # Marcar como notificado para este tiempo específico
-                            med['last_notification_time'] = current_time
-                            
-                            # Resetear el tiempo de alerta al original
-                            med['current_alert_time'] = med['time']
-                            
-                            # Resetear el estado taken para la próxima dosis
-                            med['taken'] = False
-                            
-                            # Persistir cambios
-                            self.update_medicine_db(med)
-
-                            self.update_meds_list()
-                            self.dialog.dismiss()
-
-                        # Función para retrasar notificación
-                        def retrasar_notificacion(*args):
-                            self.dialog.dismiss()
-                            # Calcular nueva hora sumando 5 minutos
-                            current_alert_time = med.get('current_alert_time', med['time'])
-                            current_dt = datetime.strptime(current_alert_time, "%H:%M")
-                            new_time = current_dt + timedelta(minutes=5)
-                            new_time_str = new_time.strftime("%H:%M")
-                            
-                            # Marcar la notificación actual como enviada para evitar duplicados
-                            med['last_notification_time'] = current_time
-                            
-                            # Actualizar el tiempo de alerta del medicamento
-                            med['current_alert_time'] = new_time_str
-                            
-                            # Persistir cambios
-                            self.update_medicine_db(med)
-
-                            # Actualizar la lista de medicamentos para mostrar el nuevo tiempo
-                            self.update_meds_list()
-                            
-                            # Programar nueva verificación en 5 minutos
-                            Clock.schedule_once(lambda dt: self.check_reminders(dt), 300)
-                        
-                        # Crear el diálogo con diseño mejorado
-                        delay_text = ""
-                        if med.get('current_alert_time', med['time']) != med['time']:
-                            delay_text = " (Retrasado)"
-                        
-                        # Crear el diálogo con el contenido personalizado usando el método correcto
-                        self.dialog = MDDialog(
-                            MDDialogHeadlineText(
-                                text="¡Es hora de tu medicamento!",
-                                halign="center",
-                                theme_text_color="Custom",
-                                text_color=(0.1, 0.3, 0.6, 1),
-                                font_size="20sp",
-                                bold=True
-                            ),
-                            MDDialogSupportingText(
-                                text=f"{med['name']} ({med['grams']}mg)\n\nDosis: {med.get('taken_doses', 0) + 1}/{med.get('total_doses', 0)}\n\nHora: {current_time}{delay_text}",
-                                halign="center",
-                                theme_text_color="Custom",
-                                text_color=(0.4, 0.4, 0.4, 1),
-                                font_size="16sp"
-                            ),
-                            MDDialogButtonContainer(
-                                MDButton(
-                                    MDButtonText(
-                                        text="Retrasar 5 min",
-                                        theme_text_color="Custom",
-                                        text_color=(0.6, 0.6, 0.6, 1),
-                                        font_size="14sp"
-                                    ),
-                                    style="outlined",
-                                    line_color=(0.6, 0.6, 0.6, 1),
-                                    on_release=retrasar_notificacion
-                                ),
-                                MDButton(
-                                    MDButtonText(
-                                        text="Ya lo tomé",
-                                        theme_text_color="Custom",
-                                        text_color=(1, 1, 1, 1),
-                                        font_size="14sp",
-                                        bold=True
-                                    ),
-                                    style="filled",
-                                    md_bg_color=(0.2, 0.7, 0.2, 1),
-                                    on_release=marcar_tomado
-                                ),
-                                spacing="16dp"
-                            ),
-                            size_hint=(0.85, None),
-                            height=dp(280),
-                            radius=[dp(20), dp(20), dp(20), dp(20)],
-                            elevation=8
-                        )
-                        self.dialog.open()
-                        
-                        # Marcar como notificado para este tiempo específico
-                        med['last_notification_time'] = current_time
-                        break  # Solo mostrar una notificación a la vez
+            self.schedule_reminder(med, now)
+        self.arm_reminders()
+
+    def cancel_reminder_timer(self):
+        if self._reminder_event is not None:
+            self._reminder_event.cancel()
+            self._reminder_event = None
+
+    def arm_reminders(self):
+        """Programa un único temporizador para el aviso más cercano"""
+        self.cancel_reminder_timer()
+        fire_at = self.reminders.peek()
+        if fire_at is None:
+            return
+        delay = (fire_at - datetime.now()).total_seconds()
+        delay = min(max(delay, 0), self.MAX_REMINDER_SLEEP)
+        self._reminder_event = Clock.schedule_once(self.check_reminders, delay)
+
+    def _on_reminder_dismissed(self, *args):
+        # Los avisos sin responder quedan como avisados (ver reconcile_missed_doses)
+        self.notifications.clear()
+        self.arm_reminders()
+
+    def make_reminder(self, med):
+        """Aviso de la dosis que toca: la pospuesta o la que indica el horario"""
+        med_id = med.get('id')
+        return scheduler.make_reminder(med, self._notified.get(med_id), self._snoozed.get(med_id))
+
+    @perf.instrument()
+    def check_reminders(self, dt):
+        """Agrega al diálogo de avisos todos los medicamentos que vencen en la ventana"""
+        self._reminder_event = None
+        scheduler.drain_due(self.reminders, self.notifications, self.find_medicine,
+                            datetime.now(), self._notified, self._snoozed, self.REMINDER_WINDOW)
+        # Las tarjetas de los pospuestos vuelven a mostrar el horario del tratamiento
+        delayed = [reminder.med_id for reminder in self.notifications if reminder.delayed]
+        if delayed:
+            self.request_meds_render(delayed)
+        if self.notifications:
+            self.show_reminder_dialog()
+        self.arm_reminders()
+
+    def take_reminder(self, med_id):
+        self.respond_reminders([med_id], 'taken')
+
+    def snooze_reminder(self, med_id):
+        self.respond_reminders([med_id], 'snoozed')
+
+    def take_all_reminders(self, *args):
+        self.respond_reminders([reminder.med_id for reminder in self.notifications], 'taken')
+
+    def respond_reminders(self, med_ids, event):
+        """Marca como tomados ('taken') o pospone ('snoozed') avisos del diálogo.
+
+        Todos los eventos se registran en una sola transacción.
+        """
+        events = []
+        for med_id in med_ids:
+            reminder = self.notifications.pop(med_id)
+            med = self.find_medicine(med_id)
+            if reminder is None or med is None:
+                continue
+            if event == 'taken':
+                med['taken_doses'] = min(med.get('taken_doses', 0) + 1, med.get('total_doses', 0))
+                # Verificar si se completaron todas las dosis
+                if med['taken_doses'] >= med.get('total_doses', 0):
+                    med['completed'] = True
+                # Resetear el tiempo de alerta al original
+                med['current_alert_time'] = med['time']
+                self._snoozed.pop(med_id, None)
+                events.append((med, 'taken', reminder.alert_time, None, reminder.due_at))
+            else:
+                # Nueva hora: 5 minutos después de la hora avisada
+                new_time = datetime.strptime(reminder.alert_time, "%H:%M") + timedelta(minutes=5)
+                med['current_alert_time'] = f"{new_time:%H:%M}"
+                if reminder.due_at is not None:
+                    self._snoozed[med_id] = reminder.due_at
+                events.append((med, 'snoozed', reminder.alert_time, med['current_alert_time'],
+                               reminder.due_at))
+            med['last_notification_time'] = reminder.alert_time
+
+            # Reprogramar el próximo aviso de este medicamento
+            self.schedule_reminder(med)
+
+        self.get_repository().record_dose_batch(events)
+        if self.archive_completed([med for med, *_ in events]):
+            self.request_meds_render()
+        else:
+            self.request_meds_render([med.get('id') for med, *_ in events])
+        self.arm_reminders()
+        if self.notifications:
+            self.show_reminder_dialog()
+        else:
+            self.get_dialogs().dismiss('recordatorio')
 
+    def build_reminder_dialog(self):
+        """Plantilla del diálogo de avisos; las filas se cambian al mostrarlo"""
+        from kivymd.uix.button import MDButton, MDButtonText
+        from kivymd.uix.dialog import (
+            MDDialog, MDDialogHeadlineText, MDDialogContentContainer, MDDialogButtonContainer,
+        )
+
+        self._reminder_headline = MDDialogHeadlineText(
+            halign="center",
+            theme_text_color="Custom",
+            text_color=(0.1, 0.3, 0.6, 1),
+            bold=True
+        )
+        self._reminder_list = MDBoxLayout(orientation="vertical", adaptive_height=True, spacing=dp(4))
+        self._reminder_rows = {}  # med_id -> ReminderRow visible
+        self._spare_rows = []     # filas quitadas, para reutilizar
+        self._take_all_button = MDButton(
+            MDButtonText(
+                text="Tomar todos",
+                theme_text_color="Custom",
+                text_color=(1, 1, 1, 1),
+                bold=True
+            ),
+            style="filled",
+            md_bg_color=(0.2, 0.7, 0.2, 1),
+            on_release=self.take_all_reminders
+        )
+        dialog = MDDialog(
+            self._reminder_headline,
+            MDDialogContentContainer(self._reminder_list),
+            MDDialogButtonContainer(self._take_all_button),
+            size_hint=(0.9, None),
+            radius=[dp(20), dp(20), dp(20), dp(20)],
+            elevation=8
+        )
+        dialog.bind(on_dismiss=self._on_reminder_dismissed)
+        return dialog
+
+    def show_reminder_dialog(self):
+        """Muestra los avisos pendientes; si el diálogo ya está abierto solo actualiza las filas"""
+        # Los avisos pasan delante de los demás diálogos pendientes
+        self.get_dialogs().show('recordatorio', first=True)
+
+    def _fill_reminder_dialog(self, dialog):
+        self._prepare_dialog(dialog)
+        rows = self._reminder_rows
+        pending = list(self.notifications)
+
+        # Quitar las filas de los avisos ya respondidos
+        for med_id in [med_id for med_id in rows if med_id not in self.notifications]:
+            row = rows.pop(med_id)
+            self._reminder_list.remove_widget(row)
+            self._spare_rows.append(row)
+
+        for reminder in pending:
+            med = self.find_medicine(reminder.med_id)
+            row = rows.get(reminder.med_id)
+            if row is None:
+                row = self._spare_rows.pop() if self._spare_rows else ReminderRow()
+                row.med_id = reminder.med_id
+                rows[reminder.med_id] = row
+                self._reminder_list.add_widget(row)
+            row.text = viewmodel.reminder_row_text(med, reminder)
+
+        self._reminder_headline.text = viewmodel.reminder_headline(len(pending))
+        # Con un solo medicamento alcanza con el botón de su fila
+        self._take_all_button.disabled = len(pending) < 2
+        self._take_all_button.opacity = 0 if len(pending) < 2 else 1
+
+
+    # ====== Dosis vencidas ======
+    def load_settled_doses(self, missed=None):
+        """Marca como ya avisadas las dosis omitidas del historial.
+
+        missed es med_id -> horario de la última dosis omitida; si no se
+        pasa se lee de la BD.
+        """
+        if missed is None:
+            missed = self.get_repository().last_missed_doses()
+        self._notified.update(catchup.merge_settled(missed, self._notified))
+
+    def reconcile_missed_doses(self, now=None):
+        """Busca las dosis que vencieron sin avisarse y muestra un único aviso.
+
+        Las dosis encontradas quedan como avisadas (el temporizador pasa al
+        siguiente horario) y pendientes hasta que se respondan. Devuelve la
+        lista de catchup.Overdue.
+        """
+        if self._loading:
+            # Faltan medicamentos y dosis ya resueltas: se revisa al terminar la carga
+            return []
+        now = now or datetime.now()
+        overdue = catchup.find_overdue(self.medicines, now, self._notified, self.REMINDER_WINDOW)
+        if not overdue:
+            return overdue
+        pending = {item.med['id']: item for item in self._overdue_pending}
+        for item in overdue:
+            self._notified[item.med['id']] = item.slots[-1]
+            self.schedule_reminder(item.med, now)
+            # Se suman a las del aviso que todavía no se respondió
+            previous = pending.get(item.med['id'])
+            pending[item.med['id']] = (catchup.Overdue(item.med, previous.slots + item.slots)
+                                       if previous else item)
+        self._overdue_pending = list(pending.values())
+        self.arm_reminders()
+        self.show_overdue_dialog(now)
+        return overdue
+
+    def resolve_overdue_doses(self, overdue, event):
+        """Registra como tomadas ('taken') u omitidas ('missed') las dosis vencidas"""
+        repository = self.get_repository()
+        for item in overdue:
+            med = item.med
+            repository.record_dose_events(med, event, item.slots)
+            # Mismo efecto que los triggers sobre el medicamento en memoria
+            if event == 'taken':
+                med['taken_doses'] = min(med.get('taken_doses', 0) + len(item.slots),
+                                         med.get('total_doses', 0))
+                med['completed'] = med['taken_doses'] >= med.get('total_doses', 0)
+            med['last_notification_time'] = f"{item.slots[-1]:%H:%M}"
+            med['current_alert_time'] = med['time']
+            self._snoozed.pop(med['id'], None)
+            self.schedule_reminder(med)
+        if self.archive_completed([item.med for item in overdue]):
+            self.request_meds_render()
+        else:
+            self.request_meds_render([item.med['id'] for item in overdue])
+        self.arm_reminders()
+
+    def show_overdue_dialog(self, now=None):
+        """Aviso consolidado con todas las dosis vencidas sin responder"""
+        self.get_dialogs().show('vencidas', now=now)
+
+    def _answer_overdue(self, event):
+        overdue, self._overdue_pending = self._overdue_pending, []
+        self.dismiss_dialog()
+        self.resolve_overdue_doses(overdue, event)
+
+    def _on_overdue_dismissed(self, *args):
+        # Sin respuesta quedan pendientes: se vuelven a preguntar al reabrir la app
+        self._overdue_pending = []
+
+    def _build_overdue_dialog(self):
+        from kivymd.uix.button import MDButton, MDButtonText
+        from kivymd.uix.dialog import (
+            MDDialog, MDDialogHeadlineText, MDDialogSupportingText, MDDialogButtonContainer,
+        )
 
+        text = MDDialogSupportingText(halign="center")
+        self._dialog_parts['vencidas'] = {'text': text}
+        dialog = MDDialog(
+            MDDialogHeadlineText(
+                text="Dosis sin registrar",
+                halign="center",
+                theme_text_color="Custom",
+                text_color=(0.1, 0.3, 0.6, 1),
+                bold=True
+            ),
+            text,
+            MDDialogButtonContainer(
+                MDButton(
+                    MDButtonText(text="Más tarde"),
+                    style="text",
+                    on_release=self.dismiss_dialog
+                ),
+                MDButton(
+                    MDButtonText(text="No las tomé"),
+                    style="outlined",
+                    on_release=lambda *args: self._answer_overdue('missed')
+                ),
+                MDButton(
+                    MDButtonText(
+                        text="Sí, las tomé",
+                        theme_text_color="Custom",
+                        text_color=(1, 1, 1, 1),
+                        bold=True
+                    ),
+                    style="filled",
+                    md_bg_color=(0.2, 0.7, 0.2, 1),
+                    on_release=lambda *args: self._answer_overdue('taken')
+                ),
+                spacing="8dp"
+            ),
+            size_hint=(0.9, None),
+        )
+        dialog.bind(on_dismiss=self._on_overdue_dismissed)
+        return dialog
+
+    def _fill_overdue_dialog(self, dialog, now=None):
+        self._prepare_dialog(dialog)
+        total = sum(len(item.slots) for item in self._overdue_pending)
+        self._dialog_parts['vencidas']['text'].text = (
+            f"Mientras la app estaba cerrada vencieron {total} dosis:\n\n"
+            f"{catchup.format_overdue(self._overdue_pending, now)}\n\n¿Las tomaste?"
+        )
 
 if __name__ == "__main__":
     MedicineApp().run()
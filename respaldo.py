@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Respaldo de Sonnar sin interfaz gráfica.
+
+Exporta o importa los medicamentos y el historial de dosis de un perfil
+(por defecto el último usado en la app) en JSON Lines o CSV, según la
+extensión del archivo. Ver core.transfer.
+
+Uso:
+  python respaldo.py exportar respaldo.jsonl [--perfil NOMBRE | --db RUTA]
+  python respaldo.py importar respaldo.csv [--perfil NOMBRE | --db RUTA] [--formato csv]
+"""
+import argparse
+import os
+import sys
+
+from core import transfer
+from core.profiles import ProfileStore
+from core.repository import MedicineRepository
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def open_repository(args, profiles):
+    """Repositorio del perfil pedido o del perfil activo"""
+    if args.perfil:
+        matches = [p for p in profiles.list_profiles() if p['name'].lower() == args.perfil.lower()]
+        if not matches:
+            raise SystemExit(f"No existe el perfil {args.perfil}")
+        profile = matches[0]
+    else:
+        profile = profiles.active_profile()
+    print(f"Perfil: {profile['name']}")
+    return MedicineRepository(profiles.db_path(profile))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta o importa medicamentos e historial de dosis")
+    parser.add_argument("accion", choices=("exportar", "importar"))
+    parser.add_argument("archivo", help="Archivo .jsonl o .csv")
+    parser.add_argument("--formato", choices=transfer.FORMATS,
+                        help="Formato del archivo (por defecto según la extensión)")
+    parser.add_argument("--perfil", help="Nombre del perfil (por defecto el último usado)")
+    parser.add_argument("--db", help="Ruta de una base de datos (en lugar de un perfil)")
+    args = parser.parse_args()
+
+    # Con --db no se usa (ni se crea) el índice de perfiles
+    profiles = None
+    if args.db:
+        repository = MedicineRepository(args.db)
+    else:
+        profiles = ProfileStore(BASE_DIR)
+        profiles.init()
+        repository = open_repository(args, profiles)
+    try:
+        if args.accion == "exportar":
+            repository.init_db()
+            result = transfer.export_data(repository, args.archivo, args.formato)
+        else:
+            result = transfer.import_data(repository, args.archivo, args.formato)
+    except ValueError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    finally:
+        repository.close()
+        if profiles is not None:
+            profiles.close()
+
+    verb = "Exportados" if args.accion == "exportar" else "Importados"
+    print(f"{verb}: {transfer.format_summary(result)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
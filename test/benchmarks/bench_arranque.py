@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Benchmark de arranque en frío de la aplicación.
+
+Cada medición corre en un proceso nuevo (imports sin caché de módulos) y
+registra, desde el inicio del proceso:
+
+  import main        Tiempo hasta terminar de importar main.py
+  splash visible     Primer frame dibujado con la splash screen
+  primera lista      Primera tanda de medicamentos mostrada (fin de la splash)
+  lista completa     Todos los medicamentos leídos y los avisos armados
+
+Uso: python bench_arranque.py [--runs 5] [--meds 200] [--importtime]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+START = time.perf_counter()
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def run_child(db_path):
+    """Arranca la app, mide los hitos y la cierra al mostrarse la lista"""
+    sys.path.insert(0, ROOT_DIR)
+    os.chdir(ROOT_DIR)  # medicamentos.kv e imágenes se cargan con rutas relativas
+
+    from kivy.clock import Clock
+    from main import MedicineApp
+    import_s = time.perf_counter() - START
+
+    class StartupApp(MedicineApp):
+        marks = {}
+
+        def on_start(self):
+            super().on_start()
+            Clock.schedule_once(lambda dt: self.marks.setdefault(
+                'splash_s', time.perf_counter() - START))
+
+        def show_main_screen(self):
+            super().show_main_screen()
+            self.marks['lista_s'] = time.perf_counter() - START
+
+        def finish_loading(self, missed=None, archived=None):
+            super().finish_loading(missed, archived)
+            self.marks['completa_s'] = time.perf_counter() - START
+            Clock.schedule_once(lambda dt: self.stop())
+
+    app = StartupApp()
+    app.db_path = db_path
+    app.run()
+    print(json.dumps(dict(StartupApp.marks, import_s=import_s)))
+
+
+def seed_db(path, meds):
+    sys.path.insert(0, ROOT_DIR)
+    from core.repository import MedicineRepository
+
+    repository = MedicineRepository(path)
+    repository.init_db()
+    for i in range(meds):
+        repository.insert_medicine({
+            'name': f"Medicamento {i}", 'time': f"{i % 24:02d}:00", 'grams': '500',
+            'days': '7', 'hours': '8', 'total_doses': 21, 'taken_doses': i % 21,
+            'start_date': '2025-01-01',
+        })
+    repository.close()
+
+
+def print_slowest_imports(stderr, count=15):
+    """Resume la salida de -X importtime por tiempo acumulado"""
+    rows = []
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and 'cumulative' not in line:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            rows.append((int(cumulative), name.strip()))
+    rows.sort(reverse=True)
+    print("Imports más lentos (acumulado, ms):")
+    for cumulative, name in rows[:count]:
+        print(f"  {cumulative / 1000:>8.1f}  {name}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío")
+    parser.add_argument("--runs", type=int, default=5, help="Arranques a medir")
+    parser.add_argument("--meds", type=int, default=200, help="Medicamentos en la BD")
+    parser.add_argument("--importtime", action="store_true",
+                        help="Mostrar los 15 imports más lentos del primer arranque")
+    parser.add_argument("--hijo", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        run_child(args.hijo)
+        return
+
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "bench.db")
+    seed_db(db_path, args.meds)
+
+    env = dict(os.environ, KIVY_NO_ARGS="1", KIVY_NO_CONSOLELOG="1")
+    samples = []
+    try:
+        for run in range(args.runs):
+            cmd = [sys.executable]
+            if args.importtime and run == 0:
+                cmd += ["-X", "importtime"]
+            cmd += [os.path.abspath(__file__), "--hijo", db_path]
+            result = subprocess.run(cmd, capture_output=True, text=True, env=env, check=True)
+            samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+            if args.importtime and run == 0:
+                print_slowest_imports(result.stderr)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"Arranques: {args.runs}, medicamentos: {args.meds} (mediana / mínimo, ms)")
+    for key, label in (("import_s", "import main"), ("splash_s", "splash visible"),
+                       ("lista_s", "primera lista"), ("completa_s", "lista completa")):
+        values = [s[key] * 1000 for s in samples if key in s]
+        if values:
+            print(f"  {label:<16} {statistics.median(values):>8.1f} {min(values):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+Benchmark del catálogo de medicamentos.
+
+Genera un catálogo sintético (50.000 entradas por defecto) y compara el
+costo de apertura del CSV indexado en memoria (MedicationCatalog) con el
+del archivo binario mapeado (MappedCatalog). Luego simula la escritura de
+nombres letra por letra, con y sin errores de tipeo, e informa la
+latencia por tecla de search frente a recorrer la lista completa como
+hacía el menú desplegable.
+
+Uso: python bench_catalogo.py [--entries 50000] [--queries 200] [--limit 5]
+"""
+import argparse
+import csv
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from core.catalog import MappedCatalog, MedicationCatalog, normalize, write_catalog
+
+
+SYLLABLES = ("a", "ba", "ce", "cli", "da", "fen", "flu", "ga", "li", "lo", "ma",
+             "mi", "na", "ol", "pa", "pra", "ra", "sar", "ta", "te", "ti", "tro",
+             "va", "xi", "zo", "zol", "mox", "cin", "dro", "pril")
+SUFFIXES = ("ina", "ol", "ona", "ano", "eno", "ato", "azol", "mab", "pina", "tan")
+
+
+def synthetic_catalog(count, seed=0):
+    rnd = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        name = "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4)))
+        names.add((name + rnd.choice(SUFFIXES)).capitalize())
+    return [
+        {'name': name, 'typical_dose': f"{rnd.choice((5, 10, 20, 50, 100, 500))}mg",
+         'description': "Entrada sintética"}
+        for name in sorted(names)
+    ]
+
+
+def with_typo(rnd, name):
+    """Quita, duplica o cambia una letra al azar"""
+    i = rnd.randrange(1, len(name))
+    kind = rnd.randrange(3)
+    if kind == 0:
+        return name[:i] + name[i + 1:]
+    if kind == 1:
+        return name[:i] + name[i] + name[i:]
+    return name[:i] + rnd.choice("aeiou") + name[i + 1:]
+
+
+def linear_search(entries, query, limit):
+    """Recorrido completo, como el menú desplegable anterior"""
+    key = normalize(query)
+    return [e for e in entries if key in normalize(e['name'])][:limit]
+
+
+def keystroke_latencies(search, words):
+    latencies = []
+    for word in words:
+        for end in range(1, len(word) + 1):
+            start = time.perf_counter()
+            search(word[:end])
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"  {label:<30} media {statistics.mean(latencies):>8.3f} ms   "
+          f"p95 {p95:>8.3f} ms   máx {latencies[-1]:>8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del catálogo de medicamentos")
+    parser.add_argument("--entries", type=int, default=50000, help="Entradas del catálogo")
+    parser.add_argument("--queries", type=int, default=200, help="Nombres tipeados por escenario")
+    parser.add_argument("--limit", type=int, default=5, help="Sugerencias por tecla")
+    args = parser.parse_args()
+
+    entries = synthetic_catalog(args.entries)
+    tmp_dir = tempfile.mkdtemp()
+    csv_path = os.path.join(tmp_dir, "catalogo.csv")
+    cat_path = os.path.join(tmp_dir, "catalogo.cat")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=("name", "typical_dose", "description"))
+        writer.writeheader()
+        writer.writerows(entries)
+    write_catalog(entries, cat_path)
+
+    def measure_open(factory):
+        start = time.perf_counter()
+        catalog = factory()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        # La memoria se mide aparte: tracemalloc ralentiza la carga
+        tracemalloc.start()
+        factory()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return catalog, elapsed_ms, peak / 1024 / 1024
+
+    memory, memory_ms, memory_mb = measure_open(lambda: MedicationCatalog.from_csv(csv_path))
+    mapped, mapped_ms, mapped_mb = measure_open(lambda: MappedCatalog(cat_path))
+
+    rnd = random.Random(1)
+    words = [rnd.choice(entries)['name'] for _ in range(args.queries)]
+    typos = [with_typo(rnd, word) for word in words]
+
+    print(f"Catálogo: {len(memory)} entradas "
+          f"(CSV {os.path.getsize(csv_path) / 1024:.0f} KB, binario {os.path.getsize(cat_path) / 1024:.0f} KB)")
+    print("Apertura:")
+    print(f"  {'CSV en memoria':<30} {memory_ms:>8.1f} ms   {memory_mb:>6.1f} MB")
+    print(f"  {'binario con mmap':<30} {mapped_ms:>8.3f} ms   {mapped_mb:>6.3f} MB")
+    print(f"Latencia por tecla ({args.queries} nombres, límite {args.limit}):")
+    for label, catalog in (("en memoria", memory), ("mmap", mapped)):
+        report(f"{label}, nombre correcto", keystroke_latencies(
+            lambda q: catalog.search(q, args.limit), words))
+        report(f"{label}, con error de tipeo", keystroke_latencies(
+            lambda q: catalog.search(q, args.limit), typos))
+    report("recorrido lineal", keystroke_latencies(
+        lambda q: linear_search(entries, q, args.limit), words[:max(1, args.queries // 10)]))
+
+    mapped.close()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark de la capa de conexión SQLite.
+
+Compara operaciones por segundo entre abrir/cerrar una conexión en cada
+llamada (comportamiento anterior de MedicineApp) y reutilizar la conexión
+persistente de ConnectionManager.
+
+Uso: python bench_conexiones.py [--ops 2000] [--meds 50]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from core.database import ConnectionManager
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS medicamentos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    time TEXT NOT NULL,
+    grams TEXT NOT NULL,
+    days INTEGER NOT NULL,
+    hours INTEGER NOT NULL,
+    total_doses INTEGER NOT NULL,
+    taken_doses INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    start_date TEXT,
+    current_alert_time TEXT,
+    last_notification_time TEXT
+)
+"""
+
+UPDATE_SQL = "UPDATE medicamentos SET taken_doses=?, last_notification_time=? WHERE id=?"
+SELECT_SQL = "SELECT * FROM medicamentos ORDER BY id DESC"
+
+
+def create_db(path, meds):
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    conn.executemany(
+        "INSERT INTO medicamentos (name, time, grams, days, hours, total_doses, start_date, current_alert_time) "
+        "VALUES (?, ?, '500', 3, 8, 9, '2025-01-01', ?)",
+        [(f"Med{i}", f"{i % 24:02d}:00", f"{i % 24:02d}:00") for i in range(meds)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def bench_connect_per_call(path, ops, meds):
+    """Una conexión nueva por operación, como antes"""
+    start = time.perf_counter()
+    for i in range(ops):
+        conn = sqlite3.connect(path)
+        cur = conn.cursor()
+        if i % 2:
+            cur.execute(UPDATE_SQL, (i, "08:00", i % meds + 1))
+            conn.commit()
+        else:
+            cur.execute(SELECT_SQL)
+            cur.fetchall()
+        conn.close()
+    return time.perf_counter() - start
+
+
+def bench_pooled(path, ops, meds):
+    """Conexión persistente por hilo en modo WAL"""
+    manager = ConnectionManager(path)
+    start = time.perf_counter()
+    for i in range(ops):
+        if i % 2:
+            with manager.transaction() as cur:
+                cur.execute(UPDATE_SQL, (i, "08:00", i % meds + 1))
+        else:
+            manager.execute(SELECT_SQL).fetchall()
+    elapsed = time.perf_counter() - start
+    manager.close_all()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de conexiones SQLite")
+    parser.add_argument("--ops", type=int, default=2000, help="Operaciones por escenario")
+    parser.add_argument("--meds", type=int, default=50, help="Medicamentos en la BD")
+    args = parser.parse_args()
+
+    results = {}
+    for label, bench in (("conexion por llamada", bench_connect_per_call),
+                         ("conexion persistente", bench_pooled)):
+        tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(tmp_dir, "bench.db")
+        create_db(path, args.meds)
+        elapsed = bench(path, args.ops, args.meds)
+        results[label] = args.ops / elapsed
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        os.rmdir(tmp_dir)
+
+    print(f"Operaciones: {args.ops} (50% lecturas, 50% escrituras), medicamentos: {args.meds}")
+    for label, ops_sec in results.items():
+        print(f"  {label:<22} {ops_sec:>10.0f} ops/s")
+    base = results["conexion por llamada"]
+    print(f"  Aceleración: {results['conexion persistente'] / base:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""
+Benchmark de apertura de diálogos.
+
+Mide la latencia de abrir cada tipo de diálogo (desde la llamada hasta
+que open() retorna) de dos formas:
+
+  antes      Se construye un MDDialog nuevo en cada apertura, como hacían
+             show_info_dialog, show_medication_info y confirm_delete_medicine
+  después    Se rellena y abre la plantilla de core.dialogs (ver get_dialogs)
+
+La primera apertura con plantilla incluye su construcción; se informa
+aparte, ya que en la app las plantillas principales se crean tras el
+primer frame (preload_dialogs).
+
+Uso: python bench_dialogos.py [--aperturas 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)  # medicamentos.kv e imágenes se cargan con rutas relativas
+
+from kivy.clock import Clock
+from kivy.metrics import dp
+from main import MedicineApp
+
+
+MEDICINE = {
+    'id': 1,
+    'name': 'Paracetamol',
+    'time': '08:00',
+    'grams': '500',
+    'days': '7',
+    'hours': '8',
+    'total_doses': 21,
+    'taken_doses': 5,
+    'completed': False,
+    'start_date': '2025-01-01',
+    'current_alert_time': '08:00',
+    'last_notification_time': None,
+}
+
+
+def build_fresh_dialog(text):
+    """Diálogo construido desde cero, como antes de las plantillas"""
+    from kivymd.uix.button import MDButton, MDButtonText
+    from kivymd.uix.dialog import (
+        MDDialog, MDDialogHeadlineText, MDDialogSupportingText, MDDialogButtonContainer,
+    )
+
+    dialog = MDDialog(
+        MDDialogHeadlineText(
+            text="Información del Medicamento",
+            halign="center",
+            theme_text_color="Custom",
+            text_color=(0.2, 0.6, 0.9, 1),
+            font_size="20sp",
+            bold=True
+        ),
+        MDDialogSupportingText(
+            text=text,
+            halign="left",
+            theme_text_color="Custom",
+            text_color=(0.4, 0.4, 0.4, 1),
+            font_size="14sp"
+        ),
+        MDDialogButtonContainer(
+            MDButton(
+                MDButtonText(text="Cerrar", font_size="14sp", bold=True),
+                style="filled",
+                on_release=lambda x: dialog.dismiss()
+            ),
+            spacing="16dp"
+        ),
+        size_hint=(0.9, None),
+        height=dp(450),
+        radius=[dp(20), dp(20), dp(20), dp(20)],
+        elevation=8
+    )
+    dialog.open()
+    return dialog
+
+
+class BenchmarkApp(MedicineApp):
+    """Variante de la app que omite la splash y ejecuta las mediciones"""
+
+    def __init__(self, openings, **kwargs):
+        super().__init__(**kwargs)
+        self.openings = openings
+        self.results = []
+
+    def on_start(self):
+        self.root.ids.screen_manager.current = "Medicamentos"
+        self.medicines = [dict(MEDICINE)]
+        Clock.schedule_once(self.run_benchmark, 0.5)
+
+    def time_openings(self, open_dialog, close_dialog):
+        """Latencias (ms) de open_dialog; close_dialog se ejecuta fuera de la medición"""
+        times = []
+        for i in range(self.openings):
+            start = time.perf_counter()
+            opened = open_dialog(i)
+            times.append((time.perf_counter() - start) * 1000)
+            close_dialog(opened)
+        return times
+
+    def run_benchmark(self, dt):
+        med = self.medicines[0]
+        cases = [
+            ("info", lambda i: self.show_info_dialog(f"Aviso {i}")),
+            ("medicamento", lambda i: self.show_medication_info(med)),
+            ("confirmar", lambda i: self.confirm_delete_medicine(med)),
+        ]
+
+        before = self.time_openings(lambda i: build_fresh_dialog(f"Aviso {i}"),
+                                    lambda dialog: dialog.dismiss())
+        self.results.append(("antes (MDDialog nuevo)", before[0], before[1:]))
+
+        for kind, show in cases:
+            after = self.time_openings(show, lambda _: self.dismiss_dialog())
+            self.results.append((f"después ({kind})", after[0], after[1:]))
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de apertura de diálogos")
+    parser.add_argument("--aperturas", type=int, default=50)
+    args = parser.parse_args()
+
+    app = BenchmarkApp(max(args.aperturas, 2))
+    app.db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    app.run()
+
+    print(f"{'Caso':<26} {'Primera (ms)':>13} {'Mediana (ms)':>13} {'Máx (ms)':>10}")
+    for name, first_ms, rest in app.results:
+        print(f"{name:<26} {first_ms:>13.2f} {statistics.median(rest):>13.2f} {max(rest):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
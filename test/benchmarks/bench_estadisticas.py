@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Benchmark de las estadísticas de cumplimiento.
+
+Genera un historial sintético (20 medicamentos cada 8 horas durante 3
+años por defecto) y mide, por separado, la consulta masiva del historial
+(load_dose_events) y el cálculo vectorizado de las métricas
+(adherence_stats). Como referencia se calcula lo mismo recorriendo el
+historial de cada medicamento en Python con get_dose_history.
+
+Uso: python bench_estadisticas.py [--meds 20] [--years 3] [--hours 8] [--repeticiones 5]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from core import analytics
+from core.repository import MedicineRepository
+
+
+START = datetime(2023, 1, 1, 8, 0)
+EVENTS = ('taken', 'taken', 'taken', 'taken', 'snoozed', 'missed')
+
+
+def populate_history(repository, meds, years, hours, seed=0):
+    """Medicamentos e historial sintético (no forma parte de lo medido)"""
+    rnd = random.Random(seed)
+    doses = years * 365 * 24 // hours
+    with repository.db.transaction() as cur:
+        cur.executemany(
+            """
+            INSERT INTO medicamentos
+            (name, time, grams, days, hours, total_doses, taken_doses, completed,
+             start_date, current_alert_time, last_notification_time)
+            VALUES (?, ?, '500', ?, ?, ?, 0, 0, ?, ?, NULL)
+            """,
+            [
+                (f"medicamento {i}", f"{START:%H:%M}", years * 365, hours, doses,
+                 f"{START:%Y-%m-%d}", f"{START:%H:%M}")
+                for i in range(meds)
+            ],
+        )
+        rows = []
+        for med_id in range(1, meds + 1):
+            for n in range(doses):
+                scheduled = START + timedelta(hours=n * hours)
+                recorded = scheduled + timedelta(minutes=rnd.randrange(90))
+                rows.append((med_id, rnd.choice(EVENTS), f"{scheduled:%H:%M}",
+                             f"{scheduled:%Y-%m-%d %H:%M:%S}", f"{recorded:%Y-%m-%d %H:%M:%S}"))
+        cur.executemany(
+            """
+            INSERT INTO dose_events (med_id, event, alert_time, scheduled_at, recorded_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+    return len(rows)
+
+
+def python_stats(repository, meds):
+    """Referencia: historial de cada medicamento recorrido evento por evento"""
+    fmt = "%Y-%m-%d %H:%M:%S"
+    results = []
+    for med in meds:
+        taken = on_time = snoozed = streak = best = 0
+        delay_total = 0.0
+        for item in repository.get_dose_history(med['id']):
+            if item['event'] == 'snoozed':
+                snoozed += 1
+                continue
+            delay = max((datetime.strptime(item['recorded_at'], fmt)
+                         - datetime.strptime(item['scheduled_at'], fmt)).total_seconds(), 0)
+            punctual = item['event'] == 'taken' and delay <= analytics.ON_TIME_MINUTES * 60
+            if item['event'] == 'taken':
+                taken += 1
+                delay_total += delay / 60
+            on_time += punctual
+            streak = streak + 1 if punctual else 0
+            best = max(best, streak)
+        results.append((taken, on_time, snoozed, delay_total, best))
+    return results
+
+
+def best_of(func, repetitions):
+    times = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las estadísticas de cumplimiento")
+    parser.add_argument("--meds", type=int, default=20, help="Cantidad de medicamentos")
+    parser.add_argument("--years", type=int, default=3, help="Años de historial")
+    parser.add_argument("--hours", type=int, default=8, help="Horas entre dosis")
+    parser.add_argument("--repeticiones", type=int, default=5,
+                        help="Repeticiones por operación (se informa la mejor)")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    repository = MedicineRepository(os.path.join(tmp_dir, "bench.db"))
+    try:
+        repository.init_db()
+        events_count = populate_history(repository, args.meds, args.years, args.hours)
+        meds = repository.load_medicines()
+        now = START + timedelta(days=args.years * 365)
+
+        load_ms, events = best_of(lambda: analytics.load_dose_events(repository.db), args.repeticiones)
+        stats_ms, _ = best_of(lambda: analytics.adherence_stats(events, meds, now), args.repeticiones)
+        python_ms, _ = best_of(lambda: python_stats(repository, meds), 1)
+
+        print(f"Historial: {events_count} eventos de {args.meds} medicamentos ({args.years} años)")
+        print(f"  {'consulta masiva (NumPy)':<30} {load_ms:>9.1f} ms")
+        print(f"  {'métricas vectorizadas':<30} {stats_ms:>9.1f} ms")
+        print(f"  {'total':<30} {load_ms + stats_ms:>9.1f} ms")
+        print(f"  {'recorrido en Python':<30} {python_ms:>9.1f} ms")
+    finally:
+        repository.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Benchmark de la exportación e importación de respaldos.
+
+Genera historiales sintéticos de distintos tamaños (ver
+bench_estadisticas.populate_history), los exporta en JSON Lines y CSV y
+los importa en una BD vacía. Informa el rendimiento en filas por segundo
+y el pico de memoria reservada con tracemalloc, que debe mantenerse
+estable aunque crezca el historial.
+
+Uso: python bench_respaldo.py [--eventos 100000 1000000] [--meds 20]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from bench_estadisticas import populate_history
+from core import transfer
+from core.repository import MedicineRepository
+
+
+def traced(func):
+    """Ejecuta func y devuelve (resultado, segundos, pico de memoria en MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de exportación e importación")
+    parser.add_argument("--eventos", type=int, nargs="+", default=[100000, 1000000],
+                        help="Eventos de dosis aproximados por escenario")
+    parser.add_argument("--meds", type=int, default=20, help="Cantidad de medicamentos")
+    args = parser.parse_args()
+
+    print(f"{'Operación':<20} {'Filas':>9} {'Tiempo (s)':>11} {'Filas/s':>10} {'Memoria (MB)':>13}")
+    for events in args.eventos:
+        tmp_dir = tempfile.mkdtemp()
+        source = MedicineRepository(os.path.join(tmp_dir, "origen.db"))
+        try:
+            source.init_db()
+            # Dosis cada 8 h: años necesarios para llegar a la cantidad pedida
+            years = max(1, round(events / (args.meds * 3 * 365)))
+            populate_history(source, args.meds, years, 8)
+
+            for fmt in transfer.FORMATS:
+                path = os.path.join(tmp_dir, f"respaldo.{fmt}")
+                target = MedicineRepository(os.path.join(tmp_dir, f"destino_{fmt}.db"))
+                try:
+                    for label, func in (
+                        (f"exportar {fmt}", lambda: transfer.export_data(source, path)),
+                        (f"importar {fmt}", lambda: transfer.import_data(target, path)),
+                    ):
+                        # El rendimiento sin tracemalloc; la memoria en otra pasada
+                        result = func()
+                        rows = result['medicamentos'] + result['dosis']
+                        if label.startswith("importar"):
+                            target.close()
+                            os.remove(target.db_path)
+                            target = MedicineRepository(target.db_path)
+                        _, _, memory_mb = traced(func)
+                        print(f"{label:<20} {rows:>9} {result['segundos']:>11.2f} "
+                              f"{result['filas_por_segundo']:>10,.0f} {memory_mb:>13.2f}")
+                finally:
+                    target.close()
+        finally:
+            source.close()
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Benchmark de actualización de tarjetas de la lista de medicamentos.
+
+Mide la latencia por actualización al marcar una dosis con la
+reconstrucción completa (update_meds_list) frente al parche de una sola
+tarjeta (refresh_medication_card) para distintos largos de lista. El
+parche debe mantenerse constante aunque la lista crezca.
+
+Uso: python bench_tarjetas.py [--sizes 10 100 1000 5000] [--updates 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)  # medicamentos.kv e imágenes se cargan con rutas relativas
+
+from kivy.clock import Clock
+from main import MedicineApp
+
+
+def synthetic_medicines(count):
+    return [
+        {
+            'id': i + 1,
+            'name': f"Medicamento {i}",
+            'time': f"{i % 24:02d}:00",
+            'grams': '500',
+            'days': '7',
+            'hours': '8',
+            'total_doses': 21,
+            'taken_doses': i % 21,
+            'completed': False,
+            'start_date': '2025-01-01',
+            'current_alert_time': f"{i % 24:02d}:00",
+            'last_notification_time': None,
+            'taken': False,
+        }
+        for i in range(count)
+    ]
+
+
+class BenchmarkApp(MedicineApp):
+    """Variante de la app que omite la splash y ejecuta las mediciones"""
+
+    def __init__(self, sizes, updates, **kwargs):
+        super().__init__(**kwargs)
+        self.sizes = sizes
+        self.updates = updates
+        self.results = []
+
+    def on_start(self):
+        self.root.ids.screen_manager.current = "Medicamentos"
+        Clock.schedule_once(self.run_benchmark, 0.5)
+
+    def time_per_call(self, func, repetitions):
+        start = time.perf_counter()
+        for i in range(repetitions):
+            func(i)
+        return (time.perf_counter() - start) / repetitions * 1000
+
+    def run_benchmark(self, dt):
+        for size in self.sizes:
+            self.medicines = synthetic_medicines(size)
+            self.update_meds_list()
+            # Dejar que el RecycleView cree las tarjetas visibles
+            self.root.ids.screen_manager.get_screen("Medicamentos").ids.meds_list.refresh_from_layout()
+
+            def mark_dose(i):
+                med = self.medicines[i % min(size, 5)]  # Siempre tarjetas visibles
+                med['taken_doses'] = (med['taken_doses'] + 1) % 21
+                return med
+
+            full_ms = self.time_per_call(
+                lambda i: (mark_dose(i), self.update_meds_list()),
+                max(1, min(self.updates, 20000 // size)),
+            )
+            patch_ms = self.time_per_call(
+                lambda i: self.refresh_medication_card(mark_dose(i)),
+                self.updates,
+            )
+            self.results.append((size, full_ms, patch_ms))
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de actualización de tarjetas")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--updates", type=int, default=200)
+    args = parser.parse_args()
+
+    app = BenchmarkApp(args.sizes, args.updates)
+    app.db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    app.run()
+
+    print(f"{'Medicamentos':>12} {'Reconstrucción (ms)':>20} {'Parche (ms)':>12}")
+    for size, full_ms, patch_ms in app.results:
+        print(f"{size:>12} {full_ms:>20.3f} {patch_ms:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
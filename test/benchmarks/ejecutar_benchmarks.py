@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+"""
+Suite de benchmarks de las rutas críticas de persistencia y recordatorios.
+
+Genera regímenes sintéticos de distintos tamaños y mide, para cada
+operación, el tiempo (mejor de N repeticiones), el pico de memoria
+reservada y la cantidad de bloques nuevos que quedan referenciados por el
+resultado (con tracemalloc; en update_meds_list son los objetos que el
+siguiente refresco convierte en basura):
+
+  load_medicines          Lectura completa de la lista desde SQLite
+  insert_medicine         Alta de medicamentos sobre una BD ya poblada
+  get_medication_progress Progreso de todos los medicamentos
+  check_reminders         Reconstrucción de la cola de avisos y extracción del vencido
+  update_meds_list        Datos de las tarjetas de la lista completa (con el pool)
+
+Las operaciones usan el núcleo (core) sin cargar Kivy. Los resultados se
+guardan en JSON y se comparan contra una línea base; si alguna operación
+empeora más que la tolerancia el script termina con código 1.
+
+Uso:
+  python ejecutar_benchmarks.py [--sizes 10 1000 100000] [--repeticiones 5]
+  python ejecutar_benchmarks.py --guardar-baseline
+  python ejecutar_benchmarks.py --baseline otra_baseline.json --tolerancia 0.3
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(BENCH_DIR, '..', '..')))
+
+from core import regimen, viewmodel
+from core.repository import MedicineRepository
+from core.scheduler import NotificationQueue, ReminderScheduler, drain_due, next_reminder_datetime
+
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_DIR = os.path.join(BENCH_DIR, "resultados")
+
+# Hora fija para que el progreso y los avisos no dependan del reloj
+NOW = datetime(2025, 10, 23, 17, 0)
+
+# Altas medidas por repetición en insert_medicine
+INSERTS_PER_RUN = 100
+
+# Diferencias por debajo de este umbral se consideran ruido de medición
+MIN_TIME_DIFF_MS = 0.05
+MIN_MEMORY_DIFF_KB = 16
+MIN_ALLOCATIONS_DIFF = 100
+
+
+def synthetic_medicines(count, seed=0):
+    """Genera regímenes sintéticos con nombres únicos y valores variados"""
+    rnd = random.Random(seed)
+    meds = []
+    for i in range(count):
+        days = rnd.choice((3, 5, 7, 10, 14, 30))
+        hours = rnd.choice((4, 6, 8, 12, 24))
+        time_str = f"{rnd.randrange(24):02d}:{rnd.choice((0, 15, 30, 45)):02d}"
+        total = regimen.calculate_doses(days, hours)
+        meds.append({
+            'name': f"medicamento {i}",
+            'time': time_str,
+            'grams': str(rnd.choice((100, 250, 400, 500, 1000))),
+            'days': str(days),
+            'hours': str(hours),
+            'total_doses': total,
+            'taken_doses': rnd.randrange(total + 1),
+            'completed': False,
+            'start_date': '2025-10-20',
+            'current_alert_time': time_str,
+            'last_notification_time': None,
+            'taken': False,
+        })
+    return meds
+
+
+def populate_db(repository, meds):
+    """Carga masiva de la BD de prueba (no forma parte de lo medido)"""
+    with repository.db.transaction() as cur:
+        cur.executemany(
+            """
+            INSERT INTO medicamentos
+            (name, time, grams, days, hours, total_doses, taken_doses, completed,
+             start_date, current_alert_time, last_notification_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?, NULL)
+            """,
+            [
+                (m['name'], m['time'], m['grams'], int(m['days']), int(m['hours']),
+                 m['total_doses'], m['taken_doses'], m['start_date'], m['current_alert_time'])
+                for m in meds
+            ],
+        )
+
+
+def measure(func, repetitions):
+    """Devuelve (mejor tiempo en ms, pico de memoria en KB, bloques asignados) de func.
+
+    Los bloques asignados son los que siguen vivos al terminar: se
+    conserva el resultado de func mientras se toma la instantánea.
+    """
+    times = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+
+    # La memoria se mide en una pasada aparte: tracemalloc ralentiza la ejecución
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    allocations = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, 'lineno'))
+    del result
+    return min(times), peak / 1024, allocations
+
+
+def bench_size(size, repetitions):
+    """Ejecuta todas las operaciones sobre una BD con `size` medicamentos"""
+    tmp_dir = tempfile.mkdtemp()
+    repository = MedicineRepository(os.path.join(tmp_dir, "bench.db"))
+    try:
+        repository.init_db()
+        populate_db(repository, synthetic_medicines(size))
+        meds = repository.load_medicines()
+        extra = iter(synthetic_medicines(INSERTS_PER_RUN * (repetitions + 1), seed=1))
+
+        def load():
+            return repository.load_medicines()
+
+        def insert():
+            for _ in range(INSERTS_PER_RUN):
+                med = next(extra)
+                med['name'] = f"alta {med['name']}"
+                repository.insert_medicine(med)
+
+        def progress():
+            for med in meds:
+                regimen.get_medication_progress(med, NOW)
+
+        scheduler = ReminderScheduler()
+        by_id = {med['id']: med for med in meds}
+
+        def reminders():
+            # rebuild_reminders + check_reminders de MedicineApp: todo lo que
+            # vence en la ventana pasa a la cola de avisos y se reprograma
+            scheduler.clear()
+            for med in meds:
+                fire_at = next_reminder_datetime(med, NOW)
+                if fire_at is not None:
+                    scheduler.schedule(med['id'], fire_at)
+            notifications = NotificationQueue()
+            drain_due(scheduler, notifications, by_id.get, NOW, {}, {})
+            return notifications
+
+        pool = viewmodel.CardDataPool()
+
+        def cards():
+            # Igual que update_meds_list, sin el RecycleView
+            return pool.build(meds, NOW), {med['id']: i for i, med in enumerate(meds)}
+
+        operations = (
+            ("load_medicines", load, size),
+            ("insert_medicine", insert, INSERTS_PER_RUN),
+            ("get_medication_progress", progress, size),
+            ("check_reminders", reminders, size),
+            ("update_meds_list", cards, size),
+        )
+
+        results = {}
+        for name, func, items in operations:
+            elapsed_ms, memory_kb, allocations = measure(func, repetitions)
+            results[name] = {
+                'tiempo_ms': round(elapsed_ms, 4),
+                'por_elemento_us': round(elapsed_ms * 1000 / max(items, 1), 4),
+                'memoria_kb': round(memory_kb, 1),
+                'asignaciones': allocations,
+            }
+        return results
+    finally:
+        repository.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def compare(current, baseline, tolerance):
+    """Lista las regresiones de current frente a baseline.
+
+    Cada regresión es (operación, tamaño, métrica, valor base, valor actual).
+    Solo se comparan las combinaciones presentes en ambos resultados.
+    """
+    regressions = []
+    for op, sizes in current['resultados'].items():
+        for size, metrics in sizes.items():
+            base = baseline.get('resultados', {}).get(op, {}).get(size)
+            if not base:
+                continue
+            for metric, min_diff in (('tiempo_ms', MIN_TIME_DIFF_MS),
+                                     ('memoria_kb', MIN_MEMORY_DIFF_KB),
+                                     ('asignaciones', MIN_ALLOCATIONS_DIFF)):
+                if metric not in base or metric not in metrics:
+                    continue  # Línea base anterior a la métrica
+                before, after = base[metric], metrics[metric]
+                if after - before > min_diff and after > before * (1 + tolerance):
+                    regressions.append((op, size, metric, before, after))
+    return regressions
+
+
+def print_results(results):
+    print(f"{'Operación':<25} {'Tamaño':>8} {'Tiempo (ms)':>12} {'µs/elem':>10} "
+          f"{'Memoria (KB)':>13} {'Asignaciones':>13}")
+    for op, sizes in results['resultados'].items():
+        for size, m in sizes.items():
+            print(f"{op:<25} {size:>8} {m['tiempo_ms']:>12.3f} "
+                  f"{m['por_elemento_us']:>10.3f} {m['memoria_kb']:>13.1f} {m.get('asignaciones', 0):>13}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de persistencia y recordatorios")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000],
+                        help="Cantidad de medicamentos por escenario")
+    parser.add_argument("--repeticiones", type=int, default=5,
+                        help="Repeticiones por operación (se informa la mejor)")
+    parser.add_argument("--salida", help="Archivo JSON de resultados "
+                        "(por defecto resultados/benchmark_<fecha>.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="Línea base contra la que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="Empeoramiento relativo permitido (0.25 = 25%%)")
+    parser.add_argument("--guardar-baseline", action="store_true",
+                        help="Guardar estos resultados como nueva línea base")
+    args = parser.parse_args()
+
+    results = {
+        'fecha': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'repeticiones': args.repeticiones,
+        'resultados': {},
+    }
+    for size in args.sizes:
+        print(f"Midiendo {size} medicamentos...")
+        for op, metrics in bench_size(size, args.repeticiones).items():
+            results['resultados'].setdefault(op, {})[str(size)] = metrics
+
+    print()
+    print_results(results)
+
+    output = args.salida
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en: {output}")
+
+    if args.guardar_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Línea base actualizada: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Sin línea base para comparar (usar --guardar-baseline)")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerancia)
+    if not regressions:
+        print(f"Sin regresiones frente a {args.baseline}")
+        return 0
+
+    print(f"\nRegresiones (tolerancia {args.tolerancia:.0%}):")
+    for op, size, metric, before, after in regressions:
+        print(f"  {op:<25} {size:>8} {metric:<11} {before:>10.3f} -> {after:>10.3f} "
+              f"({after / before if before else float('inf'):.2f}x)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
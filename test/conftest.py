@@ -11,7 +11,7 @@ import tempfile
 # Agregar el directorio padre al path para importar main
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from main import MedicineApp
+from core.repository import MedicineRepository
 import sqlite3
 
 
@@ -24,18 +24,31 @@ def temp_db():
     
     yield db_path
     
-    # Cleanup
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    # Cleanup (incluye los archivos auxiliares del modo WAL)
+    for path in (db_path, db_path + '-wal', db_path + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+@pytest.fixture
+def repository(temp_db):
+    """Repositorio del núcleo (sin Kivy) sobre una BD temporal"""
+    repo = MedicineRepository(temp_db)
+    repo.init_db()
+    yield repo
+    repo.close()
 
 
 @pytest.fixture
 def app_instance(temp_db):
     """Crea una instancia de la aplicación con BD temporal"""
+    # Import diferido: los tests del núcleo no necesitan cargar Kivy
+    from main import MedicineApp
     app = MedicineApp()
     app.db_path = temp_db
     app.init_db()
-    return app
+    yield app
+    app.close_db()
 
 
 @pytest.fixture
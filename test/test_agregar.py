@@ -1,5 +1,5 @@
 """
-TST08-TST15: Tests para el módulo de Agregar Medicamentos
+TST08-TST15, TST87: Tests para el módulo de Agregar Medicamentos
 Verifican que los medicamentos se agreguen correctamente
 """
 import pytest
@@ -193,3 +193,18 @@ class TestAgregarMedicamentos:
         med = app_instance.medicines[0]
         assert med['total_doses'] == 10  # (5 * 24) / 12 = 10
 
+
+    @pytest.mark.integration
+    def test_duplicado_de_tratamiento_completado(self, repository, sample_medicine):
+        """
+        TST87: Detectar un duplicado que solo está entre los completados
+        Datos de entrada: Paracetamol 08:00 completado (fuera de la lista de
+                          activos) y una búsqueda del mismo name+time
+        Resultado esperado: find_registered devuelve su id y completed=True;
+                            un name+time libre devuelve None
+        """
+        med_id = repository.insert_medicine(dict(sample_medicine, taken_doses=9, completed=True))
+        assert repository.load_medicines(completed=False) == []
+
+        assert repository.find_registered('Paracetamol', '08:00') == (med_id, True)
+        assert repository.find_registered('Paracetamol', '14:00') is None
@@ -0,0 +1,99 @@
+"""
+TST53-TST58: Tests para el catálogo de medicamentos
+Verifican la búsqueda exacta, por prefijo y aproximada del catálogo
+y el formato binario leído con mmap
+"""
+import pytest
+
+from core.catalog import MappedCatalog, MedicationCatalog, read_csv, write_catalog
+
+
+@pytest.fixture
+def catalog():
+    """Catálogo incluido con la aplicación (data/medicamentos.csv)"""
+    return MedicationCatalog.from_csv()
+
+
+class TestCatalogo:
+    """Casos de prueba para el catálogo indexado"""
+
+    @pytest.mark.unit
+    def test_busqueda_exacta(self, catalog):
+        """
+        TST53: Buscar un medicamento por nombre exacto
+        Datos de entrada: 'PARACETAMOL' y 'losartan' (sin tilde)
+        Resultado esperado: Entradas encontradas sin distinguir mayúsculas ni tildes
+        """
+        assert len(catalog) == 15
+        assert catalog.get('PARACETAMOL')['typical_dose'] == '500mg'
+        assert catalog.get('losartan')['name'] == 'Losartán'
+        assert catalog.get('Inexistente') is None
+        assert 'ibuprofeno' in catalog
+
+    @pytest.mark.unit
+    def test_busqueda_por_prefijo(self, catalog):
+        """
+        TST54: Sugerencias para las primeras letras
+        Datos de entrada: Prefijo 'a' con límite 2
+        Resultado esperado: Las dos primeras coincidencias en orden alfabético
+        """
+        names = [e['name'] for e in catalog.search('a', limit=2)]
+        assert names == ['Amoxicilina', 'Aspirina']
+
+    @pytest.mark.unit
+    def test_busqueda_aproximada(self, catalog):
+        """
+        TST55: Coincidencias con errores de tipeo o fragmentos del nombre
+        Datos de entrada: 'paracetmol' y 'tiroxina'
+        Resultado esperado: Paracetamol y Levotiroxina como primera sugerencia
+        """
+        assert catalog.search('paracetmol')[0]['name'] == 'Paracetamol'
+        assert catalog.search('tiroxina')[0]['name'] == 'Levotiroxina'
+        assert catalog.search('') == []
+
+    @pytest.mark.unit
+    def test_limite_y_sin_duplicados(self):
+        """
+        TST56: Las sugerencias respetan el límite y no se repiten
+        Datos de entrada: Catálogo de 200 entradas 'Med N' y búsqueda 'med 1'
+        Resultado esperado: 5 resultados distintos, primero los de prefijo
+        """
+        catalog = MedicationCatalog(
+            [{'name': f"Med {i}", 'typical_dose': '1mg', 'description': ''} for i in range(200)]
+        )
+        results = catalog.search('med 1', limit=5)
+        names = [e['name'] for e in results]
+        assert len(names) == 5 and len(set(names)) == 5
+        assert all(name.startswith('Med 1') for name in names)
+
+    @pytest.mark.integration
+    def test_catalogo_mapeado_igual_al_csv(self, catalog, tmp_path):
+        """
+        TST57: El catálogo binario responde igual que el cargado del CSV
+        Datos de entrada: data/medicamentos.csv convertido con write_catalog
+        Resultado esperado: Mismas entradas en get, prefix y search
+        """
+        path = str(tmp_path / "medicamentos.cat")
+        assert write_catalog(read_csv(), path) == 15
+
+        mapped = MappedCatalog(path)
+        try:
+            assert len(mapped) == len(catalog)
+            assert mapped.get('losartan') == catalog.get('losartan')
+            assert mapped.get('Inexistente') is None
+            for query in ('a', 'Lo', 'paracetmol', 'tiroxina'):
+                assert mapped.search(query, 5) == catalog.search(query, 5)
+        finally:
+            mapped.close()
+
+    @pytest.mark.unit
+    def test_archivo_invalido(self, tmp_path):
+        """
+        TST58: Abrir un archivo que no es un catálogo
+        Datos de entrada: Archivo con contenido arbitrario
+        Resultado esperado: ValueError
+        """
+        path = tmp_path / "otro.cat"
+        path.write_bytes(b"no es un catalogo" * 10)
+        with pytest.raises(ValueError):
+            MappedCatalog(str(path))
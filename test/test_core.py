@@ -0,0 +1,153 @@
+"""
+TST45-TST49, TST59-TST60, TST72: Tests para el núcleo sin interfaz (core)
+Verifican que el repositorio y el régimen funcionen sin cargar Kivy
+"""
+import pytest
+import subprocess
+import sys
+import os
+from datetime import datetime
+
+from core import regimen, viewmodel
+
+
+class TestCore:
+    """Casos de prueba para el núcleo reutilizable"""
+
+    @pytest.mark.unit
+    def test_core_no_importa_kivy(self):
+        """
+        TST45: El núcleo se importa sin cargar Kivy
+        Datos de entrada: import core en un intérprete limpio
+        Resultado esperado: Ningún módulo kivy/kivymd en sys.modules
+        """
+        root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        code = "import core, sys; print(any(m.startswith('kivy') for m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=root_dir,
+                                capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == 'False'
+
+    @pytest.mark.integration
+    def test_repositorio_crud(self, repository, sample_medicine):
+        """
+        TST46: Insertar, actualizar y eliminar con el repositorio
+        Datos de entrada: Medicamento de ejemplo
+        Resultado esperado: Cambios visibles en load_medicines
+        """
+        med_id = repository.insert_medicine(sample_medicine)
+        sample_medicine['id'] = med_id
+        sample_medicine['taken_doses'] = 2
+        repository.update_medicine(sample_medicine)
+
+        meds = repository.load_medicines()
+        assert [m['id'] for m in meds] == [med_id]
+        assert meds[0]['taken_doses'] == 2
+
+        repository.delete_medicine(med_id)
+        assert repository.load_medicines() == []
+
+    @pytest.mark.unit
+    def test_progreso_con_hora_fija(self, sample_medicine):
+        """
+        TST47: Progreso calculado con una hora de referencia explícita
+        Datos de entrada: Inicio 23/10 08:00 cada 8 h, now=17:00 y al día siguiente 09:00
+        Resultado esperado: 9 dosis totales, 2 y luego 4 esperadas
+        """
+        sample_medicine['start_date'] = '2025-10-23'
+        now = datetime(2025, 10, 23, 17, 0)
+        total, expected, taken = regimen.get_medication_progress(sample_medicine, now)
+        assert (total, expected, taken) == (9, 2, 0)
+
+        _, expected, _ = regimen.get_medication_progress(sample_medicine, datetime(2025, 10, 24, 9, 0))
+        assert expected == 4
+
+    @pytest.mark.unit
+    def test_proxima_dosis(self, sample_medicine):
+        """
+        TST48: Próxima dosis según las dosis tomadas
+        Datos de entrada: Inicio 08:00 cada 8 h con 0 y 2 dosis tomadas
+        Resultado esperado: '08:00' y '00:00'
+        """
+        assert regimen.calculate_next_dose_time(sample_medicine) == '08:00'
+        sample_medicine['taken_doses'] = 2
+        assert regimen.calculate_next_dose_time(sample_medicine) == '00:00'
+
+    @pytest.mark.unit
+    def test_datos_de_tarjeta(self, sample_medicine):
+        """
+        TST49: Datos de la tarjeta sin crear widgets
+        Datos de entrada: Medicamento con 9 de 9 dosis tomadas
+        Resultado esperado: Progreso 100% y colores de completado
+        """
+        sample_medicine['id'] = 7
+        sample_medicine['taken_doses'] = 9
+        data = viewmodel.medication_card_data(sample_medicine, datetime(2025, 10, 23, 17, 0))
+
+        assert data['med_id'] == 7
+        assert data['dose_text'] == 'Dosis: 9/9'
+        assert data['percentage_text'] == '100%'
+        assert data['progress'] == 1.0
+        assert data['line_color'] == (0.2, 0.7, 0.2, 1)
+
+    @pytest.mark.unit
+    def test_horario_de_dosis(self):
+        """
+        TST59: Consultas aritméticas sobre el horario de dosis
+        Datos de entrada: Inicio 23/10 08:00, cada 8 h durante 3 días (9 dosis)
+        Resultado esperado: Última dosis, esperadas, siguiente y vencida correctas
+        """
+        timetable = regimen.build_timetable('2025-10-23', 8 * 60, 3, 8)
+
+        assert len(timetable) == 9
+        assert timetable[0] == datetime(2025, 10, 23, 8, 0)
+        assert timetable.end == datetime(2025, 10, 26, 0, 0)
+        assert timetable.expected_by(datetime(2025, 10, 23, 7, 59)) == 0
+        assert timetable.expected_by(datetime(2025, 10, 23, 16, 0)) == 2
+        assert timetable.expected_by(datetime(2025, 11, 1)) == 9
+        assert timetable.next_dose(3) == datetime(2025, 10, 24, 8, 0)
+        assert timetable.next_dose(9) is None
+        assert timetable.next_after(datetime(2025, 10, 23, 16, 0)) == datetime(2025, 10, 24, 0, 0)
+        assert timetable.is_due(datetime(2025, 10, 23, 17, 0), taken_doses=1)
+        assert not timetable.is_due(datetime(2025, 10, 23, 17, 0), taken_doses=2)
+
+    @pytest.mark.unit
+    def test_proxima_dosis_con_dia(self, sample_medicine):
+        """
+        TST60: La próxima dosis conserva el día
+        Datos de entrada: Inicio 23/10 08:00 cada 8 h con 2 y 9 dosis tomadas
+        Resultado esperado: 24/10 00:00 y None al completar el tratamiento
+        """
+        sample_medicine['start_date'] = '2025-10-23'
+        sample_medicine['taken_doses'] = 2
+        assert regimen.next_dose_datetime(sample_medicine) == datetime(2025, 10, 24, 0, 0)
+
+        sample_medicine['taken_doses'] = 9
+        assert regimen.next_dose_datetime(sample_medicine) is None
+
+        data = viewmodel.medication_card_data(dict(sample_medicine, taken_doses=2, id=1),
+                                              datetime(2025, 10, 23, 17, 0))
+        assert data['next_dose_text'] == 'Próxima dosis: mañana 00:00'
+
+    @pytest.mark.unit
+    def test_pool_datos_tarjeta(self, sample_medicine):
+        """
+        TST72: Reutilización de los datos de tarjeta entre refrescos
+        Datos de entrada: Dos medicamentos refrescados tres veces; en la
+                          segunda cambia una dosis tomada y en la tercera
+                          se elimina un medicamento
+        Resultado esperado: Mismos diccionarios en cada refresco, actualizados
+                            en sitio y sin entradas de medicamentos eliminados
+        """
+        now = datetime(2025, 10, 23, 17, 0)
+        meds = [dict(sample_medicine, id=1, start_date='2025-10-23'),
+                dict(sample_medicine, id=2, name='Ibuprofeno', start_date='2025-10-23')]
+        pool = viewmodel.CardDataPool()
+        first = pool.build(meds, now)
+
+        meds[0]['taken_doses'] = 2
+        second = pool.build(meds, now)
+        assert all(a is b for a, b in zip(first, second))
+        assert second[0] == viewmodel.medication_card_data(meds[0], now)
+
+        assert pool.build(meds[1:], now)[0] is first[1]
+        assert len(pool) == 1
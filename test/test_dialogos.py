@@ -0,0 +1,97 @@
+"""
+TST77-TST78: Tests para el gestor de diálogos
+Verifican que las plantillas se creen una sola vez y que los diálogos se
+encolen en lugar de cerrar el que está abierto
+"""
+import pytest
+
+from core.dialogs import DialogManager
+
+
+class FakeDialog:
+    """Plantilla mínima con la interfaz de MDDialog que usa DialogManager"""
+
+    def __init__(self):
+        self.text = None
+        self.opened = 0
+        self._on_dismiss = []
+
+    def bind(self, on_dismiss):
+        self._on_dismiss.append(on_dismiss)
+
+    def open(self):
+        self.opened += 1
+
+    def dismiss(self):
+        for callback in self._on_dismiss:
+            callback(self)
+
+
+@pytest.fixture
+def dialogs():
+    manager = DialogManager()
+    manager.built = []
+
+    def build():
+        dialog = FakeDialog()
+        manager.built.append(dialog)
+        return dialog
+
+    def fill(dialog, text=None):
+        dialog.text = text
+
+    manager.register('info', build, fill)
+    manager.register('recordatorio', build, fill, live=True)
+    return manager
+
+
+class TestDialogos:
+    """Casos de prueba para la cola de diálogos reutilizables"""
+
+    @pytest.mark.unit
+    def test_plantilla_reutilizada_y_cola(self, dialogs):
+        """
+        TST77: Mostrar dos avisos de información seguidos
+        Datos de entrada: Dos show('info') mientras el primero sigue abierto
+        Resultado esperado: El segundo espera en la cola y se abre al cerrar
+                            el primero, con la misma plantilla rellenada de nuevo
+        """
+        assert dialogs.show('info', text="Primero")
+        assert not dialogs.show('info', text="Segundo")
+        info = dialogs.template('info')
+        assert (info.text, info.opened, len(dialogs)) == ("Primero", 1, 1)
+
+        dialogs.dismiss()
+        assert (info.text, info.opened, len(dialogs)) == ("Segundo", 2, 0)
+        assert dialogs.is_open('info')
+
+        dialogs.dismiss()
+        assert not dialogs.is_open()
+        assert len(dialogs.built) == 1
+
+    @pytest.mark.unit
+    def test_avisos_primero_y_actualizados(self, dialogs):
+        """
+        TST78: Avisos de medicamentos con otro diálogo abierto
+        Datos de entrada: Un info abierto, otro info pendiente y dos
+                          show('recordatorio', first=True) seguidos
+        Resultado esperado: Un solo recordatorio pendiente, delante del info
+                            y con el último contenido; abierto se actualiza
+                            sin volver a abrirse
+        """
+        dialogs.show('info', text="Abierto")
+        dialogs.show('info', text="Pendiente")
+        dialogs.show('recordatorio', first=True, text="1 medicamento")
+        dialogs.show('recordatorio', first=True, text="2 medicamentos")
+        assert len(dialogs) == 2
+
+        dialogs.dismiss()
+        reminder = dialogs.template('recordatorio')
+        assert dialogs.is_open('recordatorio')
+        assert (reminder.text, reminder.opened) == ("2 medicamentos", 1)
+
+        assert dialogs.show('recordatorio', first=True, text="3 medicamentos")
+        assert (reminder.text, reminder.opened) == ("3 medicamentos", 1)
+
+        dialogs.clear()
+        assert not dialogs.is_open() and len(dialogs) == 0
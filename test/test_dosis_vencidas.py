@@ -0,0 +1,128 @@
+"""
+TST73-TST74, TST90, TST92: Tests para la reconciliación de dosis vencidas
+Verifican que las dosis que vencieron con la app cerrada se detecten una
+sola vez y se registren en lote
+"""
+import pytest
+from datetime import datetime, timedelta
+
+from core import catchup, viewmodel
+from core.scheduler import next_reminder_datetime
+
+
+class TestDosisVencidas:
+    """Casos de prueba para las dosis vencidas mientras la app no estaba activa"""
+
+    @pytest.mark.unit
+    def test_dosis_vencidas_desde_la_ultima_resuelta(self, sample_medicine):
+        """
+        TST73: Dosis vencidas según el horario y lo ya resuelto
+        Datos de entrada: Inicio 23/10 08:00 cada 8 h con 1 dosis tomada,
+                          revisado el 24/10 a las 09:00 sin y con la dosis
+                          de las 00:00 ya resuelta; un tratamiento completo
+        Resultado esperado: 16:00, 00:00 y 08:00; luego solo 08:00;
+                            el tratamiento completo no aparece
+        """
+        now = datetime(2025, 10, 24, 9, 0)
+        med = dict(sample_medicine, id=1, start_date='2025-10-23', taken_doses=1)
+        done = dict(sample_medicine, id=2, start_date='2025-10-20', taken_doses=9, completed=True)
+
+        overdue = catchup.find_overdue([med, done], now)
+        assert len(overdue) == 1
+        assert overdue[0].med is med
+        assert overdue[0].slots == [datetime(2025, 10, 23, 16, 0),
+                                    datetime(2025, 10, 24, 0, 0),
+                                    datetime(2025, 10, 24, 8, 0)]
+        assert catchup.format_overdue(overdue, now) == \
+            'Paracetamol: 3 dosis (23/10 16:00, 00:00, 08:00)'
+
+        settled = catchup.merge_settled({1: datetime(2025, 10, 23, 16, 0)},
+                                        {1: datetime(2025, 10, 24, 0, 0)})
+        assert [item.slots for item in catchup.find_overdue([med], now, settled)] == \
+            [[datetime(2025, 10, 24, 8, 0)]]
+
+    @pytest.mark.integration
+    def test_registrar_dosis_vencidas_en_lote(self, repository, sample_medicine):
+        """
+        TST74: Registrar en lote las dosis vencidas
+        Datos de entrada: Dos dosis omitidas de un medicamento con un aviso
+                          pospuesto y dos tomadas de otro
+        Resultado esperado: Historial con el horario de cada dosis, aviso
+                            pospuesto cancelado, taken_doses=2 en el segundo
+                            y nada pendiente al volver a revisar
+        """
+        now = datetime(2025, 10, 24, 9, 0)
+        meds = []
+        for name in ('Paracetamol', 'Ibuprofeno'):
+            med = dict(sample_medicine, name=name, start_date='2025-10-23', current_alert_time='08:05')
+            med['id'] = repository.insert_medicine(med)
+            meds.append(med)
+        slots = [datetime(2025, 10, 23, 8, 0), datetime(2025, 10, 23, 16, 0)]
+
+        repository.record_dose_events(meds[0], 'missed', slots, when=now)
+        repository.record_dose_events(meds[1], 'taken', slots, when=now)
+
+        history = repository.get_dose_history(meds[0]['id'])
+        assert [(h['event'], h['scheduled_at']) for h in history] == [
+            ('missed', '2025-10-23 08:00:00'), ('missed', '2025-10-23 16:00:00')]
+        assert repository.last_missed_doses() == {meds[0]['id']: slots[-1]}
+
+        loaded = {m['name']: m for m in repository.load_medicines()}
+        assert loaded['Paracetamol']['taken_doses'] == 0
+        assert loaded['Paracetamol']['current_alert_time'] == '08:00'
+        assert loaded['Ibuprofeno']['taken_doses'] == 2
+
+        settled = repository.last_missed_doses()
+        remaining = catchup.find_overdue(list(loaded.values()), datetime(2025, 10, 23, 17, 0), settled)
+        assert remaining == []
+
+    @pytest.mark.unit
+    def test_tarjeta_y_aviso_tras_dosis_omitidas(self, sample_medicine):
+        """
+        TST90: Próxima dosis de la tarjeta después de omitir dosis vencidas
+        Datos de entrada: Inicio 17/10 08:00 cada 8 h sin dosis tomadas,
+                          revisado el 18/10 a las 10:00 con las dosis hasta
+                          las 08:00 omitidas ("No las tomé")
+        Resultado esperado: La tarjeta muestra el mismo horario que agenda
+                            el aviso (16:00 de hoy), no la primera omitida
+        """
+        now = datetime(2025, 10, 18, 10, 0)
+        med = dict(sample_medicine, id=1, start_date='2025-10-17', days='3')
+        settled = datetime(2025, 10, 18, 8, 0)
+
+        assert next_reminder_datetime(med, now, settled) == datetime(2025, 10, 18, 16, 0)
+        card = viewmodel.medication_card_data(med, now, settled)
+        assert card['next_dose_text'] == 'Próxima dosis: 16:00'
+
+        pool = viewmodel.CardDataPool()
+        assert pool.build([med], now)[0]['next_dose_text'] == 'Próxima dosis: 17/10 08:00'
+        assert pool.build([med], now, {1: settled})[0]['next_dose_text'] == 'Próxima dosis: 16:00'
+
+    @pytest.mark.unit
+    def test_dosis_en_curso_no_es_vencida(self, sample_medicine):
+        """
+        TST92: Dosis que vence justo al abrir la app
+        Datos de entrada: Cada 8 h con la dosis de las 00:00 del 19/10 omitida,
+                          revisado a las 08:00:10 y a las 08:01:10; otro
+                          tratamiento de un año cada 1 h sin ninguna tomada
+        Resultado esperado: A las 08:00:10 no hay vencidas y el aviso es el de
+                            las 08:00; un minuto después la de las 08:00 es
+                            vencida. El tratamiento largo da 8752 dosis y el
+                            aviso muestra solo las últimas
+        """
+        med = dict(sample_medicine, id=1, start_date='2025-10-17', taken_doses=5)
+        settled = {1: datetime(2025, 10, 19, 0, 0)}
+        now = datetime(2025, 10, 19, 8, 0, 10)
+
+        assert catchup.find_overdue([med], now, settled) == []
+        assert next_reminder_datetime(med, now, settled[1]) == datetime(2025, 10, 19, 8, 0)
+        later = catchup.find_overdue([med], now + timedelta(minutes=1), settled)
+        assert [list(item.slots) for item in later] == [[datetime(2025, 10, 19, 8, 0)]]
+
+        long_med = dict(sample_medicine, id=2, start_date='2024-10-19', days='365', hours='1')
+        overdue = catchup.find_overdue([long_med], datetime(2025, 10, 19, 0, 0))
+        slots = overdue[0].slots
+        assert len(slots) == 8752
+        assert slots[-1] == datetime(2025, 10, 18, 23, 0)
+        assert catchup.format_overdue(overdue, datetime(2025, 10, 19, 0, 0)) == \
+            'Paracetamol: 8752 dosis (…, 18/10 21:00, 18/10 22:00, 18/10 23:00)'
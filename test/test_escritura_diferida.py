@@ -0,0 +1,127 @@
+"""
+TST41-TST44, TST91: Tests para la cola de escritura diferida
+Verifican que las mutaciones encoladas se confirmen en lote y en orden
+"""
+import pytest
+import sqlite3
+
+from core.database import ConnectionManager
+from core.writer import WriteBehindQueue
+
+
+INSERT_SQL = "INSERT INTO eventos (med_id, valor) VALUES (?, ?)"
+
+
+@pytest.fixture
+def manager(temp_db):
+    """ConnectionManager sobre una tabla mínima de eventos"""
+    manager = ConnectionManager(temp_db)
+    with manager.transaction() as cur:
+        cur.execute("CREATE TABLE eventos (id INTEGER PRIMARY KEY, med_id INTEGER, valor TEXT UNIQUE)")
+    yield manager
+    manager.close_all()
+
+
+@pytest.fixture
+def queue(manager):
+    """Cola con una ventana larga para que nada se confirme sin flush"""
+    queue = WriteBehindQueue(lambda: manager, flush_interval=60)
+    yield queue
+    queue.stop()
+
+
+class TestEscrituraDiferida:
+    """Casos de prueba para la cola de escritura diferida"""
+
+    @pytest.mark.unit
+    def test_flush_confirma_pendientes(self, manager, queue):
+        """
+        TST41: Forzar la escritura de las mutaciones encoladas
+        Datos de entrada: 3 inserciones encoladas y flush()
+        Resultado esperado: Nada escrito antes del flush, todo escrito después
+        """
+        for i in range(3):
+            queue.submit(1, INSERT_SQL, (1, f"v{i}"))
+
+        assert queue.has_pending()
+        assert manager.execute("SELECT COUNT(*) FROM eventos").fetchone()[0] == 0
+
+        assert queue.flush(timeout=5)
+        assert not queue.has_pending()
+        rows = manager.execute("SELECT valor FROM eventos ORDER BY id").fetchall()
+        assert rows == [('v0',), ('v1',), ('v2',)]
+
+    @pytest.mark.unit
+    def test_borrado_descarta_pendientes(self, manager, queue):
+        """
+        TST42: Un borrado reemplaza las escrituras pendientes del medicamento
+        Datos de entrada: Inserciones de dos medicamentos y borrado del primero
+        Resultado esperado: Solo se escriben las del segundo medicamento
+        """
+        queue.submit(1, INSERT_SQL, (1, "a"))
+        queue.submit(2, INSERT_SQL, (2, "b"))
+        queue.submit_delete(1, "DELETE FROM eventos WHERE med_id=?", (1,))
+        queue.flush(timeout=5)
+
+        rows = manager.execute("SELECT med_id, valor FROM eventos").fetchall()
+        assert rows == [(2, 'b')]
+
+    @pytest.mark.unit
+    def test_error_no_descarta_el_lote(self, manager, queue):
+        """
+        TST43: Una escritura inválida no revierte el resto del lote
+        Datos de entrada: Valor duplicado (viola UNIQUE) y otro medicamento válido
+        Resultado esperado: Se confirma la escritura válida
+        """
+        queue.submit(1, INSERT_SQL, (1, "x"))
+        queue.flush(timeout=5)
+        queue.submit(1, INSERT_SQL, (1, "x"))
+        queue.submit(2, INSERT_SQL, (2, "y"))
+        queue.flush(timeout=5)
+
+        rows = manager.execute("SELECT valor FROM eventos ORDER BY id").fetchall()
+        assert rows == [('x',), ('y',)]
+
+    @pytest.mark.unit
+    def test_stop_confirma_y_detiene(self, manager, queue):
+        """
+        TST44: Detener la cola escribe todo lo pendiente
+        Datos de entrada: Inserción encolada y stop()
+        Resultado esperado: Inserción confirmada y sin hilo escritor
+        """
+        queue.submit(1, INSERT_SQL, (1, "z"))
+        queue.stop()
+
+        assert manager.execute("SELECT COUNT(*) FROM eventos").fetchone()[0] == 1
+        assert not queue.has_pending()
+
+    @pytest.mark.integration
+    def test_base_bloqueada_reintenta(self, temp_db):
+        """
+        TST91: Escritura encolada mientras otra conexión retiene la base
+        Datos de entrada: Transacción de escritura abierta en otra conexión
+                          (como una importación), una inserción encolada y
+                          flush() antes y después de liberarla
+        Resultado esperado: El primer flush devuelve False sin perder la
+                            inserción; el segundo la confirma
+        """
+        manager = ConnectionManager(temp_db, pragmas=(("journal_mode", "WAL"), ("busy_timeout", "0")))
+        with manager.transaction() as cur:
+            cur.execute("CREATE TABLE eventos (id INTEGER PRIMARY KEY, med_id INTEGER, valor TEXT)")
+        queue = WriteBehindQueue(lambda: manager, flush_interval=60, retry_delay=0.05)
+
+        other = sqlite3.connect(temp_db, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        try:
+            queue.submit(1, INSERT_SQL, (1, "v"))
+            assert not queue.flush(timeout=5)
+            assert queue.has_pending()
+        finally:
+            other.execute("ROLLBACK")
+            other.close()
+
+        assert queue.flush(timeout=5)
+        assert not queue.has_pending()
+        assert manager.execute("SELECT valor FROM eventos").fetchall() == [('v',)]
+        queue.stop()
+        manager.close_all()
@@ -0,0 +1,98 @@
+"""
+TST62-TST64: Tests para las estadísticas de cumplimiento
+Verifican las métricas calculadas sobre el historial de dosis
+"""
+import pytest
+from datetime import datetime, timedelta
+
+pytest.importorskip("numpy")
+
+from core import analytics, viewmodel
+
+
+def record(repository, med, events, start=datetime(2025, 10, 23, 8, 0)):
+    """Registra (evento, minutos de demora) para dosis consecutivas cada 8 h"""
+    for i, (event, delay) in enumerate(events):
+        scheduled = start + timedelta(hours=8 * i)
+        repository.record_dose_event(med, event, f"{scheduled:%H:%M}",
+                                     when=scheduled + timedelta(minutes=delay))
+    repository.flush()
+
+
+class TestEstadisticas:
+    """Casos de prueba para las estadísticas de cumplimiento"""
+
+    @pytest.mark.integration
+    def test_metricas_de_un_medicamento(self, repository, sample_medicine):
+        """
+        TST62: Métricas de un tratamiento con demoras, posposiciones y omisiones
+        Datos de entrada: 6 dosis cada 8 h: a tiempo, tarde (50 min), pospuesta,
+                          a tiempo (10 min), omitida y a tiempo
+        Resultado esperado: 4 de 6 tomadas, 3 puntuales, retraso medio 16.25 min,
+                            1 pospuesta, 1 omitida, mejor racha 1 y racha actual 1
+        """
+        sample_medicine['start_date'] = '2025-10-23'
+        sample_medicine['id'] = repository.insert_medicine(sample_medicine)
+        record(repository, sample_medicine,
+               [('taken', 5), ('taken', 50), ('snoozed', 5), ('taken', 10), ('missed', 0), ('taken', 0)])
+
+        report = analytics.adherence_report(repository.db, repository.load_medicines(),
+                                            now=datetime(2025, 10, 25, 0, 0), days=None)
+        stats = report['medicamentos'][0]
+        assert (stats['expected'], stats['taken'], stats['on_time']) == (6, 4, 3)
+        assert (stats['snoozed'], stats['missed']) == (1, 1)
+        assert stats['adherence'] == pytest.approx(4 / 6)
+        assert stats['on_time_rate'] == pytest.approx(0.5)
+        assert stats['mean_delay'] == pytest.approx(16.25)
+        assert (stats['best_streak'], stats['current_streak']) == (1, 1)
+        assert report['total']['taken'] == 4
+
+    @pytest.mark.integration
+    def test_rachas_por_medicamento(self, repository, sample_medicine):
+        """
+        TST63: Las rachas no se mezclan entre medicamentos
+        Datos de entrada: A con 3 puntuales, 1 tardía y 2 puntuales; B con 1 omitida
+                          y 2 puntuales; eventos de un medicamento que no se consulta
+        Resultado esperado: A mejor racha 3 y actual 2; B mejor 2 y actual 2;
+                            el tercer medicamento no cuenta en el total
+        """
+        sample_medicine['start_date'] = '2025-10-23'
+        meds = []
+        for name in ('A', 'B', 'C'):
+            med = dict(sample_medicine, name=name)
+            med['id'] = repository.insert_medicine(med)
+            meds.append(med)
+        record(repository, meds[0], [('taken', 0)] * 3 + [('taken', 45)] + [('taken', 0)] * 2)
+        record(repository, meds[1], [('missed', 0), ('taken', 0), ('taken', 0)])
+        record(repository, meds[2], [('taken', 0)] * 5)
+
+        loaded = {med['name']: med for med in repository.load_medicines()}
+        report = analytics.adherence_report(repository.db, [loaded['B'], loaded['A']],
+                                            now=datetime(2025, 10, 26, 0, 0), days=None)
+        b, a = report['medicamentos']
+        assert (a['name'], a['best_streak'], a['current_streak']) == ('A', 3, 2)
+        assert (b['name'], b['best_streak'], b['current_streak']) == ('B', 2, 2)
+        assert report['total']['taken'] == 8
+        assert report['total']['best_streak'] == 3
+
+    @pytest.mark.integration
+    def test_periodo_sin_eventos(self, repository, sample_medicine):
+        """
+        TST64: Período sin dosis registradas
+        Datos de entrada: Dosis tomadas el 23/10; estadísticas de los últimos 7 días al 10/11
+        Resultado esperado: Sin tomas ni dosis previstas, adherencia 0 y textos sin retraso
+        """
+        sample_medicine['start_date'] = '2025-10-23'
+        sample_medicine['id'] = repository.insert_medicine(sample_medicine)
+        record(repository, sample_medicine, [('taken', 0), ('taken', 0)])
+
+        report = analytics.adherence_report(repository.db, repository.load_medicines(),
+                                            now=datetime(2025, 11, 10, 12, 0), days=7)
+        stats = report['medicamentos'][0]
+        assert (stats['expected'], stats['taken'], stats['adherence']) == (0, 0, 0.0)
+        assert stats['mean_delay'] is None
+
+        assert viewmodel.stats_summary_text(report['total']) == "Sin dosis registradas en este período"
+        row = viewmodel.stats_row_data(stats)
+        assert row['adherence_text'] == "0%"
+        assert "Retraso -" in row['detail_text']
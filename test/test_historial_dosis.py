@@ -0,0 +1,108 @@
+"""
+TST36-TST40: Tests para el historial de dosis (dose_events)
+Verifican el registro de eventos y los contadores derivados
+"""
+import pytest
+import sqlite3
+
+from core.repository import MedicineRepository
+
+
+class TestHistorialDosis:
+    """Casos de prueba para el historial de dosis"""
+
+    @pytest.mark.integration
+    def test_dosis_tomada_actualiza_contadores(self, repository, sample_medicine):
+        """
+        TST36: Registrar una dosis tomada
+        Datos de entrada: Evento 'taken' para un medicamento nuevo
+        Resultado esperado: Evento en el historial y taken_doses=1 en la BD
+        """
+        sample_medicine['id'] = repository.insert_medicine(sample_medicine)
+        repository.record_dose_event(sample_medicine, 'taken', '08:00')
+
+        history = repository.get_dose_history(sample_medicine['id'])
+        assert [h['event'] for h in history] == ['taken']
+
+        med = repository.load_medicines()[0]
+        assert med['taken_doses'] == 1
+        assert med['completed'] == False
+        assert med['last_notification_time'] == '08:00'
+
+    @pytest.mark.integration
+    def test_dosis_pospuesta_actualiza_alerta(self, repository, sample_medicine):
+        """
+        TST37: Posponer una dosis
+        Datos de entrada: Evento 'snoozed' con nueva hora 08:05
+        Resultado esperado: current_alert_time='08:05' y taken_doses sin cambios
+        """
+        sample_medicine['id'] = repository.insert_medicine(sample_medicine)
+        repository.record_dose_event(sample_medicine, 'snoozed', '08:00', next_alert_time='08:05')
+
+        med = repository.load_medicines()[0]
+        assert med['current_alert_time'] == '08:05'
+        assert med['taken_doses'] == 0
+
+    @pytest.mark.integration
+    def test_completar_tratamiento(self, repository, sample_medicine):
+        """
+        TST38: Tomar todas las dosis completa el tratamiento
+        Datos de entrada: 9 eventos 'taken' para un tratamiento de 9 dosis
+        Resultado esperado: completed=True y taken_doses=9
+        """
+        sample_medicine['id'] = repository.insert_medicine(sample_medicine)
+        for _ in range(sample_medicine['total_doses'] + 1):
+            repository.record_dose_event(sample_medicine, 'taken', '08:00')
+
+        med = repository.load_medicines()[0]
+        assert med['taken_doses'] == 9
+        assert med['completed'] == True
+
+    @pytest.mark.integration
+    def test_eliminar_borra_historial(self, repository, sample_medicine):
+        """
+        TST39: Eliminar un medicamento elimina su historial
+        Datos de entrada: Medicamento con un evento, luego eliminado
+        Resultado esperado: Sin eventos para ese medicamento
+        """
+        med_id = repository.insert_medicine(sample_medicine)
+        sample_medicine['id'] = med_id
+        repository.record_dose_event(sample_medicine, 'taken', '08:00')
+        repository.delete_medicine(med_id)
+
+        assert repository.get_dose_history(med_id) == []
+
+    @pytest.mark.integration
+    def test_migracion_siembra_eventos(self, temp_db):
+        """
+        TST40: Migrar una BD sin historial conserva los contadores
+        Datos de entrada: BD con el esquema anterior y taken_doses=3
+        Resultado esperado: 3 eventos semilla y taken_doses sigue en 3
+        """
+        conn = sqlite3.connect(temp_db)
+        conn.execute("""
+            CREATE TABLE medicamentos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, time TEXT NOT NULL,
+                grams TEXT NOT NULL, days INTEGER NOT NULL, hours INTEGER NOT NULL,
+                total_doses INTEGER NOT NULL, taken_doses INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0, start_date TEXT,
+                current_alert_time TEXT, last_notification_time TEXT
+            )
+        """)
+        conn.execute("""
+            INSERT INTO medicamentos (name, time, grams, days, hours, total_doses, taken_doses, start_date, current_alert_time)
+            VALUES ('Ibuprofeno', '10:00', '400', 5, 6, 20, 3, '2025-10-23', '10:00')
+        """)
+        conn.commit()
+        conn.close()
+
+        repo = MedicineRepository(temp_db)
+        repo.init_db()
+        repo.init_db()  # Idempotente: no vuelve a sembrar
+
+        history = repo.get_dose_history(1)
+        assert [h['scheduled_at'] for h in history] == [
+            '2025-10-23 10:00:00', '2025-10-23 16:00:00', '2025-10-23 22:00:00'
+        ]
+        assert repo.load_medicines()[0]['taken_doses'] == 3
+        repo.close()
@@ -0,0 +1,77 @@
+"""
+TST70-TST71: Tests para la instrumentación de rutas críticas
+Verifican el registro de tiempos, el buffer circular y la traza de Chrome
+"""
+import json
+import pytest
+
+from core import perf
+
+
+@pytest.fixture
+def perf_state():
+    """Restaura el estado global de core.perf al terminar"""
+    was_enabled = perf.is_enabled()
+    perf.reset()
+    yield perf
+    perf.reset()
+    if was_enabled:
+        perf.enable()
+    else:
+        perf.disable()
+
+
+class TestInstrumentacion:
+    """Casos de prueba para core.perf"""
+
+    @pytest.mark.unit
+    def test_desactivada_no_envuelve(self, perf_state):
+        """
+        TST70: Instrumentación desactivada
+        Datos de entrada: Función decorada y bloque medido con SONNAR_PERF apagado
+        Resultado esperado: Se devuelve la misma función y no se registra nada
+        """
+        perf.disable()
+
+        def sumar(a, b):
+            return a + b
+
+        assert perf.instrument()(sumar) is sumar
+        with perf.span("bloque"):
+            sumar(1, 2)
+        assert perf.summary() == []
+        assert perf.trace_events() == []
+
+    @pytest.mark.unit
+    def test_registro_y_traza(self, perf_state, tmp_path):
+        """
+        TST71: Instrumentación activa
+        Datos de entrada: 3 llamadas a una función decorada, un bloque medido y
+                          RING_SIZE + 5 mediciones adicionales
+        Resultado esperado: Conteos por nombre, buffer acotado a RING_SIZE y
+                            una traza JSON con eventos completos ('X')
+        """
+        perf.enable()
+
+        @perf.instrument("sumar")
+        def sumar(a, b):
+            return a + b
+
+        assert [sumar(1, i) for i in range(3)] == [1, 2, 3]
+        with perf.span("bloque"):
+            pass
+
+        calls = {row['name']: row['calls'] for row in perf.summary()}
+        assert calls == {'sumar': 3, 'bloque': 1}
+        assert "sumar" in perf.format_summary()
+
+        path = tmp_path / "traza.json"
+        assert perf.dump_trace(str(path)) == 4
+        trace = json.loads(path.read_text(encoding="utf-8"))
+        assert {event['ph'] for event in trace['traceEvents']} == {'X'}
+        assert [event['name'] for event in trace['traceEvents']][:3] == ['sumar'] * 3
+
+        for _ in range(perf.RING_SIZE + 5):
+            perf.record("relleno", 0, 1)
+        assert len(perf.trace_events()) == perf.RING_SIZE
+        assert {row['name']: row['calls'] for row in perf.summary()}['relleno'] == perf.RING_SIZE + 5
@@ -1,9 +1,47 @@
 """
-TST01-TST05: Tests para el módulo de Listar Medicamentos
+TST01-TST07, TST79-TST83, TST94: Tests para el módulo de Listar Medicamentos
 Verifican el correcto listado y visualización de medicamentos
 """
 import pytest
 import sqlite3
+from types import SimpleNamespace
+
+
+class SyncThread:
+    """Reemplazo de threading.Thread que ejecuta el hilo al llamar a start()"""
+
+    def __init__(self, target, args, daemon):
+        self.run = lambda: target(*args)
+
+    def start(self):
+        self.run()
+
+
+class PendingFrames:
+    """Callbacks de Clock.schedule_once pendientes hasta el próximo frame"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def take(self):
+        callbacks, self.callbacks = self.callbacks, []
+        return callbacks
+
+    def run(self):
+        for callback in self.take():
+            callback(0)
+
+
+@pytest.fixture
+def frames(monkeypatch):
+    """Los hilos de carga corren en el acto y lo que entregan queda en frames"""
+    import main
+    pending = PendingFrames()
+    # Solo los hilos que crea main: el escritor de la BD sigue en su propio hilo
+    monkeypatch.setattr(main, 'threading', SimpleNamespace(Thread=SyncThread))
+    monkeypatch.setattr(main.Clock, 'schedule_once',
+                        lambda callback, timeout=0: pending.callbacks.append(callback))
+    return pending
 
 
 class TestListarMedicamentos:
@@ -133,3 +171,164 @@ class TestListarMedicamentos:
         assert len(no_completados) == 2
         assert len(app_instance.medicines) == 3
 
+
+    @pytest.mark.functional
+    def test_refrescos_agrupados_por_frame(self, app_instance, multiple_medicines, monkeypatch):
+        """
+        TST79: Varios pedidos de refresco en el mismo frame
+        Datos de entrada: Tres tarjetas marcadas ("tomar todos") y luego
+                          esas tarjetas más una recarga completa (importación)
+        Resultado esperado: Sin dibujar hasta el frame; primero solo las tres
+                            tarjetas y después una única reconstrucción
+        """
+        for med in multiple_medicines:
+            app_instance.insert_medicine_db(med)
+        app_instance.load_medicines_from_db()
+        ids = [med['id'] for med in app_instance.medicines]
+        app_instance._card_index = {med_id: i for i, med_id in enumerate(ids)}
+
+        calls = []
+        monkeypatch.setattr(app_instance, 'update_meds_list', lambda: calls.append('lista'))
+        monkeypatch.setattr(app_instance, 'refresh_medication_card',
+                            lambda med: calls.append(med['id']))
+
+        app_instance.request_meds_render(ids)
+        assert calls == []
+        app_instance.render_meds_list()
+        assert sorted(calls) == sorted(ids)
+
+        calls.clear()
+        app_instance.request_meds_render(ids[:1])
+        app_instance.request_meds_render()
+        app_instance.request_meds_render(ids[1:])
+        app_instance.render_meds_list()
+        app_instance.render_meds_list()
+        assert calls == ['lista']
+
+    @pytest.mark.integration
+    def test_lectura_por_tandas(self, repository, sample_medicine):
+        """
+        TST80: Leer los medicamentos por tandas
+        Datos de entrada: 5 medicamentos, tandas de 2 con una primera de 1
+        Resultado esperado: Tandas de 1, 2 y 2 en el mismo orden que load_medicines
+        """
+        for hour in range(5):
+            repository.insert_medicine(dict(sample_medicine, time=f"{hour:02d}:00"))
+
+        chunks = list(repository.iter_medicines(chunk_size=2, first_chunk=1))
+        assert [len(chunk) for chunk in chunks] == [1, 2, 2]
+        assert [med['id'] for chunk in chunks for med in chunk] == \
+            [med['id'] for med in repository.load_medicines()]
+
+    @pytest.mark.functional
+    def test_carga_en_segundo_plano(self, app_instance, sample_medicine, frames):
+        """
+        TST81: Carga progresiva de la lista al iniciar
+        Datos de entrada: 25 medicamentos leídos con FIRST_SCREEN_MEDS=10
+        Resultado esperado: La pantalla principal se muestra con los 10 más
+                            recientes antes de agregar el resto; al terminar
+                            están los 25 y los avisos armados
+        """
+        for i in range(25):
+            app_instance.insert_medicine_db(dict(sample_medicine, name=f"Med {i}",
+                                                 start_date='2999-01-01'))
+        shown = []
+
+        app_instance.load_medicines_async(
+            app_instance.get_repository(),
+            on_first=lambda: shown.append([med['name'] for med in app_instance.medicines]))
+        pending = frames.take()
+
+        pending.pop(0)(0)
+        assert shown == [[f"Med {i}" for i in range(24, 14, -1)]]
+        assert app_instance._loading
+
+        for callback in pending:
+            callback(0)
+        assert len(app_instance.medicines) == 25
+        assert not app_instance._loading
+        assert len(app_instance.reminders) == 25
+
+    @pytest.mark.integration
+    def test_paginas_por_keyset(self, repository, sample_medicine):
+        """
+        TST82: Páginas de activos y completados por keyset
+        Datos de entrada: 5 medicamentos, los 3 primeros completados;
+                          páginas de 2 desde el id de la última mostrada
+        Resultado esperado: Completados 3 (páginas de 2 y 1) y activos 2;
+                            las páginas usan idx_meds_completed_id
+        """
+        ids = []
+        for hour in range(5):
+            ids.append(repository.insert_medicine(dict(sample_medicine, time=f"{hour:02d}:00",
+                                                       completed=hour < 3)))
+
+        first = repository.load_medicines_page(limit=2, completed=True)
+        rest = repository.load_medicines_page(first[-1]['id'], limit=2, completed=True)
+        assert [med['id'] for med in first + rest] == ids[2::-1]
+        assert [med['id'] for med in repository.load_medicines(completed=False)] == ids[:2:-1]
+        assert repository.count_medicines(completed=True) == 3
+
+        plan = repository.db.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM medicamentos WHERE completed = 1 AND id < ? "
+            "ORDER BY id DESC LIMIT 2", (ids[-1],)).fetchall()
+        assert 'idx_meds_completed_id' in plan[0][-1]
+
+    @pytest.mark.functional
+    def test_seccion_completados(self, app_instance, sample_medicine, frames):
+        """
+        TST83: Sección de tratamientos completados
+        Datos de entrada: 1 activo y 25 completados; se abre la sección y se
+                          pide la página siguiente con ARCHIVE_PAGE_SIZE=20
+        Resultado esperado: Solo el activo en memoria al cargar; 20 y luego
+                            25 completados con la sección abierta; ninguno al cerrarla
+        """
+        for i in range(26):
+            app_instance.insert_medicine_db(dict(sample_medicine, name=f"Med {i}", taken_doses=9,
+                                                 completed=i < 25, start_date='2999-01-01'))
+        app_instance.load_medicines_async(app_instance.get_repository())
+        frames.run()
+        assert [med['name'] for med in app_instance.medicines] == ["Med 25"]
+        assert app_instance._archive_total == 25
+
+        app_instance.toggle_archive()
+        frames.run()
+        assert len(app_instance.archived) == 20
+        app_instance.load_archive_page()
+        frames.run()
+        assert [med['name'] for med in app_instance.archived] == [f"Med {i}" for i in range(24, -1, -1)]
+        assert app_instance.find_medicine(app_instance.archived[-1]['id']) is app_instance.archived[-1]
+
+        app_instance.toggle_archive()
+        assert app_instance.archived == []
+
+    @pytest.mark.functional
+    def test_tratamiento_completado_en_la_sesion(self, app_instance, sample_medicine, frames):
+        """
+        TST94: Un tratamiento que se completa con la app abierta
+        Datos de entrada: 2 completados y 1 activo con 8/9 dosis; sección de
+                          completados abierta; se toma la última dosis desde
+                          el aviso
+        Resultado esperado: Sale de los activos, aparece primero en la sección
+                            y el encabezado cuenta 3, igual que la BD
+        """
+        from datetime import datetime
+        from core.scheduler import Reminder
+
+        for i in range(3):
+            app_instance.insert_medicine_db(dict(sample_medicine, name=f"Med {i}", taken_doses=8 + (i < 2),
+                                                 completed=i < 2, start_date='2999-01-01'))
+        app_instance.load_medicines_async(app_instance.get_repository())
+        frames.run()
+        app_instance.toggle_archive()
+        frames.run()
+        med = app_instance.medicines[0]
+        assert app_instance._archive_total == 2
+
+        app_instance.notifications.push(Reminder(med['id'], '08:00', datetime(2999, 1, 3, 16, 0), False))
+        app_instance.take_reminder(med['id'])
+
+        assert app_instance.medicines == []
+        assert [m['name'] for m in app_instance.archived] == ["Med 2", "Med 1", "Med 0"]
+        assert app_instance._archive_total == 3
+        assert app_instance.get_repository().count_medicines(completed=True) == 3
@@ -0,0 +1,185 @@
+"""
+TST84-TST86: Tests para el versionado del esquema (core.migrations)
+Verifican que las bases nuevas y las creadas antes del versionado queden
+en la última versión sin perder ni duplicar datos
+"""
+import pytest
+import sqlite3
+
+from core import migrations
+from core.database import ConnectionManager
+from core.repository import MedicineRepository
+
+
+# Esquema del init_db original (antes del historial y del versionado).
+# Se copia literal: no debe cambiar aunque cambien los pasos de core.migrations
+LEGACY_MEDICINES_SQL = """
+CREATE TABLE IF NOT EXISTS medicamentos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    time TEXT NOT NULL,
+    grams TEXT NOT NULL,
+    days INTEGER NOT NULL,
+    hours INTEGER NOT NULL,
+    total_doses INTEGER NOT NULL,
+    taken_doses INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    start_date TEXT,
+    current_alert_time TEXT,
+    last_notification_time TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_meds_name_time
+ON medicamentos(name, time);
+"""
+
+# Historial de dosis y triggers tal como los creaba init_db antes del versionado
+LEGACY_DOSE_EVENTS_SQL = """
+CREATE TABLE IF NOT EXISTS dose_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    med_id INTEGER NOT NULL REFERENCES medicamentos(id) ON DELETE CASCADE,
+    event TEXT NOT NULL CHECK (event IN ('taken', 'snoozed', 'missed')),
+    alert_time TEXT NOT NULL,
+    scheduled_at TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    next_alert_time TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_dose_events_med_time
+ON dose_events(med_id, recorded_at);
+CREATE TRIGGER IF NOT EXISTS trg_dose_taken
+AFTER INSERT ON dose_events WHEN NEW.event = 'taken'
+BEGIN
+    UPDATE medicamentos
+    SET taken_doses = MIN(taken_doses + 1, total_doses),
+        completed = CASE WHEN taken_doses + 1 >= total_doses THEN 1 ELSE 0 END,
+        last_notification_time = NEW.alert_time,
+        current_alert_time = time
+    WHERE id = NEW.med_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_dose_snoozed
+AFTER INSERT ON dose_events WHEN NEW.event = 'snoozed'
+BEGIN
+    UPDATE medicamentos
+    SET last_notification_time = NEW.alert_time,
+        current_alert_time = NEW.next_alert_time
+    WHERE id = NEW.med_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_dose_missed
+AFTER INSERT ON dose_events WHEN NEW.event = 'missed'
+BEGIN
+    UPDATE medicamentos
+    SET last_notification_time = NEW.alert_time
+    WHERE id = NEW.med_id;
+END;
+"""
+
+
+def legacy_db(path, meds, with_history):
+    """Base con el esquema anterior al versionado (user_version = 0).
+
+    with_history agrega dose_events y sus triggers, como las bases creadas
+    justo antes del versionado; sin él queda la base previa al historial.
+    """
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_MEDICINES_SQL)
+    if with_history:
+        conn.executescript(LEGACY_DOSE_EVENTS_SQL)
+    cur = conn.cursor()
+    for i, taken in enumerate(meds):
+        cur.execute(
+            """
+            INSERT INTO medicamentos (name, time, grams, days, hours, total_doses,
+                                      taken_doses, start_date, current_alert_time)
+            VALUES (?, '08:00', '500', 3, 8, 9, ?, '2025-10-23', '08:00')
+            """,
+            (f"Med {i}", taken),
+        )
+    conn.commit()
+    conn.close()
+
+
+class TestMigraciones:
+    """Casos de prueba para las migraciones del esquema"""
+
+    @pytest.mark.integration
+    def test_base_nueva_en_ultima_version(self, temp_db):
+        """
+        TST84: Crear una base nueva
+        Datos de entrada: Archivo vacío; init_db dos veces
+        Resultado esperado: user_version = LATEST_VERSION con tablas, índices
+                            y triggers; la segunda vez no se aplica ningún paso
+        """
+        repo = MedicineRepository(temp_db)
+        assert repo.init_db() == migrations.LATEST_VERSION
+        assert migrations.schema_version(repo.db) == migrations.LATEST_VERSION
+
+        names = {row[0] for row in repo.db.execute("SELECT name FROM sqlite_master")}
+        assert {'medicamentos', 'dose_events', 'idx_meds_completed_id', 'trg_dose_taken'} <= names
+
+        applied = []
+        steps = tuple(migrations.Migration(m.version, m.description, (applied.append,))
+                      for m in migrations.MIGRATIONS)
+        assert migrations.migrate(repo.db, steps) == migrations.LATEST_VERSION
+        assert applied == []
+        repo.close()
+
+    @pytest.mark.integration
+    def test_actualizar_base_de_hoy(self, temp_db):
+        """
+        TST85: Actualizar una base creada con el esquema de hoy
+        Datos de entrada: Base sin versión con historial y 2 dosis tomadas
+                          registradas como eventos
+        Resultado esperado: Queda en la última versión con idx_meds_completed_id,
+                            sin eventos semilla nuevos y con los triggers activos
+        """
+        legacy_db(temp_db, [0], with_history=True)
+        repo = MedicineRepository(temp_db)
+        for hour in ('08:00', '16:00'):
+            repo.db.execute(
+                "INSERT INTO dose_events (med_id, event, alert_time, scheduled_at, recorded_at) "
+                "VALUES (1, 'taken', ?, '2025-10-23 08:00:00', '2025-10-23 08:00:00')", (hour,))
+
+        assert migrations.legacy_version(repo.db) == 2
+        assert repo.init_db() == migrations.LATEST_VERSION
+
+        names = {row[0] for row in repo.db.execute("SELECT name FROM sqlite_master")}
+        assert 'idx_meds_completed_id' in names
+        assert len(repo.get_dose_history(1)) == 2
+        med = repo.load_medicines()[0]
+        assert med['taken_doses'] == 2
+        repo.record_dose_event(med, 'taken', '08:00')
+        assert repo.load_medicines()[0]['taken_doses'] == 3
+        repo.close()
+
+    @pytest.mark.integration
+    def test_semilla_por_tandas_reanudable(self, temp_db):
+        """
+        TST86: Sembrar el historial por tandas con una interrupción
+        Datos de entrada: Base previa al historial con 5 medicamentos (2 dosis
+                          tomadas cada uno), tandas de 2 y un fallo después de
+                          sembrar; luego init_db normal
+        Resultado esperado: Tras el fallo la versión sigue en 1; al terminar,
+                            2 eventos por medicamento (sin duplicar) y taken_doses=2
+        """
+        legacy_db(temp_db, [2] * 5, with_history=False)
+        db = ConnectionManager(temp_db)
+
+        def falla(cur):
+            raise sqlite3.OperationalError("interrumpida")
+
+        interrupted = (
+            migrations.MIGRATIONS[0],
+            migrations.Migration(2, "Historial", (migrations.create_dose_events,
+                                                  migrations.seed_dose_events, falla)),
+        )
+        with pytest.raises(sqlite3.OperationalError):
+            migrations.migrate(db, interrupted, chunk_size=2)
+        assert migrations.schema_version(db) == 1
+        db.close_all()
+
+        repo = MedicineRepository(temp_db)
+        assert repo.init_db() == migrations.LATEST_VERSION
+        counts = repo.db.execute(
+            "SELECT med_id, COUNT(*) FROM dose_events GROUP BY med_id").fetchall()
+        assert counts == [(med_id, 2) for med_id in range(1, 6)]
+        assert [med['taken_doses'] for med in repo.load_medicines()] == [2] * 5
+        repo.close()
@@ -0,0 +1,63 @@
+"""
+TST50-TST52: Tests para el registro Medication
+Verifican el acceso compatible con diccionario y los campos precalculados
+"""
+import pytest
+import sys
+
+from core.models import Medication
+
+
+class TestModelo:
+    """Casos de prueba para el registro compacto de medicamentos"""
+
+    @pytest.mark.unit
+    def test_acceso_como_diccionario(self, sample_medicine):
+        """
+        TST50: Medication se usa igual que el diccionario original
+        Datos de entrada: sample_medicine convertido con from_dict
+        Resultado esperado: Mismas claves y valores; días/horas como enteros
+        """
+        med = Medication.from_dict(sample_medicine)
+
+        for key in sample_medicine:
+            assert key in med
+        assert med['name'] == 'Paracetamol'
+        assert med['days'] == 3 and med['hours'] == 8
+        assert med.get('id') is None
+        assert med.get('no_existe', 'x') == 'x'
+        with pytest.raises(KeyError):
+            med['no_existe']
+
+        med['nota'] = 'con comida'
+        assert med.to_dict()['nota'] == 'con comida'
+
+    @pytest.mark.unit
+    def test_campos_derivados_se_actualizan(self, sample_medicine):
+        """
+        TST51: Cambiar hora o régimen recalcula los valores cacheados
+        Datos de entrada: Hora 08:00 → 09:30, frecuencia 8 h → 12 h
+        Resultado esperado: start_minutes=570 y dose_count=6
+        """
+        med = Medication.from_dict(sample_medicine)
+        assert med.start_minutes == 480
+        assert med.dose_count == 9
+
+        med['time'] = '09:30'
+        med['hours'] = '12'
+        assert med.start_minutes == 570
+        assert med.dose_count == 6
+
+        med['current_alert_time'] = '09:35'
+        assert med.alert_minutes == 575
+
+    @pytest.mark.unit
+    def test_menor_memoria_que_dict(self, sample_medicine):
+        """
+        TST52: El registro ocupa menos memoria que el diccionario
+        Datos de entrada: Medicamento como dict de 13 claves y como Medication
+        Resultado esperado: sys.getsizeof menor para Medication
+        """
+        as_dict = dict(sample_medicine, id=1, taken=False)
+        med = Medication.from_dict(as_dict)
+        assert sys.getsizeof(med) < sys.getsizeof(as_dict)
@@ -0,0 +1,101 @@
+"""
+TST65-TST67: Tests para los perfiles con base de datos propia
+Verifican el índice de perfiles, el aislamiento de datos y la caché LRU
+"""
+import os
+import pytest
+
+from core.profiles import DEFAULT_DB_FILENAME, DEFAULT_PROFILE_NAME, ProfileStore
+from core.repository import MedicineRepository
+
+
+@pytest.fixture
+def store(tmp_path):
+    profiles = ProfileStore(str(tmp_path), cache_size=2)
+    profiles.init()
+    yield profiles
+    profiles.close()
+
+
+class TestPerfiles:
+    """Casos de prueba para los perfiles de pacientes"""
+
+    @pytest.mark.integration
+    def test_perfil_principal_conserva_bd_existente(self, tmp_path, sample_medicine):
+        """
+        TST65: La BD única anterior pasa a ser el perfil principal
+        Datos de entrada: medicamentos.db con un medicamento, luego se crea el índice dos veces
+        Resultado esperado: Un solo perfil 'Principal' cuya BD contiene el medicamento
+        """
+        legacy = MedicineRepository(str(tmp_path / DEFAULT_DB_FILENAME))
+        legacy.init_db()
+        legacy.insert_medicine(sample_medicine)
+        legacy.close()
+
+        store = ProfileStore(str(tmp_path))
+        store.init()
+        store.init()  # Idempotente
+        profiles = store.list_profiles()
+        assert [p['name'] for p in profiles] == [DEFAULT_PROFILE_NAME]
+        assert store.active_profile()['id'] == profiles[0]['id']
+
+        meds = store.repository(profiles[0]['id']).load_medicines()
+        assert [m['name'] for m in meds] == ['Paracetamol']
+        store.close()
+
+    @pytest.mark.integration
+    def test_perfiles_aislados(self, store, sample_medicine):
+        """
+        TST66: Cada perfil lee solo su propia base de datos
+        Datos de entrada: Perfiles 'Ana' y 'Luis' con un medicamento distinto cada uno;
+                          luego otro perfil 'ana'
+        Resultado esperado: Cada perfil carga solo el suyo, en archivos distintos;
+                            el nombre repetido (sin distinguir mayúsculas) se rechaza
+        """
+        ana = store.create_profile("  Ana ")
+        luis = store.create_profile("Luis")
+        assert ana['name'] == 'Ana'
+        assert store.db_path(ana) != store.db_path(luis)
+
+        for profile, name in ((ana, 'Paracetamol'), (luis, 'Ibuprofeno')):
+            repository = store.repository(profile['id'])
+            repository.init_db()
+            repository.insert_medicine(dict(sample_medicine, name=name))
+
+        assert [m['name'] for m in store.repository(ana['id']).load_medicines()] == ['Paracetamol']
+        assert [m['name'] for m in store.repository(luis['id']).load_medicines()] == ['Ibuprofeno']
+
+        with pytest.raises(ValueError):
+            store.create_profile("ana")
+        with pytest.raises(ValueError):
+            store.create_profile("   ")
+
+    @pytest.mark.integration
+    def test_cache_lru_y_eliminacion(self, store):
+        """
+        TST67: Conexiones abiertas por perfil con desalojo LRU
+        Datos de entrada: Caché de 2, se usan los perfiles principal, A, principal y B;
+                          luego se elimina A
+        Resultado esperado: Se desaloja A (el menos usado), el repositorio en caché se
+                            reutiliza, el último marcado es el activo y A pierde su archivo
+        """
+        main_id = store.active_profile()['id']
+        a = store.create_profile("A")
+        b = store.create_profile("B")
+
+        main_repository = store.repository(main_id)
+        store.repository(a['id']).init_db()
+        assert store.repository(main_id) is main_repository
+        store.repository(b['id'])
+        assert store.cached_profiles() == [main_id, b['id']]
+
+        store.touch(b['id'])
+        assert store.active_profile()['id'] == b['id']
+
+        store.delete_profile(a['id'])
+        assert not os.path.exists(store.db_path(a))
+        assert [p['name'] for p in store.list_profiles()] == ['B', DEFAULT_PROFILE_NAME]
+
+        store.delete_profile(b['id'])
+        with pytest.raises(ValueError):
+            store.delete_profile(main_id)
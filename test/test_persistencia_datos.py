@@ -1,5 +1,5 @@
 """
-TST18-TST25: Tests para el módulo de Persistencia de Datos
+TST18-TST29, TST88: Tests para el módulo de Persistencia de Datos
 Verifican el correcto guardado y recuperación de datos en SQLite
 """
 import pytest
@@ -248,3 +248,62 @@ class TestPersistenciaDatos:
         app_instance.load_medicines_from_db()
         assert len(app_instance.medicines) >= 2
 
+
+    @pytest.mark.unit
+    def test_conexion_persistente_reutilizada(self, app_instance):
+        """
+        TST28: Verificar que las operaciones reutilizan la misma conexión
+        Datos de entrada: Varias llamadas a get_db().connection()
+        Resultado esperado: Misma conexión en el mismo hilo, en modo WAL
+        """
+        conn1 = app_instance.get_db().connection()
+        app_instance.load_medicines_from_db()
+        conn2 = app_instance.get_db().connection()
+
+        assert conn1 is conn2
+        mode = conn1.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == 'wal'
+
+    @pytest.mark.integration
+    def test_cambio_ruta_bd_reabre_conexion(self, app_instance, sample_medicine, tmp_path):
+        """
+        TST29: Verificar que cambiar db_path abre una conexión a la nueva BD
+        Datos de entrada: Medicamento en la BD original, luego nueva ruta
+        Resultado esperado: La nueva BD está vacía y la original conserva el dato
+        """
+        original_path = app_instance.get_db_path()
+        app_instance.insert_medicine_db(sample_medicine)
+
+        app_instance.db_path = str(tmp_path / 'otra.db')
+        app_instance.init_db()
+        app_instance.load_medicines_from_db()
+        assert app_instance.medicines == []
+
+        app_instance.db_path = original_path
+        app_instance.load_medicines_from_db()
+        assert len(app_instance.medicines) == 1
+
+    @pytest.mark.integration
+    def test_hilos_liberan_su_conexion(self, repository, sample_medicine):
+        """
+        TST88: Lecturas desde hilos de corta vida
+        Datos de entrada: 20 páginas de completados, cada una en un hilo
+                          nuevo que llama a release() al terminar
+        Resultado esperado: Ninguna conexión de esos hilos queda abierta
+        """
+        import threading
+
+        repository.insert_medicine(dict(sample_medicine, completed=True))
+        opened = len(repository.db._connections)
+
+        def read_page():
+            try:
+                assert len(repository.load_medicines_page(completed=True)) == 1
+            finally:
+                repository.release()
+
+        for _ in range(20):
+            thread = threading.Thread(target=read_page)
+            thread.start()
+            thread.join()
+        assert len(repository.db._connections) == opened
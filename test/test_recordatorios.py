@@ -0,0 +1,278 @@
+"""
+TST30-TST35, TST61, TST75-TST76, TST89, TST93, TST95: Tests para el planificador de recordatorios
+Verifican la cola de prioridad de avisos, el cálculo de la próxima hora y
+el diálogo que agrupa los avisos que vencen juntos
+"""
+import pytest
+from datetime import datetime, timedelta
+
+from core import viewmodel
+from core.scheduler import (
+    NotificationQueue, Reminder, ReminderScheduler, drain_due, next_alert_datetime,
+    next_reminder_datetime,
+)
+
+
+class TestRecordatorios:
+    """Casos de prueba para el planificador de recordatorios"""
+
+    @pytest.mark.unit
+    def test_proximo_aviso_hoy(self):
+        """
+        TST30: Hora de aviso posterior a la hora actual
+        Datos de entrada: now=07:30, aviso='08:00'
+        Resultado esperado: Aviso hoy a las 08:00
+        """
+        now = datetime(2025, 10, 23, 7, 30, 15)
+        assert next_alert_datetime('08:00', now) == datetime(2025, 10, 23, 8, 0)
+
+    @pytest.mark.unit
+    def test_proximo_aviso_manana(self):
+        """
+        TST31: Hora de aviso ya pasada o ya notificada
+        Datos de entrada: now=08:00:30, aviso='07:00' y aviso='08:00' ya notificado
+        Resultado esperado: Aviso al día siguiente
+        """
+        now = datetime(2025, 10, 23, 8, 0, 30)
+        assert next_alert_datetime('07:00', now) == datetime(2025, 10, 24, 7, 0)
+        assert next_alert_datetime('08:00', now) == datetime(2025, 10, 23, 8, 0)
+        assert next_alert_datetime('08:00', now, last_notified='08:00') == datetime(2025, 10, 24, 8, 0)
+
+    @pytest.mark.unit
+    def test_orden_de_avisos(self):
+        """
+        TST32: Los avisos vencidos salen en orden cronológico
+        Datos de entrada: Tres medicamentos con horas distintas
+        Resultado esperado: pop_due devuelve solo los vencidos, en orden
+        """
+        base = datetime(2025, 10, 23, 8, 0)
+        scheduler = ReminderScheduler()
+        scheduler.schedule(1, base + timedelta(minutes=10))
+        scheduler.schedule(2, base)
+        scheduler.schedule(3, base + timedelta(hours=2))
+
+        assert scheduler.peek() == base
+        assert scheduler.pop_due(base + timedelta(minutes=30)) == [2, 1]
+        assert len(scheduler) == 1
+        assert scheduler.peek() == base + timedelta(hours=2)
+
+    @pytest.mark.unit
+    def test_reprogramar_reemplaza_aviso(self):
+        """
+        TST33: Reprogramar un medicamento invalida su aviso anterior
+        Datos de entrada: Medicamento programado a las 08:00 y luego a las 08:05
+        Resultado esperado: Solo existe el aviso de las 08:05
+        """
+        base = datetime(2025, 10, 23, 8, 0)
+        scheduler = ReminderScheduler()
+        scheduler.schedule(1, base)
+        scheduler.schedule(1, base + timedelta(minutes=5))
+
+        assert scheduler.pop_due(base) == []
+        assert scheduler.fire_time(1) == base + timedelta(minutes=5)
+        assert scheduler.pop_due(base + timedelta(minutes=5)) == [1]
+        assert scheduler.peek() is None
+
+    @pytest.mark.unit
+    def test_cancelar_aviso(self):
+        """
+        TST34: Cancelar el aviso de un medicamento eliminado
+        Datos de entrada: Dos medicamentos, uno cancelado
+        Resultado esperado: Solo vence el que sigue programado
+        """
+        base = datetime(2025, 10, 23, 8, 0)
+        scheduler = ReminderScheduler()
+        scheduler.schedule(1, base)
+        scheduler.schedule(2, base + timedelta(minutes=1))
+        scheduler.cancel(1)
+
+        assert 1 not in scheduler
+        assert scheduler.peek() == base + timedelta(minutes=1)
+        assert scheduler.pop_due(base + timedelta(hours=1)) == [2]
+
+    @pytest.mark.unit
+    def test_limite_de_avisos_vencidos(self):
+        """
+        TST35: Extraer un solo aviso aunque haya varios vencidos
+        Datos de entrada: Dos avisos vencidos, limit=1
+        Resultado esperado: Sale uno y el otro queda en la cola
+        """
+        base = datetime(2025, 10, 23, 8, 0)
+        scheduler = ReminderScheduler()
+        scheduler.schedule(1, base)
+        scheduler.schedule(2, base)
+
+        assert scheduler.pop_due(base, limit=1) == [1]
+        assert scheduler.pop_due(base) == [2]
+
+    @pytest.mark.unit
+    def test_aviso_segun_horario_de_dosis(self, sample_medicine):
+        """
+        TST61: El aviso sigue el horario del tratamiento
+        Datos de entrada: Inicio 23/10 08:00 cada 8 h, 1 dosis tomada; luego avisada y pospuesta
+        Resultado esperado: 16:00; tras avisar, 00:00 del día siguiente; pospuesta, 16:35
+        """
+        sample_medicine['start_date'] = '2025-10-23'
+        sample_medicine['taken_doses'] = 1
+        now = datetime(2025, 10, 23, 16, 30)
+
+        due = next_reminder_datetime(sample_medicine, now)
+        assert due == datetime(2025, 10, 23, 16, 0)
+        assert next_reminder_datetime(sample_medicine, now, notified=due) == datetime(2025, 10, 24, 0, 0)
+
+        sample_medicine['current_alert_time'] = '16:35'
+        assert next_reminder_datetime(sample_medicine, now) == datetime(2025, 10, 23, 16, 35)
+
+        sample_medicine['current_alert_time'] = '08:00'
+        sample_medicine['taken_doses'] = 9
+        assert next_reminder_datetime(sample_medicine, now) is None
+
+    @pytest.mark.unit
+    def test_avisos_agrupados(self, sample_medicine):
+        """
+        TST75: Avisos que vencen juntos en un solo diálogo
+        Datos de entrada: Tres avisos a las 08:00 extraídos de la cola con
+                          una ventana de 60 s; uno vuelve a vencer y otro se responde
+        Resultado esperado: Los tres en el orden en que vencieron, sin
+                            duplicados; el respondido sale de la cola
+        """
+        scheduler = ReminderScheduler()
+        at = datetime(2025, 10, 23, 8, 0)
+        for med_id in (1, 2, 3):
+            scheduler.schedule(med_id, at)
+        now = at - timedelta(seconds=30)
+        due = scheduler.pop_due(now + timedelta(seconds=60))
+        assert due == [1, 2, 3]
+
+        queue = NotificationQueue()
+        for med_id in due:
+            assert queue.push(Reminder(med_id, '08:00', at, False))
+        assert not queue.push(Reminder(2, '08:05', None, True))
+        assert [r.med_id for r in queue] == [1, 2, 3]
+
+        assert queue.pop(1).alert_time == '08:00'
+        assert 1 not in queue and len(queue) == 2
+        assert viewmodel.reminder_headline(len(queue)) == '¡Es hora de 2 medicamentos!'
+        med = dict(sample_medicine, taken_doses=2)
+        assert viewmodel.reminder_row_text(med, queue.pop(2)) == \
+            'Paracetamol (500mg)\nDosis 3/9 · 08:05 (Retrasado)'
+        assert [r.med_id for r in queue.drain()] == [3] and len(queue) == 0
+
+    @pytest.mark.integration
+    def test_tomar_todos_en_una_transaccion(self, repository, sample_medicine, monkeypatch):
+        """
+        TST76: "Tomar todos" y posponer en un único lote
+        Datos de entrada: Dos medicamentos tomados y uno pospuesto a las 08:05
+        Resultado esperado: Un solo commit del escritor con los tres eventos
+                            y los contadores actualizados
+        """
+        meds = []
+        for name in ('Paracetamol', 'Ibuprofeno', 'Amoxicilina'):
+            med = dict(sample_medicine, name=name)
+            med['id'] = repository.insert_medicine(med)
+            meds.append(med)
+        repository.flush()
+
+        commits = []
+        commit = repository.writer._commit
+
+        def counted_commit(batch, target):
+            commits.append(batch)
+            commit(batch, target)
+
+        monkeypatch.setattr(repository.writer, '_commit', counted_commit)
+        repository.record_dose_batch([
+            (meds[0], 'taken', '08:00', None, None),
+            (meds[1], 'taken', '08:00', None, None),
+            (meds[2], 'snoozed', '08:00', '08:05', None),
+        ])
+        repository.flush()
+
+        assert len(commits) == 1
+        loaded = {m['name']: m for m in repository.load_medicines()}
+        assert [loaded[m['name']]['taken_doses'] for m in meds] == [1, 1, 0]
+        assert loaded['Amoxicilina']['current_alert_time'] == '08:05'
+
+    @pytest.mark.functional
+    def test_horario_original_en_el_historial(self, app_instance, sample_medicine):
+        """
+        TST89: La dosis respondida tarde conserva su horario
+        Datos de entrada: Dosis de las 23:00 del 16/10 pospuesta y después
+                          tomada desde el aviso pospuesto de las 23:05
+        Resultado esperado: Los dos eventos con scheduled_at 16/10 23:00 y
+                            el aviso pospuesto apunta a la misma dosis
+        """
+        med = dict(sample_medicine, time='23:00', current_alert_time='23:00',
+                   start_date='2025-10-16')
+        med['id'] = app_instance.insert_medicine_db(med)
+        app_instance.load_medicines_from_db()
+        med = app_instance.medicines[0]
+        slot = datetime(2025, 10, 16, 23, 0)
+
+        app_instance.notifications.push(Reminder(med['id'], '23:00', slot, False))
+        app_instance.snooze_reminder(med['id'])
+        reminder = app_instance.make_reminder(med)
+        assert reminder == Reminder(med['id'], '23:05', slot, True)
+
+        app_instance.notifications.push(reminder)
+        app_instance.take_reminder(med['id'])
+        history = app_instance.get_dose_history(med['id'])
+        assert [(h['event'], h['alert_time'], h['scheduled_at']) for h in history] == [
+            ('snoozed', '23:00', '2025-10-16 23:00:00'),
+            ('taken', '23:05', '2025-10-16 23:00:00'),
+        ]
+
+    @pytest.mark.unit
+    def test_vaciar_avisos_de_la_ventana(self, sample_medicine):
+        """
+        TST93: Pasar a la cola de avisos todo lo que vence en la ventana
+        Datos de entrada: Dos medicamentos con dosis a las 08:00 y uno a las
+                          09:00, revisados a las 07:59:30
+        Resultado esperado: Se avisan los dos de las 08:00, quedan como
+                            avisados y reprogramados a las 16:00; el de las
+                            09:00 sigue en la cola
+        """
+        meds = {
+            1: dict(sample_medicine, id=1, start_date='2025-10-23'),
+            2: dict(sample_medicine, id=2, name='Ibuprofeno', start_date='2025-10-23'),
+            3: dict(sample_medicine, id=3, time='09:00', current_alert_time='09:00',
+                    start_date='2025-10-23'),
+        }
+        now = datetime(2025, 10, 23, 7, 59, 30)
+        scheduler = ReminderScheduler()
+        for med in meds.values():
+            scheduler.schedule(med['id'], next_reminder_datetime(med, now))
+        queue, notified = NotificationQueue(), {}
+
+        assert drain_due(scheduler, queue, meds.get, now, notified, {}) == 2
+        at = datetime(2025, 10, 23, 8, 0)
+        assert list(queue) == [Reminder(1, '08:00', at, False), Reminder(2, '08:00', at, False)]
+        assert notified == {1: at, 2: at}
+        assert scheduler.fire_time(1) == datetime(2025, 10, 23, 16, 0)
+        assert scheduler.peek() == datetime(2025, 10, 23, 9, 0)
+
+    @pytest.mark.unit
+    def test_aviso_pospuesto_sin_respuesta(self, sample_medicine):
+        """
+        TST95: Aviso pospuesto que se cierra sin responder
+        Datos de entrada: Dosis de las 08:00 pospuesta a las 08:05; el aviso
+                          de las 08:05 se muestra y nadie lo responde
+        Resultado esperado: El aviso pospuesto conserva la dosis de las 08:00;
+                            después el medicamento vuelve a su horario y el
+                            siguiente aviso es a las 16:00
+        """
+        slot = datetime(2025, 10, 23, 8, 0)
+        med = dict(sample_medicine, id=1, start_date='2025-10-23', current_alert_time='08:05',
+                   last_notification_time='08:00')
+        now = datetime(2025, 10, 23, 8, 4, 30)
+        scheduler = ReminderScheduler()
+        scheduler.schedule(1, next_reminder_datetime(med, now))
+        queue, notified, snoozed = NotificationQueue(), {1: slot}, {1: slot}
+
+        assert drain_due(scheduler, queue, {1: med}.get, now, notified, snoozed) == 1
+        assert list(queue) == [Reminder(1, '08:05', slot, True)]
+        assert med['current_alert_time'] == '08:00' and snoozed == {}
+        assert notified == {1: slot}
+        assert scheduler.fire_time(1) == datetime(2025, 10, 23, 16, 0)
+        assert viewmodel.medication_card_data(med, now, notified[1])['next_dose_text'] == \
+            'Próxima dosis: 16:00'
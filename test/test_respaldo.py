@@ -0,0 +1,87 @@
+"""
+TST68-TST69: Tests para la exportación e importación de respaldos
+Verifican que medicamentos e historial se copien sin perder ni duplicar datos
+"""
+import os
+import pytest
+from datetime import datetime, timedelta
+
+from core import transfer
+from core.repository import MedicineRepository
+
+
+@pytest.fixture
+def source(repository, sample_medicine):
+    """BD con dos medicamentos y un historial de tomas y posposiciones"""
+    start = datetime(2025, 10, 23, 8, 0)
+    for name in ('Paracetamol', 'Ibuprofeno'):
+        med = dict(sample_medicine, name=name, start_date='2025-10-23')
+        med['id'] = repository.insert_medicine(med)
+        for i in range(3):
+            when = start + timedelta(hours=8 * i)
+            repository.record_dose_event(med, 'taken', f"{when:%H:%M}", when=when)
+        repository.record_dose_event(med, 'snoozed', '08:00', next_alert_time='08:05',
+                                     when=start + timedelta(days=1))
+    repository.flush()
+    return repository
+
+
+@pytest.fixture
+def target(tmp_path):
+    repo = MedicineRepository(str(tmp_path / 'destino.db'))
+    yield repo
+    repo.close()
+
+
+def snapshot(repository):
+    meds = sorted((m.to_dict() for m in repository.load_medicines()), key=lambda m: m['name'])
+    for med in meds:
+        med['history'] = repository.get_dose_history(med.pop('id'))
+    return meds
+
+
+class TestRespaldo:
+    """Casos de prueba para exportar e importar respaldos"""
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("fmt", transfer.FORMATS)
+    def test_ida_y_vuelta(self, source, target, tmp_path, fmt):
+        """
+        TST68: Exportar e importar en una BD vacía
+        Datos de entrada: 2 medicamentos con 3 tomas y 1 posposición cada uno,
+                          importados en lotes de 3 filas (JSON Lines y CSV)
+        Resultado esperado: Mismos medicamentos, contadores e historial (con nulos)
+        """
+        path = str(tmp_path / f"respaldo.{fmt}")
+        exported = transfer.export_data(source, path)
+        assert (exported['medicamentos'], exported['dosis']) == (2, 8)
+        assert not os.path.exists(path + ".tmp")
+
+        imported = transfer.import_data(target, path, batch_size=3)
+        assert (imported['medicamentos'], imported['dosis'], imported['omitidos']) == (2, 8, 0)
+        assert imported['filas_por_segundo'] > 0
+
+        restored = snapshot(target)
+        assert restored == snapshot(source)
+        assert [m['taken_doses'] for m in restored] == [3, 3]
+        assert restored[0]['current_alert_time'] == '08:05'
+        assert restored[0]['history'][0]['next_alert_time'] is None
+
+    @pytest.mark.integration
+    def test_importar_dos_veces_no_duplica(self, source, target, tmp_path):
+        """
+        TST69: Importar el mismo respaldo dos veces y un archivo no reconocido
+        Datos de entrada: Respaldo CSV importado dos veces; archivo .txt
+        Resultado esperado: La segunda vez se omiten medicamentos e historial;
+                            el .txt se rechaza con ValueError
+        """
+        path = str(tmp_path / "respaldo.csv")
+        transfer.export_data(source, path)
+        transfer.import_data(target, path)
+        again = transfer.import_data(target, path)
+
+        assert (again['medicamentos'], again['dosis'], again['omitidos']) == (0, 0, 10)
+        assert sum(len(m['history']) for m in snapshot(target)) == 8
+
+        with pytest.raises(ValueError):
+            transfer.export_data(source, str(tmp_path / "respaldo.txt"))
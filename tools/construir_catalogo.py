@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""
+Construye el catálogo binario de medicamentos a partir del CSV.
+
+La app abre data/medicamentos.cat con mmap (core.catalog.MappedCatalog),
+así que el costo de arranque no crece con el tamaño del formulario. Hay
+que volver a ejecutar esta herramienta cada vez que cambie el CSV.
+
+Uso: python tools/construir_catalogo.py [--csv data/medicamentos.csv] [--salida data/medicamentos.cat]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.catalog import DEFAULT_CATALOG_PATH, DEFAULT_MAPPED_PATH, read_csv, write_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye el catálogo binario de medicamentos")
+    parser.add_argument("--csv", default=DEFAULT_CATALOG_PATH, help="CSV name,typical_dose,description")
+    parser.add_argument("--salida", default=DEFAULT_MAPPED_PATH, help="Archivo binario a generar")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    entries = read_csv(args.csv)
+    # Se escribe a un temporal para no dejar un catálogo a medias si falla
+    tmp_path = args.salida + ".tmp"
+    count = write_catalog(entries, tmp_path)
+    os.replace(tmp_path, args.salida)
+
+    print(f"{count} medicamentos ({len(entries) - count} duplicados omitidos) -> {args.salida}")
+    print(f"{os.path.getsize(args.salida) / 1024:.1f} KB en {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()